@@ -5,11 +5,12 @@ from datetime import datetime
 
 import requests
 from flask import jsonify, request, Response, current_app
-from database.models import db, HappyHourPlace, PopupEvent, HitechEmail, User, Purchase
+from database.models import db, CacheVersion, HappyHourPlace, PopupEvent, HitechEmail, User, Purchase
 from whatsapp_bot.models import (
     WaConversation, WaCompany, WaAdvocate, WaUser,
-    WaApplication, WaApplicationRecipient, WaCompanyRequest, WaContactMessage,
+    WaApplication, WaApplicationRecipient, WaCompanyAlias, WaCompanyRequest, WaContactMessage,
 )
+from whatsapp_bot.aliases import set_admin_aliases
 from . import admin_bp
 from .auth import login_required
 
@@ -62,6 +63,7 @@ def create_place():
             recommended=data.get('Recommended', '')
         )
         db.session.add(place)
+        CacheVersion.bump('places')  # every worker's map cache
         db.session.commit()
         from app import clear_data_cache
         clear_data_cache()
@@ -101,6 +103,7 @@ def update_place(id):
         if 'Kosher' in data: place.kosher = data['Kosher'] in [True, 'yes', 'true', 'True', 1]
         if 'Recommended' in data: place.recommended = data['Recommended']
 
+        CacheVersion.bump('places')  # every worker's map cache
         db.session.commit()
         from app import clear_data_cache
         clear_data_cache()
@@ -115,6 +118,7 @@ def delete_place(id):
     place = HappyHourPlace.query.get_or_404(id)
     try:
         db.session.delete(place)
+        CacheVersion.bump('places')  # every worker's map cache
         db.session.commit()
         from app import clear_data_cache
         clear_data_cache()
@@ -123,6 +127,57 @@ def delete_place(id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
+@admin_bp.route('/api/places/import-sheet', methods=['POST'])
+@login_required
+def import_places_sheet():
+    """Pull the Google Sheet into ig_happy_hours: only rows that are new or
+    edited since the last import are written — new names inserted, existing
+    ones (case-insensitive) updated, in two bulk statements.
+    ?full=1 re-imports every row."""
+    from places.sheet_import import upsert_places
+    from app import sheet_sync, clear_data_cache
+    try:
+        changes = sheet_sync.fetch('db-import')
+        rows = changes.imported if request.args.get('full') else changes.changed
+        inserted, updated = upsert_places(rows) if len(rows) else (0, 0)
+        changes.commit()
+        if inserted or updated:
+            clear_data_cache()
+        return jsonify({'inserted': inserted, 'updated': updated,
+                        'unchanged': len(changes.imported) - len(rows),
+                        'removed_from_sheet': changes.removed,
+                        'needs_geocode': int(rows.needs_geocode.sum())})
+    except Exception as e:
+        logger.exception("Sheet import failed")
+        return jsonify({'error': str(e)}), 400
+
+# --- Instagram feed sync ---
+
+@admin_bp.route('/api/instagram/sync', methods=['GET'])
+@login_required
+def instagram_sync_stats():
+    """This worker's feed-sync counters: rounds run, rounds skipped because
+    another thread/worker held the sync (busy_*) or had just finished it
+    (skipped_fresh), failures, last duration/result."""
+    from app import ig_sync
+    return jsonify(ig_sync.stats())
+
+@admin_bp.route('/api/instagram/sync', methods=['POST'])
+@login_required
+def instagram_sync_now():
+    """Run a sync round now (?full=1 re-fetches everything). Returns 409 if
+    one is already in flight."""
+    from app import ig_sync
+    try:
+        result = ig_sync.sync(full=True if request.args.get('full') else None)
+    except Exception as e:
+        logger.exception("Instagram sync failed")
+        return jsonify({'error': str(e)}), 502
+    if result is None and ig_sync.last_skip == 'busy':
+        return jsonify({'error': 'A sync is already running', 'stats': ig_sync.stats()}), 409
+    return jsonify({'result': result, 'skipped': None if result else ig_sync.last_skip,
+                    'stats': ig_sync.stats()})
+
 # --- Popup Events API ---
 
 @admin_bp.route('/api/events', methods=['GET'])
@@ -270,6 +325,9 @@ def get_whatsapp_companies():
             a["email"] += 1
         if adv.referral_link:
             a["link"] += 1
+    aliases = {}
+    for al in WaCompanyAlias.query.order_by(WaCompanyAlias.id).all():
+        aliases.setdefault(al.company_id, []).append(al.alias)
     out = []
     for c in WaCompany.query.order_by(
             WaCompany.created_at.desc().nullslast(), WaCompany.name).all():
@@ -277,6 +335,7 @@ def get_whatsapp_companies():
         out.append({
             "id": c.id, "name": c.name,
             "careers_url": c.careers_url or "",
+            "aliases": ", ".join(aliases.get(c.id, [])),
             "total_advocates": a["total"],
             "email_advocates": a["email"],
             "link_advocates": a["link"],
@@ -688,6 +747,13 @@ def update_whatsapp_company(id):
         if url and not url.startswith(("http://", "https://")):
             return jsonify({"error": "careers URL must start with http:// or https://"}), 400
         c.careers_url = url or None
+    if "aliases" in data:
+        # comma-separated other names ("monday, מאנדיי") for the bot's exact lookup
+        try:
+            set_admin_aliases(c, (data.get("aliases") or "").split(","))
+        except ValueError as exc:
+            db.session.rollback()
+            return jsonify({"error": str(exc)}), 400
     db.session.commit()
     return jsonify({"id": c.id, "name": c.name, "careers_url": c.careers_url or ""})
 
@@ -802,8 +868,8 @@ def bulk_delete_whatsapp_companies():
 
 
 def _delete_company_cascade(company):
-    """Delete a company plus everything that references it — advocates and
-    applications (with their recipients) — and detach it from backfill requests,
+    """Delete a company plus everything that references it — advocates, aliases
+    and applications (with their recipients) — and detach it from backfill requests,
     so there are no FK violations."""
     app_ids = [a.id for a in WaApplication.query.filter_by(company_id=company.id).all()]
     if app_ids:
@@ -811,6 +877,7 @@ def _delete_company_cascade(company):
             WaApplicationRecipient.application_id.in_(app_ids)).delete(synchronize_session=False)
         WaApplication.query.filter_by(company_id=company.id).delete(synchronize_session=False)
     WaAdvocate.query.filter_by(company_id=company.id).delete(synchronize_session=False)
+    WaCompanyAlias.query.filter_by(company_id=company.id).delete(synchronize_session=False)
     WaCompanyRequest.query.filter_by(resolved_company_id=company.id).update(
         {WaCompanyRequest.resolved_company_id: None}, synchronize_session=False)
     db.session.delete(company)
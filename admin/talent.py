@@ -17,20 +17,21 @@ from datetime import datetime, timedelta
 from urllib.parse import quote
 
 from flask import (Response, current_app, jsonify, render_template, request,
-                   session)
+                   session, stream_with_context)
 from sqlalchemy.orm import defer
 
 from database.models import db
 from talent import config as tcfg
 from talent import emails as temails
 from talent.ingest import sync_gmail
-from talent.matching import plausible, run_reverse_matching
+from talent.matching import run_reverse_matching
 from talent.models import (CANDIDATE_STATUSES, FIT_LEVELS, REFERRAL_METHODS,
                            REFERRAL_STATUSES, TalentAiLog, TalentCandidate,
                            TalentCompany, TalentCv, TalentEmail, TalentMatch,
                            TalentReferral)
-from talent.pipeline import (UploadError, add_cv, analyze_pending_async,
-                             ensure_candidate)
+from talent.pipeline import (UploadError, add_cv, analysis_progress,
+                             analyze_pending_async, ensure_candidate)
+from talent.prefilter import candidate_index
 
 from . import admin_bp
 from .auth import login_required
@@ -465,39 +466,54 @@ def talent_cv_library():
 @admin_bp.route('/talent/cvs.zip')
 @login_required
 def talent_cvs_zip():
-    """Every CV as one ZIP: <Candidate_Name>/v<n>_<file>. Blobs are read in
-    chunks so a big library doesn't sit in memory all at once."""
-    import io
-    import zipfile
+    """Every CV as one ZIP: <Candidate_Name>/v<n>_<file>, streamed while it's
+    written (talent/export.py) from a server-side cursor, a few blobs at a
+    time. Optional filters: ?status=STRONG,MAYBE (candidate status),
+    ?since= / ?until= (YYYY-MM-DD, CV received date, inclusive)."""
     from cv_review.storage import sanitize_name
+    from talent.export import compress_type, stream_zip
+
+    q = (db.session.query(TalentCv.version, TalentCv.filename, TalentCv.ext,
+                          TalentCv.file, TalentCv.created_at,
+                          TalentCandidate.name, TalentCandidate.email)
+         .outerjoin(TalentCandidate, TalentCandidate.id == TalentCv.candidate_id)
+         .filter(TalentCv.file.isnot(None))
+         .order_by(TalentCv.created_at.desc()))
+    statuses = [s for s in _parse_list(request.args.get('status', '').upper())
+                if s in CANDIDATE_STATUSES]
+    if statuses:
+        q = q.filter(TalentCandidate.status.in_(statuses))
+    try:
+        if request.args.get('since'):
+            q = q.filter(TalentCv.created_at >= datetime.strptime(request.args['since'],
+                                                                  '%Y-%m-%d'))
+        if request.args.get('until'):
+            q = q.filter(TalentCv.created_at < datetime.strptime(request.args['until'],
+                                                                 '%Y-%m-%d') + timedelta(days=1))
+    except ValueError:
+        return 'Dates must be YYYY-MM-DD', 400
+
+    def entries():
+        used = set()
+        for r in q.yield_per(4):  # server-side cursor on Postgres: 4 blobs in memory at most
+            if not r.file:
+                continue
+            folder = sanitize_name(r.name or r.email or 'Unknown')
+            stem = sanitize_name(os.path.splitext(r.filename or 'cv')[0])
+            name = f'{folder}/v{r.version}_{stem}{r.ext or ""}'
+            n = 2
+            while name in used:
+                name = f'{folder}/v{r.version}_{stem}_{n}{r.ext or ""}'
+                n += 1
+            used.add(name)
+            yield name, r.file, r.created_at, compress_type(r.ext)
 
-    ids = [r[0] for r in db.session.query(TalentCv.id)
-           .order_by(TalentCv.created_at.desc()).limit(2000).all()]
-    cands = {c.id: c for c in TalentCandidate.query.all()}
-    buf = io.BytesIO()
-    used = set()
-    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for i in range(0, len(ids), 25):     # chunked: bounded memory, few round trips
-            for cv in TalentCv.query.filter(TalentCv.id.in_(ids[i:i + 25])).all():
-                if not cv.file:
-                    continue
-                cand = cands.get(cv.candidate_id)
-                folder = sanitize_name((cand.name or cand.email or 'Unknown')
-                                       if cand else 'Unknown')
-                stem = sanitize_name(os.path.splitext(cv.filename or 'cv')[0])
-                name = f'{folder}/v{cv.version}_{stem}{cv.ext or ""}'
-                n = 2
-                while name in used:
-                    name = f'{folder}/v{cv.version}_{stem}_{n}{cv.ext or ""}'
-                    n += 1
-                used.add(name)
-                zf.writestr(name, cv.file)
-    buf.seek(0)
     stamp = datetime.utcnow().strftime('%Y-%m-%d')
-    return Response(buf.getvalue(), mimetype='application/zip', headers={
-        'Content-Disposition': f'attachment; filename="ofoodiez-cvs-{stamp}.zip"',
-        'Cache-Control': 'private, no-store',
-    })
+    return Response(stream_with_context(stream_zip(entries())),
+                    mimetype='application/zip', headers={
+                        'Content-Disposition': f'attachment; filename="ofoodiez-cvs-{stamp}.zip"',
+                        'Cache-Control': 'private, no-store',
+                    })
 
 
 @admin_bp.route('/talent/cv/<cv_id>/file')
@@ -705,12 +721,13 @@ def talent_reanalyze(cand_id):
 @admin_bp.route('/api/talent/pending-count')
 @login_required
 def talent_pending_count():
-    """How many active CVs are still being analyzed. One tiny query — the
-    dashboard polls this instead of blind-reloading the whole page."""
+    """How many active CVs are still being analyzed, plus this worker's
+    analyzer progress. One tiny query — the dashboard polls this instead of
+    blind-reloading the whole page."""
     n = db.session.query(db.func.count(TalentCv.id)).filter(
         TalentCv.is_active.is_(True),
         TalentCv.analysis_status.in_(('pending', 'running'))).scalar()
-    return jsonify({'pending': n or 0})
+    return jsonify({'pending': n or 0, 'progress': analysis_progress()})
 
 
 @admin_bp.route('/api/talent/candidate/<cand_id>/analysis-status')
@@ -1127,16 +1144,13 @@ def talent_find_candidates(company_id):
     cvs = _active_cvs([c.id for c in cands])
     referred = {r.candidate_id for r in TalentReferral.query.filter_by(
         company_id=comp.id).all()}
-    scored = []
-    for cand in cands:
-        cv = cvs.get(cand.id)
-        analysis = (cv.analysis or {}) if cv else None
-        if not analysis or cv.analysis_status != 'complete':
-            continue
-        ok, score = plausible(analysis, comp)
-        if ok:
-            scored.append((score, cand, analysis))
-    scored.sort(key=lambda t: -t[0])
+    analyzed = [(cand, cvs[cand.id]) for cand in cands
+                if cand.id in cvs and cvs[cand.id].analysis
+                and cvs[cand.id].analysis_status == 'complete']
+    index = candidate_index([cv.analysis for _, cv in analyzed],
+                            [(cv.id, cv.analyzed_at) for _, cv in analyzed])
+    scored = [(score, analyzed[i][0], analyzed[i][1].analysis)
+              for score, i in index.scored(comp)]
     top = scored[:25]
     return jsonify({
         'possible': len(scored),
@@ -1,8 +1,8 @@
-from flask import Flask, jsonify, render_template, request, redirect, url_for, session, Response
-import pandas as pd
+from flask import Flask, jsonify, render_template, request, redirect, url_for, session, Response, send_file
 import os
 import re
 import json
+import math
 import time
 import secrets
 import smtplib
@@ -10,12 +10,21 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
 from geopy.geocoders import GoogleV3
-from geopy.exc import GeocoderTimedOut
 from dotenv import load_dotenv
 import requests
-from io import StringIO
 from data import data as home_data
-from database.models import PopupEvent, HappyHourPlace, HitechEmail
+from places.geocode_store import GeocodeStore
+from places.geocoding import BatchGeocoder
+from places.hours import parse_open_at
+from places.sheet_sync import SheetSync
+from places.snapshot import PlacesSnapshot
+from places.spatial import check_bbox
+from ttl_cache import TTLCache
+from single_flight import SingleFlight
+from instagram_feed.store import PostStore
+from instagram_feed.media import MediaCache, pick_width, source_url
+from instagram_feed.sync import InstagramSync
+from database.models import PopupEvent, HappyHourPlace, HitechEmail, CacheVersion
 from instagram_automation.models import User
 from instagram_automation.config import Config
 
@@ -113,108 +122,83 @@ SHEET_URL = f'https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=cs
 # Cache configuration
 CACHE_DIR = 'data'
 GEOCODE_CACHE_FILE = os.path.join(CACHE_DIR, 'geocode_cache.json')
-CACHE_EXPIRY_HOURS = 24
+GEOCODE_DB_FILE = os.path.join(CACHE_DIR, 'geocode_cache.sqlite3')
+# DB edits invalidate through CacheVersion, so the TTL only bounds how long a
+# sheet-fallback load (or a direct SQL edit) can go unnoticed.
+CACHE_EXPIRY_HOURS = 72
+
+# Background geocoding batches (places/geocoding.py). Google allows 50 QPS;
+# stay well under it.
+GEOCODE_WORKERS = 4
+GEOCODE_RATE_PER_SEC = 10
 
 # Initialize geolocator
 geolocator = GoogleV3(api_key=GOOGLE_MAPS_API_KEY, user_agent="ofoodiez_map")
 
 
-# ============ GEOCODE CACHE (Persistent - stored in git) ============
+# ============ GEOCODE CACHE (SQLite, seeded from the JSON stored in git) ============
 
-def load_geocode_cache():
-    """Load geocode cache from file."""
-    if os.path.exists(GEOCODE_CACHE_FILE):
-        try:
-            with open(GEOCODE_CACHE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"⚠️ Could not load geocode cache: {e}")
-    return {}
+# Shared by all workers; geocode_cache.json is merged in whenever it changes.
+geocode_cache = GeocodeStore(GEOCODE_DB_FILE, seed_json=GEOCODE_CACHE_FILE)
+print(f"📍 Geocode cache ready ({len(geocode_cache)} addresses)")
 
-def save_geocode_cache(cache):
-    """Save geocode cache to file."""
-    os.makedirs(CACHE_DIR, exist_ok=True)
-    try:
-        with open(GEOCODE_CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cache, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print(f"⚠️ Could not save geocode cache: {e}")
-
-# Load geocode cache on startup
-geocode_cache = load_geocode_cache()
-print(f"📍 Loaded {len(geocode_cache)} cached geocodes")
-
-def geocode_address(address, city=""):
-    """Geocode an address to get latitude and longitude."""
-    global geocode_cache
-    
-    if not address:
-        return None, None
-    
-    # Build full address with Israel for better accuracy
-    if city:
-        full_address = f"{address}, {city}, Israel"
-    else:
-        full_address = f"{address}, Israel"
-    
-    # Check cache first
-    if full_address in geocode_cache:
-        cached = geocode_cache[full_address]
-        if cached and len(cached) == 2:
-            return cached[0], cached[1]
-        return None, None
-    
-    try:
-        location = geolocator.geocode(full_address)
-        if location:
-            result = [location.latitude, location.longitude]
-            geocode_cache[full_address] = result
-            save_geocode_cache(geocode_cache)
-            print(f"  📍 Geocoded: {full_address} -> {result}")
-            return result[0], result[1]
-    except GeocoderTimedOut:
-        print(f"  ⚠️ Geocoding timeout for: {full_address}")
-    except Exception as e:
-        print(f"  ⚠️ Geocoding error for {full_address}: {e}")
-    
-    geocode_cache[full_address] = None
-    save_geocode_cache(geocode_cache)
-    return None, None
+geocoder = BatchGeocoder(geolocator.geocode, geocode_cache,
+                         workers=GEOCODE_WORKERS, rate=GEOCODE_RATE_PER_SEC)
 
+# Local mirror of the Google Sheet (data/places_sheet.csv + .meta.json): fetched
+# with conditional GETs, diffed row by row (places/sheet_sync.py)
+sheet_sync = SheetSync(SHEET_URL, CACHE_DIR, name='places_sheet')
 
-# ============ DATA CACHE (In-memory with TTL) ============
 
-# In-memory cache for places data
-_data_cache = {
-    'places': None,
-    'timestamp': None
-}
+def fill_coordinates(places):
+    """Fill missing Latitude/Longitude from the geocode cache and hand any
+    uncached address to a background batch — a request never waits on the
+    geocoding API. Places without coordinates are skipped by the map until the
+    batch lands (see _on_geocoded). Every load re-queues what is still
+    uncached, so a failed batch or an expired "not found" entry is retried;
+    addresses already in flight are not submitted twice."""
+    missing = geocoder.apply_cached(places)
+    if missing:
+        print(f"📍 {len(missing)} addresses to geocode — queued in background")
+        geocoder.submit(missing, on_done=_on_geocoded)
 
-def get_cached_data():
-    """Get cached data if not expired."""
-    if _data_cache['places'] is None or _data_cache['timestamp'] is None:
-        return None
-    
-    # Check expiry
-    if datetime.now() - _data_cache['timestamp'] < timedelta(hours=CACHE_EXPIRY_HOURS):
-        hours_remaining = CACHE_EXPIRY_HOURS - (datetime.now() - _data_cache['timestamp']).seconds // 3600
-        print(f"✓ Using cached data (expires in ~{hours_remaining} hours)")
-        return _data_cache['places']
-    
-    print("⏰ Data cache expired, fetching fresh data...")
-    return None
-
-def set_cached_data(places):
-    """Cache places data in memory."""
-    _data_cache['places'] = places
-    _data_cache['timestamp'] = datetime.now()
-    print(f"💾 Cached {len(places)} places in memory")
+
+def _on_geocoded(results):
+    """A background batch finished: rebuild the places snapshot (it reads the
+    new coordinates from the geocode store) instead of waiting for the next
+    rebuild. Never patched in place: requests may be serializing the current
+    snapshot, and a rebuild that landed meanwhile must not be overwritten."""
+    if any(results.values()):
+        places_cache.invalidate()
+        places_cache.refresh()
+
+
+# ============ DATA CACHE (In-memory, stale-while-revalidate) ============
+
+# The places list pre-rendered for /api/places (places/snapshot.py), cached per
+# process in a TTLCache: past CACHE_EXPIRY_HOURS requests keep getting the
+# current snapshot while ONE background thread rebuilds it, and the cache is
+# warmed at startup (after load_places below), so a map request never pays for
+# the DB query + sheet fallback.
+# Every write to ig_happy_hours (admin API, Telegram bot) bumps the 'places'
+# CacheVersion in its own transaction; each worker polls it every few seconds
+# and rebuilds once, so edits show everywhere without a short TTL.
+
+def _places_version():
+    with app.app_context():
+        return CacheVersion.current('places')
+
+places_cache = TTLCache(lambda _key: _build_places_snapshot(),
+                        ttl=CACHE_EXPIRY_HOURS * 3600, name='places cache',
+                        version=_places_version)
 
 def clear_data_cache():
-    """Clear the in-memory data cache."""
-    _data_cache['places'] = None
-    _data_cache['timestamp'] = None
-    print("🗑️ Data cache cleared")
+    """Rebuild this worker's places cache right away (other workers follow via
+    the 'places' CacheVersion). Readers keep the current snapshot until the new
+    one lands (one background DB read)."""
+    places_cache.invalidate()
+    places_cache.refresh()
+    print("🔄 Places cache refresh started")
 
 def get_last_update():
     """Get the last update date from the database, fallback to config file."""
@@ -631,56 +615,47 @@ def hitech_community():
 # ── /hitech/referrals-bot companies list ─────────────────────────────────────
 # The live wa_companies⋈wa_advocates query runs ~8s in prod (deterministic — a
 # DB-side issue) and the list changes only on rare admin edits, so we serve it
-# from an in-process cache. Stale reads refresh in the background, so a page view
-# never waits on the slow query; the cache is warmed at startup below.
+# from an in-process cache (ttl_cache.TTLCache). Stale reads refresh in the
+# background, so a page view never waits on the slow query; the cache is warmed
+# at startup below.
 # ponytail: TTL + serve-stale. If admin edits must show instantly, bust the cache
 # from the advocate/company write endpoints instead of shortening the TTL.
 _FEATURED_NAMES = {'google', 'meta', 'microsoft', 'amazon', 'apple', 'wix',
                    'monday.com', 'fiverr', 'checkout.com', 'taboola'}
-_BOT_COMPANIES = {"data": None, "ts": 0.0, "refreshing": False}
 _BOT_COMPANIES_TTL = 600  # seconds
 
 
-def _refresh_bot_companies():
-    """Query companies that have an active advocate and repopulate the cache."""
+def _load_bot_companies(_key=None):
+    """Companies that have an active advocate, for the bot page."""
     from whatsapp_bot.models import WaCompany, WaAdvocate
-    try:
-        with app.app_context():
-            t0 = time.monotonic()
-            rows = (WaCompany.query
-                    .join(WaAdvocate, WaCompany.id == WaAdvocate.company_id)
-                    .filter(WaAdvocate.status == 'active')
-                    .distinct()
-                    .order_by(WaCompany.name.asc())
-                    .all())
-            data = [{"name": co.name,
-                     # careers_url set in admin (WhatsApp → Companies → Edit); None → non-clickable card.
-                     "careers_url": co.careers_url,
-                     "featured": co.name.lower() in _FEATURED_NAMES} for co in rows]
-        print(f"⏱️  referrals-bot companies query: {time.monotonic() - t0:.2f}s ({len(data)} companies)")
-        _BOT_COMPANIES["data"] = data
-        _BOT_COMPANIES["ts"] = time.monotonic()
-    except Exception as e:
-        print(f"⚠️ Error fetching companies with advocates: {e}")
-    finally:
-        _BOT_COMPANIES["refreshing"] = False
+    with app.app_context():
+        rows = (WaCompany.query
+                .join(WaAdvocate, WaCompany.id == WaAdvocate.company_id)
+                .filter(WaAdvocate.status == 'active')
+                .distinct()
+                .order_by(WaCompany.name.asc())
+                .all())
+        return [{"name": co.name,
+                 # careers_url set in admin (WhatsApp → Companies → Edit); None → non-clickable card.
+                 "careers_url": co.careers_url,
+                 "featured": co.name.lower() in _FEATURED_NAMES} for co in rows]
+
+
+_bot_companies = TTLCache(_load_bot_companies, ttl=_BOT_COMPANIES_TTL,
+                          name='referrals-bot companies')
 
 
 def _companies_with_advocates():
     """Cached companies list for the bot page — instant read, background refresh."""
-    fresh = (_BOT_COMPANIES["data"] is not None
-             and time.monotonic() - _BOT_COMPANIES["ts"] < _BOT_COMPANIES_TTL)
-    if not fresh and not _BOT_COMPANIES["refreshing"]:
-        _BOT_COMPANIES["refreshing"] = True
-        if _BOT_COMPANIES["data"] is None:
-            _refresh_bot_companies()                                              # first load: block once
-        else:
-            threading.Thread(target=_refresh_bot_companies, daemon=True).start()  # serve stale, refresh async
-    return _BOT_COMPANIES["data"] or []
+    try:
+        return _bot_companies.get() or []
+    except Exception as e:
+        print(f"⚠️ Error fetching companies with advocates: {e}")
+        return []
 
 
 # Warm the cache off the request path so the first visitor doesn't eat the query.
-threading.Thread(target=_refresh_bot_companies, daemon=True).start()
+_bot_companies.warm()
 
 
 @app.route('/hitech/referrals-bot')
@@ -1030,32 +1005,28 @@ def sitemap_xml():
 
 # ============ INSTAGRAM FEED API ============
 IG_POSTS_CACHE_FILE = os.path.join(CACHE_DIR, 'ig_posts_cache.json')
-IG_CACHE_EXPIRY_HOURS = 1
-
-def fetch_all_ig_posts():
-    """Fetch all IG posts for the active user, using pagination. Cache results."""
-    # Check cache first
-    if os.path.exists(IG_POSTS_CACHE_FILE):
-        file_mod_time = datetime.fromtimestamp(os.path.getmtime(IG_POSTS_CACHE_FILE))
-        if datetime.now() - file_mod_time < timedelta(hours=IG_CACHE_EXPIRY_HOURS):
-            try:
-                with open(IG_POSTS_CACHE_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading IG posts cache: {e}")
-                
-    # Needs fetching. Get active user
-    try:
+# Incremental sync of the feed (new posts + fresh like/comment counts), off the
+# request path; a full re-fetch once a day drops deleted posts.
+IG_SYNC_INTERVAL_MINUTES = 15
+
+# Parsed once per change of the file (instagram_feed/store.py); the feed
+# endpoints slice and search it in memory.
+ig_posts = PostStore(IG_POSTS_CACHE_FILE)
+
+def _ig_sync_account():
+    """(ig_user_id, access_token) of the account the public feed shows, or None
+    to skip this sync round. Runs on the sync thread."""
+    with app.app_context():
         # Force the backend to ONLY fetch posts for the official ofoodiez account
         # This prevents random users from showing their posts if they somehow connected their account
         user = User.query.filter_by(ig_username='ofoodiez', is_active=True).first()
-        
+
         # Fallback to the tester account if we are developing locally
         if not user:
             user = User.query.filter_by(ig_username='tester_account', is_active=True).first()
-            
+
         if not user or not user.access_token:
-            return []
+            return None
 
         # If user is a mock account, return mock posts for testing
         if user.access_token == 'test_token_123' or user.ig_username == 'tester_account':
@@ -1076,7 +1047,8 @@ def fetch_all_ig_posts():
             mock_posts[2]["caption"] = "Nothing beats a good Pasta on a rainy day."
             mock_posts[2]["media_type"] = "VIDEO"
             mock_posts[2]["thumbnail_url"] = "https://images.unsplash.com/photo-1473093295043-cdd812d0e601?q=80&w=600&auto=format&fit=crop"
-            return mock_posts
+            ig_posts.replace(mock_posts, persist=False)
+            return None
 
         # Keep the long-lived token alive without any manual re-auth: when it's
         # within ~2 weeks of the 60-day expiry, refresh it here (server-side, so it
@@ -1091,61 +1063,32 @@ def fetch_all_ig_posts():
         except Exception as e:
             print(f"⚠️ IG token auto-refresh skipped: {e}")
 
-        posts = []
-        url = f"{Config.IG_GRAPH_URL}/{Config.GRAPH_API_VERSION}/{user.ig_user_id}/media"
-        params = {
-            'fields': 'id,caption,media_url,permalink,media_type,media_product_type,thumbnail_url,timestamp,like_count,comments_count,is_shared_to_feed',
-            'access_token': user.access_token,
-            'limit': 100
-        }
-        
-        while url:
-            resp = requests.get(url, params=params, timeout=15)
-            data = resp.json()
-            if 'data' in data:
-                for post in data['data']:
-                    # Filter out Reels that were NOT shared to the main feed grid
-                    if post.get('media_product_type') == 'REELS' and post.get('is_shared_to_feed') is False:
-                        continue
-                    posts.append(post)
-            
-            # Pagination
-            paging = data.get('paging', {})
-            url = paging.get('next')
-            params = {} # The next URL already contains all parameters including access_token
-            
-            # Guard against fetching too many posts to prevent timeouts
-            if len(posts) >= 500:
-                break
-                
-        # Save to cache
-        os.makedirs(CACHE_DIR, exist_ok=True)
-        with open(IG_POSTS_CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(posts, f, ensure_ascii=False)
-            
-        print(f"📸 Fetched and cached {len(posts)} Instagram posts")
-        return posts
-    except Exception as e:
-        print(f"❌ Error fetching IG posts from API: {e}")
-        # Fallback to expired cache if available
-        if os.path.exists(IG_POSTS_CACHE_FILE):
-            try:
-                with open(IG_POSTS_CACHE_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception:
-                pass
-        return []
+        return user.ig_user_id, user.access_token
+
+
+# One sync at a time across threads and gunicorn workers (flock on the lock
+# file); the others keep serving the current posts. Counters: /admin/api/instagram/sync
+ig_sync = InstagramSync(ig_posts, f"{Config.IG_GRAPH_URL}/{Config.GRAPH_API_VERSION}",
+                        _ig_sync_account,
+                        flight=SingleFlight('instagram sync',
+                                            os.path.join(CACHE_DIR, 'ig_sync.lock')))
+ig_sync.start(IG_SYNC_INTERVAL_MINUTES * 60)
+
+# Resized feed thumbnails (instagram_feed/media.py), LRU-trimmed to this size
+IG_MEDIA_CACHE_DIR = os.path.join(CACHE_DIR, 'ig_media')
+IG_MEDIA_CACHE_MB = 200
+IG_MEDIA_MAX_AGE = 30 * 24 * 3600
+ig_media = MediaCache(IG_MEDIA_CACHE_DIR, max_bytes=IG_MEDIA_CACHE_MB * 1024 * 1024,
+                      refresh_url=ig_sync.fetch_media)
 
 @app.route('/api/instagram/posts')
 def api_ig_posts():
     """Returns paginated posts"""
     limit = int(request.args.get('limit', 12))
     offset = int(request.args.get('offset', 0))
-    posts = fetch_all_ig_posts()
-    
-    paginated = posts[offset:offset+limit]
-    has_more = len(posts) > offset + limit
-    
+    # Read-only: ig_sync keeps the store fresh in the background
+    paginated, has_more = ig_posts.page(offset, limit)
+
     return jsonify({
         "posts": paginated,
         "has_more": has_more
@@ -1154,164 +1097,177 @@ def api_ig_posts():
 @app.route('/api/instagram/search')
 def api_ig_search():
     """Searches across all posts by caption text"""
-    query = request.args.get('q', '').lower().strip()
+    query = request.args.get('q', '')
     limit = int(request.args.get('limit', 12))
     offset = int(request.args.get('offset', 0))
-    posts = fetch_all_ig_posts()
-    
-    if not query:
-        paginated = posts[offset:offset+limit]
-        has_more = len(posts) > offset + limit
-        return jsonify({"posts": paginated, "has_more": has_more})
-        
-    filtered = []
-    for p in posts:
-        caption = p.get('caption', '').lower()
-        if query in caption:
-            filtered.append(p)
-            
-    paginated = filtered[offset:offset+limit]
-    has_more = len(filtered) > offset + limit
+    paginated, has_more = ig_posts.search(query, offset, limit)
     return jsonify({"posts": paginated, "has_more": has_more})
 
-@app.route('/api/places')
-def get_places():
+def _send_ig_media(post, width, fmt):
+    path, mimetype = ig_media.get(post, width, fmt)
+    # The variant never changes, but its mtime does (LRU touch): a fixed ETag
+    return send_file(path, mimetype=mimetype, max_age=IG_MEDIA_MAX_AGE, conditional=True,
+                     etag=f'{post["id"]}-{width}-{mimetype.rsplit("/", 1)[-1]}')
+
+
+@app.route('/api/instagram/media/<media_id>')
+def api_ig_media(media_id):
+    """A feed post's image, resized to ?w= (320/640/1080) and served as WebP
+    when the browser takes it, else JPEG — from our disk cache, with the CDN
+    only hit on the first request. Only posts in the feed are proxied."""
+    post = ig_posts.get(media_id)
+    if post is None:
+        return jsonify({"error": "Unknown post"}), 404
+    width = pick_width(request.args.get('w'))
+    fmt = 'webp' if 'image/webp' in request.accept_mimetypes.values() else 'jpeg'
     try:
-        # Check in-memory cache first
-        cached_places = get_cached_data()
-        if cached_places:
-            return jsonify(cached_places)
-        
-        # Try fetching from DB first
         try:
+            response = _send_ig_media(post, width, fmt)
+        except FileNotFoundError:
+            # Evicted (maybe by another worker) between get() and the open
+            response = _send_ig_media(post, width, fmt)
+    except Exception as e:
+        print(f"⚠️ IG media proxy failed for {media_id}: {e}")
+        # Let the browser try the CDN itself (the card falls back to the logo)
+        url = source_url(post)
+        return redirect(url, 302) if url else (jsonify({"error": "No image"}), 404)
+    response.headers['Cache-Control'] = f'public, max-age={IG_MEDIA_MAX_AGE}, immutable'
+    response.vary.add('Accept')
+    return response
+
+def load_places():
+    """The places list for the map: the DB, else the Google Sheet, else the
+    last local copy (data/places_cache.json). Raises if none is available.
+    Runs on the places_cache refresh thread, hence its own app context."""
+    # Try fetching from DB first
+    try:
+        with app.app_context():
             db_places = HappyHourPlace.query.all()
-            if db_places:
-                places_list = [p.to_dict() for p in db_places]
-                
-                # Geocode addresses if Latitude/Longitude are missing
-                for place in places_list:
-                    has_lat = place.get('Latitude') is not None and place.get('Latitude') != ""
-                    has_lng = place.get('Longitude') is not None and place.get('Longitude') != ""
-                    
-                    if not has_lat or not has_lng:
-                        address = place.get('Address', '')
-                        city = place.get('City', '')
-                        if address:
-                            lat, lng = geocode_address(address, city)
-                            if lat and lng:
-                                place['Latitude'] = lat
-                                place['Longitude'] = lng
-
-                set_cached_data(places_list)
-                print(f"✓ Loaded {len(places_list)} places from Database")
-                return jsonify(places_list)
-            else:
-                print("⚠️ Database is empty. Falling back to Google Sheets...")
-        except Exception as db_err:
-            print(f"⚠️ Database fetch failed: {db_err}. Falling back to Google Sheets...")
-        
-        # Fallback: Fetch fresh data from Google Sheets
-        try:
-            # Try to bypass system proxies if they are causing issues
-            response = requests.get(SHEET_URL, timeout=10, proxies={'http': None, 'https': None})
-            response.raise_for_status()
-            df = pd.read_csv(StringIO(response.content.decode('utf-8')))
-            print("✓ Loaded fresh data from Google Sheets")
-        except Exception as e:
-            print(f"⚠️ Could not fetch from Google Sheets: {e}")
-            # Fallback to local cache file if network fetch fails
-            cache_file = os.path.join(CACHE_DIR, 'places_cache.json')
-            if os.path.exists(cache_file):
-                print(f"🔄 Falling back to local cache: {cache_file}")
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    return jsonify(json.load(f))
-            else:
-                # If no sheets and no cache, then we re-raise to show the error
-                raise e
-        print(f"  Columns: {list(df.columns)}")
-        
-        # Strip whitespace from column names
-        df.columns = df.columns.str.strip()
-        
-        # Map Google Sheets column names to expected frontend column names
-        column_mapping = {
-            'Place Name (English)': 'Name',
-            'Place Name (Hebrew)': 'NameHebrew',
-            'Instagram Link': 'InstagramURL',
-            'Category': 'Category',
-            'Description': 'Description',
-            'Address': 'Address',
-            'City': 'City',
-            'Google Maps Link': 'GoogleMapsLink',
-            'Reservation Link': 'ReservationLink',
-            'OpeningHours': 'OpeningHours',
-            'Latitude': 'Latitude',
-            'Longitude': 'Longitude',
-            'Recommended': 'Recommended',
-            'Sunday': 'Sunday',
-            'Monday': 'Monday',
-            'Tuesday': 'Tuesday',
-            'Wednesday': 'Wednesday',
-            'Thursday': 'Thursday',
-            'Friday': 'Friday',
-            'Saturday': 'Saturday',
-            'Verified': 'Verified',
-            'Kosher': 'Kosher'
-        }
-        
-        # Drop duplicate columns (keep the first one)
-        df = df.loc[:, ~df.columns.duplicated()]
-        
-        # Drop the InstagramURL column if it exists (we only use Instagram Link)
-        if 'InstagramURL' in df.columns:
-            df = df.drop(columns=['InstagramURL'])
-        
-        # Rename columns that exist in the mapping
-        df = df.rename(columns={k: v for k, v in column_mapping.items() if k in df.columns})
-        
-        # Fill NaN values with empty string to avoid JSON errors (Fixes SyntaxError: Unexpected token 'N')
-        df = df.fillna("")
-        
-        # Strip whitespace from all string columns (fixes "After 20:00 " issue)
-        df = df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
-        
-        # Filter out rows where Name is empty (if Name column exists)
-        if 'Name' in df.columns:
-            df = df[df['Name'].str.strip().astype(bool)]
-
-        # Filter out rows where Category is empty (if Category column exists)
-        if 'Category' in df.columns:
-            df = df[df['Category'].str.strip().astype(bool)]
-
-        # Normalize Kosher to boolean
-        if 'Kosher' in df.columns:
-            df['Kosher'] = df['Kosher'].apply(
-                lambda v: True if str(v).strip().lower() in ('true', 'yes', '1') else False
-            )
+            places_list = [p.to_dict() for p in db_places]
+        if places_list:
+            # Geocode addresses if Latitude/Longitude are missing
+            fill_coordinates(places_list)
+            print(f"✓ Loaded {len(places_list)} places from Database")
+            return places_list
+        else:
+            print("⚠️ Database is empty. Falling back to Google Sheets...")
+    except Exception as db_err:
+        print(f"⚠️ Database fetch failed: {db_err}. Falling back to Google Sheets...")
 
-        # Geocode addresses if Latitude/Longitude are missing
-        places = df.to_dict(orient='records')
-        for place in places:
-            # Check if coordinates are missing or empty
-            has_lat = place.get('Latitude') and place.get('Latitude') != ""
-            has_lng = place.get('Longitude') and place.get('Longitude') != ""
-            
-            if not has_lat or not has_lng:
-                # Try to geocode from address
-                address = place.get('Address', '')
-                city = place.get('City', '')
-                lat, lng = geocode_address(address, city)
-                if lat and lng:
-                    place['Latitude'] = lat
-                    place['Longitude'] = lng
-        
-        # Save to in-memory cache
-        set_cached_data(places)
-        
-        return jsonify(places)
+    # Fallback: the Google Sheet, via its local mirror (conditional GET; an
+    # unchanged sheet is neither re-downloaded nor re-parsed)
+    try:
+        changes = sheet_sync.fetch('map')
+        print(f"✓ Loaded {'fresh' if changes.modified else 'unchanged'} data from Google Sheets")
+    except Exception as e:
+        print(f"⚠️ Could not fetch from Google Sheets: {e}")
+        # Fallback to local cache file if network fetch fails
+        cache_file = os.path.join(CACHE_DIR, 'places_cache.json')
+        if os.path.exists(cache_file):
+            print(f"🔄 Falling back to local cache: {cache_file}")
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        else:
+            # If no sheets and no cache, then we re-raise to show the error
+            raise e
+    # Column renames, trimming, booleans, coordinates: places/sheet_import.py
+    places = changes.imported.records()
+    # Geocode addresses if Latitude/Longitude are missing (cached ones are
+    # filled in place; only uncached addresses reach the geocoder)
+    fill_coordinates(places)
+    return places
+
+
+def _build_places_snapshot():
+    places = load_places()
+    snapshot = PlacesSnapshot(places)
+    print(f"💾 Cached {len(places)} places in memory (etag {snapshot.etag[:8]})")
+    return snapshot
+
+
+# Warm the cache off the request path so the first visitor doesn't eat the load.
+places_cache.warm()
+
+
+@app.route('/api/places')
+def get_places():
+    """All places (pre-rendered). ?open_at=now|<ISO datetime> narrows it to the
+    places whose happy hour is on at that moment (Israel time) — see
+    places/hours.py."""
+    try:
+        # Pre-rendered and cached: no DB or JSON work per request (see places_cache)
+        snapshot = places_cache.get()
+        open_at = request.args.get('open_at')
+        if open_at:
+            try:
+                when = parse_open_at(open_at)
+            except ValueError:
+                return jsonify({"error": "open_at must be 'now' or an ISO datetime"}), 400
+            return jsonify(snapshot.hours.open_at(when))
+        return snapshot.respond(request)
+    except Exception as e:
+        print(f"❌ Error loading data: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+def _float_args(name, count):
+    """Parse `count` comma-separated floats from query arg `name` — lat,lng
+    pairs, range-checked (None if absent). float() accepts "nan" and "inf",
+    which would blow up the grid maths, so those are rejected too."""
+    raw = request.args.get(name)
+    if raw is None:
+        return None
+    values = [float(v) for v in raw.split(',')]
+    if len(values) != count or not all(math.isfinite(v) for v in values):
+        raise ValueError(f"{name} needs {count} numbers")
+    for lat, lng in zip(values[::2], values[1::2]):
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValueError(f"{name} is out of range (lat -90..90, lng -180..180)")
+    return values
+
+
+@app.route('/api/places/nearby')
+def get_places_nearby():
+    """Places in a map viewport or around a point, nearest first, paginated —
+    so a phone only downloads what it can see instead of the whole /api/places.
+
+    ?bbox=south,west,north,east  — viewport; sorted by distance from ?center=lat,lng
+                                   if given, else from the box's middle
+    ?near=lat,lng&radius_km=N     — within N km (default 2) of the point
+    &limit=50&offset=0           — each place carries its distance_km
+    """
+    try:
+        bbox = _float_args('bbox', 4)
+        if bbox:
+            check_bbox(*bbox)
+        near = _float_args('near', 2)
+        center = _float_args('center', 2)
+        radius_km = float(request.args.get('radius_km', 2))
+        if not 0 < radius_km <= 20040:  # half the Earth's circumference; NaN fails too
+            raise ValueError("radius_km must be a number between 0 and 20040")
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError as e:
+        return jsonify({"error": f"Bad query: {e}"}), 400
+    if bool(bbox) == bool(near):
+        return jsonify({"error": "Pass exactly one of bbox= or near="}), 400
+
+    try:
+        spatial = places_cache.get().spatial
     except Exception as e:
         print(f"❌ Error loading data: {e}")
         return jsonify({"error": str(e)}), 500
+    if bbox:
+        hits = spatial.within_bbox(*bbox, center=center)
+    else:
+        hits = spatial.within_radius(near[0], near[1], radius_km)
+
+    page = hits[offset:offset + limit]
+    return jsonify({
+        "places": [dict(place, distance_km=round(d, 3)) for d, place in page],
+        "total": len(hits),
+        "has_more": len(hits) > offset + limit,
+    })
 
 @app.route('/api/refresh')
 def refresh_cache():
@@ -1323,22 +1279,14 @@ def refresh_cache():
     if not admin_secret or key != admin_secret:
         return jsonify({"error": "Unauthorized"}), 401
 
+    # Rebuilds in the background; the map keeps serving the current data until
+    # the new snapshot lands, so this returns immediately.
     clear_data_cache()
-    
-    # Trigger a fetch to ensure data is valid and update the cache immediately
+
     try:
-        # We call the internal logic or just call get_places (which handles fetching)
-        # However, get_places returns a Response object (jsonify), so we shouldn't call it directly if we want the data.
-        # But for populating the cache, it's fine.
-        # Better: just clear cache and let the next request handle it, OR fetch it here to confirm success.
-        # Let's fetch it here to be sure.
-        
-        # Re-using the logic from get_places would be best if it was refactored, 
-        # but calling the route function is okay-ish or we can just return success.
-        # Let's just return success to keep it simple and fast.
         return jsonify({
-            "status": "Cache cleared successfully", 
-            "message": "Next visit to the map will load fresh data.",
+            "status": "Cache refresh started",
+            "message": "The map will show fresh data within a few seconds.",
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         })
     except Exception as e:
@@ -121,11 +121,11 @@ document.addEventListener('DOMContentLoaded', () => {
         card.target = '_blank';
         card.className = 'ig-post-card';
 
-        // Determine image to show
-        let imageUrl = post.media_url;
-        if (post.media_type === 'VIDEO' && post.thumbnail_url) {
-            imageUrl = post.thumbnail_url;
-        }
+        // Resized + cached by our proxy (/api/instagram/media): the CDN links
+        // expire and are full-resolution. Tiles are <=320 CSS px wide.
+        const mediaUrl = `/api/instagram/media/${encodeURIComponent(post.id)}`;
+        const imageUrl = `${mediaUrl}?w=320`;
+        const srcset = `${mediaUrl}?w=320 320w, ${mediaUrl}?w=640 640w`;
 
         // Determine icon based on media type
         let iconHtml = '';
@@ -144,7 +144,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
         card.innerHTML = `
             <div class="ig-post-image-container">
-                <img src="${imageUrl}" alt="Instagram Post" class="ig-post-image" loading="lazy" onerror="this.onerror=null;this.src='/static/img/logo.png';this.classList.add('ig-post-image--fallback');">
+                <img src="${imageUrl}" srcset="${srcset}" sizes="(min-width: 900px) 17vw, (min-width: 768px) 25vw, (min-width: 480px) 33vw, 50vw" alt="Instagram Post" class="ig-post-image" loading="lazy" onerror="this.onerror=null;this.removeAttribute('srcset');this.src='/static/img/logo.png';this.classList.add('ig-post-image--fallback');">
                 ${iconHtml}
             </div>
             <div class="ig-post-content">
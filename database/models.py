@@ -4,6 +4,7 @@ Core Database Configuration and Models for the Website.
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
 from werkzeug.security import generate_password_hash, check_password_hash
 
 db = SQLAlchemy()
@@ -46,6 +47,7 @@ def _run_migrations():
         # before it existed must not sprout a package they were never offered.
         "ALTER TABLE portfolio_access ADD COLUMN show_access BOOLEAN DEFAULT FALSE",
         "ALTER TABLE portfolio_access ADD COLUMN access_price VARCHAR(64)",
+        "ALTER TABLE talent_cvs ADD COLUMN claimed_at TIMESTAMP",
     ]
     # Commit per statement: on Postgres a later failure's rollback would other-
     # wise wipe earlier uncommitted successes in the same transaction (sqlite
@@ -197,6 +199,50 @@ class HappyHourPlace(db.Model):
         return f'<HappyHourPlace "{self.name}">'
 
 
+class CacheVersion(db.Model):
+    """Generation counter for an in-process cache, shared by every worker.
+
+    Each gunicorn worker (and the Telegram bot thread) keeps its own copy of
+    caches like the places map. Writers bump the counter in the same
+    transaction as their edit; readers compare it (throttled — see
+    ttl_cache.TTLCache's `version`) and rebuild once when it moved.
+    Table auto-creates via init_db()'s db.create_all() at startup."""
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(64), primary_key=True)   # e.g. 'places'
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def bump(cls, name):
+        """Increment `name` in the current session; the caller commits, so the
+        bump lands atomically with the edit it announces. One upsert, so two
+        workers bumping a counter that doesn't exist yet can't both INSERT."""
+        now = datetime.utcnow()
+        insert = {'postgresql': postgresql.insert,
+                  'sqlite': sqlite.insert}.get(db.session.get_bind().dialect.name)
+        if insert is not None:
+            db.session.execute(
+                insert(cls).values(name=name, version=1, updated_at=now)
+                .on_conflict_do_update(index_elements=[cls.name],
+                                       set_={'version': cls.version + 1, 'updated_at': now}))
+            return
+        updated = db.session.execute(
+            sa.update(cls).where(cls.name == name)
+            .values(version=cls.version + 1, updated_at=now))
+        if not updated.rowcount:
+            db.session.add(cls(name=name, version=1))
+
+    @classmethod
+    def current(cls, name):
+        """The counter's value (0 before the first bump). One primary-key read."""
+        return db.session.execute(
+            sa.select(cls.version).where(cls.name == name)).scalar() or 0
+
+    def __repr__(self):
+        return f'<CacheVersion {self.name}={self.version}>'
+
+
 class HitechEmail(db.Model):
     """Tech community member collected from the HiTech community page."""
     __tablename__ = 'hitech_emails'
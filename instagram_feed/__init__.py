@@ -0,0 +1,2 @@
+"""The public Instagram feed (/api/instagram/*): the cached @ofoodiez posts
+and the operations the feed page runs on them."""
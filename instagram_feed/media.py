@@ -0,0 +1,209 @@
+"""Feed thumbnails, proxied: fetched from Instagram's CDN once, stored as
+resized WebP/JPEG variants in a size-bounded on-disk LRU cache, served with
+long-lived cache headers by /api/instagram/media/<id>.
+
+The feed used to hot-link `media_url` / `thumbnail_url`: full-resolution
+images (often 1080×1350, several hundred KB each) on signed CDN URLs that
+expire, leaving broken tiles until the next sync. Here:
+
+- the source image is downloaded once per post (`<id>.src`); every variant
+  is cut from that copy. If the CDN says the URL expired, `refresh_url` (a
+  Graph API lookup of the media) gets a fresh one and the download is retried;
+- variants are WIDTHS wide at most, never upscaled, encoded WebP (when the
+  browser accepts it) or progressive JPEG;
+- every hit touches the file's mtime, and once the directory passes
+  `max_bytes`, the least recently used files go until it's under
+  `LOW_WATER` of the budget. Sizes are tracked in memory; the directory is
+  only re-scanned (picking up other workers' files) when evicting.
+
+Pillow is optional: without it the source image is served as-is.
+"""
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+
+import requests
+
+WIDTHS = (320, 640, 1080)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+LOW_WATER = 0.9
+EXPIRED_STATUSES = (403, 404, 410)  # what the CDN answers for an expired signature
+_SAFE_ID = re.compile(r'^[\w-]+$')  # media ids become file names
+
+
+def pick_width(requested):
+    """The smallest variant at least `requested` px wide (the largest if none)."""
+    try:
+        requested = int(requested)
+    except (TypeError, ValueError):
+        return WIDTHS[1]
+    return next((w for w in WIDTHS if w >= requested), WIDTHS[-1])
+
+
+def source_url(post):
+    """The still image for a post: a video's thumbnail, else its media."""
+    if post.get('media_type') == 'VIDEO':
+        return post.get('thumbnail_url') or post.get('media_url')
+    return post.get('media_url')
+
+
+def resize(data, width, fmt):
+    """Encode `data` (any image) as `fmt` ('webp' / 'jpeg'), at most `width`
+    px wide. None if Pillow is missing or can't read the image."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img = img.convert('RGB')
+            if img.width > width:
+                img = img.resize((width, round(img.height * width / img.width)),
+                                 Image.Resampling.LANCZOS)
+            out = io.BytesIO()
+            if fmt == 'webp':
+                img.save(out, 'WEBP', quality=WEBP_QUALITY, method=4)
+            else:
+                img.save(out, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+            return out.getvalue()
+    except Exception as e:
+        print(f"⚠️ Could not resize IG media: {e}")
+        return None
+
+
+class MediaCache:
+    """Resized post images under `directory`, at most ~`max_bytes` of them."""
+
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024, refresh_url=None,
+                 timeout=10, session=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.refresh_url = refresh_url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.stats = {'hits': 0, 'misses': 0, 'downloads': 0, 'refreshed_urls': 0,
+                      'evicted': 0}
+        self._locks = {}
+        self._guard = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._sizes = {}
+        for entry in os.scandir(directory):
+            if not entry.is_file():
+                continue
+            if not entry.name.endswith('.tmp'):
+                self._sizes[entry.name] = entry.stat().st_size
+            elif entry.stat().st_mtime < time.time() - 3600:
+                os.remove(entry.path)  # left by a crash mid-write (not another worker's)
+
+    @property
+    def total_bytes(self):
+        with self._guard:  # writers/evictions mutate _sizes from other threads
+            return sum(self._sizes.values())
+
+    def _lock_for(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _write(self, name, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(name))
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        with self._guard:
+            self._sizes[name] = len(data)
+
+    def _touch(self, name):
+        """Mark as recently used; False if it's gone (evicted by another worker)."""
+        try:
+            os.utime(self._path(name))
+            return True
+        except OSError:
+            with self._guard:
+                self._sizes.pop(name, None)
+            return False
+
+    def _download(self, post):
+        url = source_url(post)
+        if not url:
+            raise LookupError(f"post {post.get('id')} has no image")
+        resp = self.session.get(url, timeout=self.timeout)
+        if resp.status_code in EXPIRED_STATUSES and self.refresh_url:
+            fresh = self.refresh_url(post['id'])
+            url = source_url(fresh) if fresh else None
+            if url:
+                self.stats['refreshed_urls'] += 1
+                resp = self.session.get(url, timeout=self.timeout)
+        resp.raise_for_status()
+        self.stats['downloads'] += 1
+        return resp.content
+
+    def _source(self, post):
+        name = f"{post['id']}.src"
+        if self._touch(name):
+            with open(self._path(name), 'rb') as f:
+                return f.read()
+        data = self._download(post)
+        self._write(name, data)
+        return data
+
+    def get(self, post, width, fmt):
+        """(path, mimetype) of `post`'s image, `width` px wide (a WIDTHS
+        value), as `fmt` ('webp' / 'jpeg'). Raises if it can't be fetched."""
+        if not _SAFE_ID.match(str(post['id'])):
+            raise ValueError(f"unexpected media id {post['id']!r}")
+        name = f"{post['id']}_{width}.{fmt}"
+        if self._touch(name):
+            self.stats['hits'] += 1
+            return self._path(name), f'image/{fmt}'
+        with self._lock_for(post['id']):  # one download per post, however many variants
+            if self._touch(name):
+                self.stats['hits'] += 1
+                return self._path(name), f'image/{fmt}'
+            self.stats['misses'] += 1
+            source = self._source(post)
+            data = resize(source, width, fmt)
+            if data is None:  # no Pillow: the CDN original (JPEG in practice)
+                return self._path(f"{post['id']}.src"), 'image/jpeg'
+            self._write(name, data)
+        self._evict()
+        return self._path(name), f'image/{fmt}'
+
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+        with self._guard:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, entry.name, st.st_size))
+            self._sizes = {name: size for _, name, size in entries}
+            total = sum(self._sizes.values())
+            evicted = 0
+            for _, name, size in sorted(entries):
+                if total <= self.max_bytes * LOW_WATER:
+                    break
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    pass
+                del self._sizes[name]
+                total -= size
+                evicted += 1
+            self.stats['evicted'] += evicted
+        if evicted:  # another thread may have trimmed it already
+            print(f"🧹 IG media cache trimmed to {total / 1e6:.1f} MB ({evicted} files)")
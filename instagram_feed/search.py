@@ -0,0 +1,157 @@
+"""Caption search for the Instagram feed: an inverted index built once per
+load of the posts (see store.py), instead of a substring scan per request.
+
+Text is normalized the same way on both sides: case-folded, Latin accents and
+Hebrew niqqud / cantillation marks dropped, Hebrew final letters mapped to
+their regular forms (ם→מ, ן→נ, ץ→צ, ף→פ, ך→כ), so "שֻׁלְחָן", "שולחן" and a
+query typed mid-word ("שולח") all meet. Each caption is indexed as:
+
+- words (weight 1), plus the word without a leading Hebrew prefix letter
+  (ו/ה/ב/ל/מ/ש/כ — "בתל" also indexes "תל") at a lower weight;
+- #hashtags and @mentions as their own fields (weight 3), and also as plain
+  words. A query term written "#sushi" / "@venue" only matches that field.
+
+Every query term must match (AND); each term also matches indexed tokens it is
+a prefix of, at a discount, so results show up while the user is still typing.
+Hits are ranked by tf·idf-style relevance (field weight × idf per term) times
+a recency boost, newest first on ties.
+"""
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+WORD_WEIGHT = 1.0
+PREFIX_LETTER_WEIGHT = 0.5  # "בתל" → "תל"
+TAG_WEIGHT = 3.0            # #hashtag / @mention fields
+PARTIAL_MATCH = 0.6         # query term is only a prefix of the indexed token
+MIN_PREFIX_LEN = 2          # shorter query terms match whole tokens only
+RECENCY_HALF_LIFE_DAYS = 180
+RECENCY_WEIGHT = 0.5        # a brand-new post scores up to 1.5x an old one
+
+# Latin combining accents (left behind by NFKD) and Hebrew niqqud/cantillation;
+# the maqaf and sof pasuq in between are punctuation and stay.
+_MARKS = re.compile('[\u0300-\u036f\u0591-\u05bd\u05bf\u05c1\u05c2\u05c4\u05c5\u05c7]')
+_FINALS = str.maketrans('ךםןףץ', 'כמנפצ')
+_HEBREW_PREFIXES = set('והבלמשכ')
+_TOKEN_RE = re.compile(r'([#@]?)(\w+(?:\.\w+)*)')
+_INWORD_QUOTES = re.compile(r"(?<=\w)['\"\u05f3\u05f4\u2019](?=\w)")
+
+
+def normalize(text):
+    """Case-fold, drop accents / niqqud, un-final Hebrew letters."""
+    text = _MARKS.sub('', unicodedata.normalize('NFKD', text or ''))
+    return text.casefold().translate(_FINALS)
+
+
+def _is_hebrew(token):
+    return 'א' <= token[0] <= 'ת'
+
+
+def tokenize(text, query=False):
+    """[(field, token)]: field is '' for plain words, '#' or '@'. Mentions keep
+    their dots (@cafe.xoho). When indexing, tags and mentions also yield their
+    plain words; in a query, "#sushi" stays a hashtag-only term."""
+    text = _INWORD_QUOTES.sub('', normalize(text))  # ג'חנון, ת"א, it's
+    out = []
+    for sigil, word in _TOKEN_RE.findall(text):
+        if sigil:
+            out.append((sigil, word))
+            if query:
+                continue
+        out.extend(('', part) for part in word.split('.') if part)
+    return out
+
+
+def _timestamp(post):
+    try:
+        return datetime.strptime(post.get('timestamp', ''), '%Y-%m-%dT%H:%M:%S%z').timestamp()
+    except (TypeError, ValueError):
+        try:
+            ts = datetime.fromisoformat(post['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            return 0.0
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        return ts.timestamp()
+
+
+class CaptionIndex:
+    """Inverted index over the captions of `posts` (a list, kept in order)."""
+
+    def __init__(self, posts):
+        self.posts = posts
+        self.postings = {}  # (field, token) -> {post index: weight}
+        self.captions = []  # normalized, for the no-token fallback (emoji queries)
+        for i, post in enumerate(posts):
+            caption = post.get('caption', '')
+            self.captions.append(normalize(caption))
+            for field, token in tokenize(caption):
+                weights = [(field, token, TAG_WEIGHT if field else WORD_WEIGHT)]
+                if (not field and len(token) >= 3 and _is_hebrew(token)
+                        and token[0] in _HEBREW_PREFIXES):
+                    weights.append(('', token[1:], PREFIX_LETTER_WEIGHT))
+                for f, t, w in weights:
+                    bucket = self.postings.setdefault((f, t), {})
+                    bucket[i] = bucket.get(i, 0.0) + w
+        self.vocab = sorted(self.postings)
+
+        stamps = [_timestamp(p) for p in posts]
+        newest = max(stamps, default=0.0)
+        self.recency = [
+            1 + RECENCY_WEIGHT * 0.5 ** (max(newest - ts, 0) / 86400 / RECENCY_HALF_LIFE_DAYS)
+            if ts else 1.0
+            for ts in stamps
+        ]
+        self.stamps = stamps
+
+    def _matches(self, field, term):
+        """{post index: score} for one query term: exact token, plus (for
+        terms of MIN_PREFIX_LEN+) tokens it is a prefix of, discounted; a
+        post's best-scoring match counts. The
+        idf is the term's, over every post it matched."""
+        scores = {}
+        keys = []
+        # A plain word also hits tags/mentions, where it scores TAG_WEIGHT
+        for f in (field,) if field else ('', '#', '@'):
+            if (f, term) in self.postings:
+                keys.append((f, term))
+            if len(term) >= MIN_PREFIX_LEN:
+                start = bisect_left(self.vocab, (f, term))
+                for key in self.vocab[start:]:
+                    if key[0] != f or not key[1].startswith(term):
+                        break
+                    if key[1] != term:
+                        keys.append(key)
+        for key in keys:
+            factor = 1.0 if key[1] == term else PARTIAL_MATCH
+            for i, w in self.postings[key].items():
+                score = w * factor
+                if score > scores.get(i, 0.0):
+                    scores[i] = score
+        if scores:
+            idf = math.log(1 + len(self.posts) / len(scores))
+            scores = {i: s * idf for i, s in scores.items()}
+        return scores
+
+    def search(self, query):
+        """Posts matching every term of `query`, best first."""
+        terms = tokenize(query, query=True)
+        if not terms:
+            needle = normalize(query).strip()
+            if not needle:
+                return list(self.posts)
+            return [p for p, c in zip(self.posts, self.captions) if needle in c]
+
+        scores = None
+        for field, term in dict.fromkeys(terms):  # dedupe, keep order
+            matched = self._matches(field, term)
+            if scores is None:
+                scores = matched
+            else:
+                scores = {i: s + matched[i] for i, s in scores.items() if i in matched}
+            if not scores:
+                return []
+        ranked = sorted(scores, key=lambda i: (-scores[i] * self.recency[i], -self.stamps[i]))
+        return [self.posts[i] for i in ranked]
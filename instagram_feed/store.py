@@ -0,0 +1,126 @@
+"""In-process Instagram post store, validated against the JSON file's mtime.
+
+data/ig_posts_cache.json (~700 KB) used to be re-read and parsed on every
+/api/instagram/posts and /api/instagram/search call. `PostStore` parses it once
+and keeps only the fields the feed renders (FEED_FIELDS) plus a caption index
+(search.py), so a feed scroll is a list slice and a search a few dict lookups. Each access costs one os.stat(): if another worker rewrote the
+file, the next access reloads it.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+from instagram_feed.search import CaptionIndex
+
+_MEMORY = 'memory'  # stamp of posts installed with replace(persist=False)
+
+# What app/static/js/instagram_feed.js reads, plus id/timestamp for ordering.
+FEED_FIELDS = ('id', 'caption', 'media_url', 'thumbnail_url', 'permalink', 'media_type',
+               'timestamp', 'like_count', 'comments_count')
+
+
+def compact(post):
+    """A Graph API media object → just the FEED_FIELDS it has."""
+    return {k: post[k] for k in FEED_FIELDS if post.get(k) is not None}
+
+
+class _Snapshot:
+    """One immutable load of the posts; swapped whole, so readers never lock."""
+
+    def __init__(self, posts, stamp):
+        self.posts = [compact(p) for p in posts]
+        self.by_id = {p.get('id'): p for p in self.posts}
+        self.index = CaptionIndex(self.posts)
+        self.stamp = stamp  # (mtime_ns, size) of the file it came from, or _MEMORY
+        self.loaded_at = time.time()
+
+
+class PostStore:
+    """The feed's posts, backed by a JSON file (a list of media objects)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._snapshot = _Snapshot([], None)
+        self._lock = threading.Lock()
+        self._unreadable = None  # stamp of a file that failed to parse
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _current(self):
+        snap = self._snapshot
+        if snap.stamp == _MEMORY:
+            return snap
+        stamp = self._stat()
+        if stamp is None or stamp == snap.stamp or stamp == self._unreadable:
+            return snap
+        with self._lock:
+            if self._snapshot.stamp != stamp:
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self._snapshot = _Snapshot(json.load(f), stamp)
+                except Exception as e:
+                    # Keep serving what we had; retry only once the file changes
+                    print(f"Error loading IG posts cache: {e}")
+                    self._unreadable = stamp
+            return self._snapshot
+
+    def age(self):
+        """Seconds since the posts were last fetched (inf if never)."""
+        if self._snapshot.stamp == _MEMORY:
+            return time.time() - self._snapshot.loaded_at
+        stamp = self._stat()
+        if stamp is None:
+            return float('inf')
+        return time.time() - stamp[0] / 1e9
+
+    def replace(self, posts, persist=True):
+        """Install freshly fetched posts; with persist, also write the file
+        (temp file + os.replace) so other workers pick them up."""
+        stamp = _MEMORY
+        if persist:
+            dir_name = os.path.dirname(self.path) or '.'
+            os.makedirs(dir_name, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=dir_name, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump([compact(p) for p in posts], f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            stamp = self._stat()
+        with self._lock:
+            self._snapshot = _Snapshot(posts, stamp)
+
+    def posts(self):
+        return self._current().posts
+
+    def __len__(self):
+        return len(self._current().posts)
+
+    def get(self, post_id):
+        """The post with this id, or None."""
+        return self._current().by_id.get(post_id)
+
+    def page(self, offset=0, limit=12):
+        """(posts[offset:offset+limit], has_more)."""
+        posts = self._current().posts
+        return posts[offset:offset + limit], len(posts) > offset + limit
+
+    def search(self, query, offset=0, limit=12):
+        """Posts matching `query`, ranked (see search.py), paginated like
+        page(); an empty query is the unfiltered feed."""
+        if not (query or '').strip():
+            return self.page(offset, limit)
+        hits = self._current().index.search(query)
+        return hits[offset:offset + limit], len(hits) > offset + limit
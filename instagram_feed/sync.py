@@ -0,0 +1,255 @@
+"""Incremental Instagram Graph API sync, run on a schedule off the request path.
+
+fetch_all_ig_posts() used to walk `paging.next` serially inside whichever
+request found the hour-old cache, re-downloading up to 500 posts. Here a
+background thread calls `InstagramSync.sync()` every IG_SYNC_INTERVAL:
+
+1. new posts: /{ig-user-id}/media is newest-first, so pages are walked only
+   until a post we already have (same id, or not newer than our newest
+   timestamp) shows up — usually a single page;
+2. engagement: like/comment counts of the `refresh_recent` newest posts are
+   re-read with the multi-id lookup (GET /?ids=a,b,c, 50 ids per call), the
+   batches in parallel;
+3. merge, newest first, capped at `max_posts`, and `store.replace()` — which
+   writes the file for the other workers and swaps this worker's copy.
+
+Once per `full_interval` the round is a full re-fetch instead, so posts
+deleted or archived on Instagram drop out of the feed. When the last full
+round ran is kept in a small sidecar next to the store (<store>.sync.json),
+shared by every worker, so a restart or a new worker doesn't trigger an
+extra full re-fetch.
+
+Requests only ever read the PostStore. Every gunicorn worker runs the
+schedule, so a round first takes the `flight` (single_flight.py): one worker
+syncs, the others skip — and a worker that gets the flight just after another
+one finished sees a fresh file and skips too (`if_older_than`).
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from single_flight import SingleFlight
+
+MEDIA_FIELDS = ('id,caption,media_url,permalink,media_type,media_product_type,thumbnail_url,'
+                'timestamp,like_count,comments_count,is_shared_to_feed')
+ENGAGEMENT_FIELDS = 'like_count,comments_count'
+IDS_PER_CALL = 50  # Graph API limit for ?ids=
+ACCOUNT_TTL = 10 * 60  # seconds fetch_media reuses the account between DB reads
+
+
+def in_feed(post):
+    """Reels that were NOT shared to the main feed grid don't belong in it."""
+    return not (post.get('media_product_type') == 'REELS' and post.get('is_shared_to_feed') is False)
+
+
+class InstagramSync:
+    """Keeps `store` (a PostStore) in step with one account's media.
+
+    `account` is called at the start of every sync and returns
+    (ig_user_id, access_token), or None to skip this round (no connected
+    account, token being refreshed...). The media proxy's fetch_media() reuses
+    the last answer for up to ACCOUNT_TTL seconds instead of calling it (and
+    hitting the DB, maybe refreshing the token) on the request path.
+    """
+
+    def __init__(self, store, graph_url, account, max_posts=500, page_size=100,
+                 refresh_recent=50, workers=4, full_interval=24 * 3600, timeout=15,
+                 session=None, flight=None, state_path=None):
+        self.store = store
+        self.graph_url = graph_url.rstrip('/')
+        self.account = account
+        self.max_posts = max_posts
+        self.page_size = page_size
+        self.refresh_recent = refresh_recent
+        self.workers = workers
+        self.full_interval = full_interval
+        self.state_path = state_path or f'{store.path}.sync.json'
+        self._account = None  # (time.monotonic() when read, account()'s answer)
+        self._account_lock = threading.Lock()
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.last_result = None
+        self.flight = flight or SingleFlight('instagram sync')
+        self.skipped_fresh = 0
+        self.last_skip = None  # why the last round returned None: 'busy' / 'fresh' / 'no account'
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _get(self, url, params=None):
+        resp = self.session.get(url, params=params, timeout=self.timeout)
+        data = resp.json()
+        if 'error' in data:
+            raise RuntimeError(f"Graph API error: {data['error'].get('message', data['error'])}")
+        resp.raise_for_status()
+        return data
+
+    def _current_account(self, fresh=False):
+        """account(), reused for ACCOUNT_TTL seconds unless `fresh`."""
+        with self._account_lock:
+            cached = self._account
+        if not fresh and cached and time.monotonic() - cached[0] < ACCOUNT_TTL:
+            return cached[1]
+        account = self.account()
+        with self._account_lock:
+            self._account = (time.monotonic(), account)
+        return account
+
+    def _last_full(self):
+        """Wall-clock time of the last full round by any worker, or None."""
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                return float(json.load(f)['last_full'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save_last_full(self, when):
+        dir_name = os.path.dirname(self.state_path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=dir_name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'last_full': when}, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def fetch_new(self, user_id, token, known_ids, newest):
+        """Posts newer than what we have, newest first. `newest` is the latest
+        cached timestamp ('' when the store is empty: full fetch)."""
+        posts = []
+        url = f"{self.graph_url}/{user_id}/media"
+        params = {'fields': MEDIA_FIELDS, 'access_token': token, 'limit': self.page_size}
+        while url and len(posts) < self.max_posts:
+            data = self._get(url, params)
+            for post in data.get('data', []):
+                if post.get('id') in known_ids or (newest and post.get('timestamp', '') <= newest):
+                    return posts
+                if in_feed(post):
+                    posts.append(post)
+            # The next URL already contains all parameters including access_token
+            url, params = data.get('paging', {}).get('next'), None
+        return posts
+
+    def fetch_media(self, media_id):
+        """A fresh media_url / thumbnail_url for one post (its CDN links
+        expire), or None. Used by the media proxy (media.py), on the request
+        path, so the account comes from the cache."""
+        account = self._current_account()
+        if not account:
+            return None
+        try:
+            return self._get(f"{self.graph_url}/{media_id}", {
+                'fields': 'id,media_type,media_url,thumbnail_url', 'access_token': account[1]})
+        except Exception as e:
+            print(f"⚠️ Could not refresh IG media {media_id}: {e}")
+            with self._account_lock:
+                self._account = None  # maybe a stale token: re-read it next time
+            return None
+
+    def fetch_engagement(self, token, ids):
+        """{id: {'like_count', 'comments_count'}} for `ids`, in parallel batches."""
+        batches = [ids[i:i + IDS_PER_CALL] for i in range(0, len(ids), IDS_PER_CALL)]
+
+        def one(batch):
+            try:
+                return self._get(f"{self.graph_url}/", {'ids': ','.join(batch),
+                                                        'fields': ENGAGEMENT_FIELDS,
+                                                        'access_token': token})
+            except Exception as e:
+                # e.g. a post deleted since — the counts wait for the next round
+                print(f"⚠️ Instagram engagement batch failed: {e}")
+                return {}
+
+        counts = {}
+        if not batches:
+            return counts
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as pool:
+            for result in pool.map(one, batches):
+                counts.update(result)
+        return counts
+
+    def sync(self, full=None, if_older_than=None):
+        """One round: incremental, or a full re-fetch when `full` (by default:
+        the first round ever, then once per full_interval). Returns
+        {'new', 'refreshed', 'total', 'full'}, or None when the round was
+        skipped: another thread/worker is syncing, the store is younger than
+        `if_older_than` seconds, or there's no account to sync."""
+        with self.flight.attempt() as acquired:
+            if not acquired:
+                self.last_skip = 'busy'
+                return None
+            if if_older_than is not None and self.store.age() < if_older_than:
+                self.skipped_fresh += 1  # another worker just did it
+                self.last_skip = 'fresh'
+                return None
+            return self._sync(full)
+
+    def _sync(self, full):
+        account = self._current_account(fresh=True)
+        if not account:
+            self.last_skip = 'no account'
+            return None
+        user_id, token = account
+        started = time.monotonic()
+        if full is None:
+            last_full = self._last_full()
+            full = (last_full is None or not len(self.store)
+                    or time.time() - last_full >= self.full_interval)
+        existing = [] if full else list(self.store.posts())
+        known_ids = {p['id'] for p in existing}
+        newest = max((p.get('timestamp', '') for p in existing), default='')
+
+        new = self.fetch_new(user_id, token, known_ids, newest)
+        recent = [p['id'] for p in existing[:self.refresh_recent]]
+        counts = self.fetch_engagement(token, recent) if recent else {}
+        if counts:
+            existing = [dict(p, **{k: v for k, v in counts[p['id']].items() if k != 'id'})
+                        if p['id'] in counts else p for p in existing]
+
+        merged = {p['id']: p for p in existing}
+        merged.update((p['id'], p) for p in new)
+        posts = sorted(merged.values(), key=lambda p: p.get('timestamp', ''), reverse=True)
+        self.store.replace(posts[:self.max_posts])
+        if full:
+            self._save_last_full(time.time())
+        self.last_result = {'new': len(new), 'refreshed': len(counts),
+                            'total': min(len(posts), self.max_posts), 'full': full}
+        print(f"📸 Instagram {'full' if full else 'incremental'} sync: {len(new)} new, "
+              f"{len(counts)} refreshed, {self.last_result['total']} total "
+              f"({time.monotonic() - started:.1f}s)")
+        return self.last_result
+
+    def start(self, interval):
+        """Sync every `interval` seconds on a daemon thread. The first round
+        runs right away if the store is older than `interval`."""
+        if self._thread is not None:
+            return
+
+        def run():
+            delay = max(0.0, interval - self.store.age())
+            while not self._stop.wait(delay):
+                try:
+                    self.sync(if_older_than=interval / 2)
+                except Exception as e:
+                    print(f"❌ Instagram sync failed: {e}")
+                delay = interval
+
+        self._thread = threading.Thread(target=run, daemon=True, name='instagram-sync')
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        """Single-flight counters plus the outcome of this worker's last round."""
+        return dict(self.flight.stats(), skipped_fresh=self.skipped_fresh,
+                    store_age_s=round(self.store.age(), 1) if len(self.store) else None,
+                    last_result=self.last_result)
@@ -0,0 +1,7 @@
+"""Happy Hour map data: everything between the `ig_happy_hours` table / the
+Google Sheet and the bytes `/api/places` puts on the wire.
+
+app.py owns the routes; the modules here are plain functions and small classes
+so they can be tested without booting the whole site (app.py starts the
+Telegram bot and needs GOOGLE_MAPS_API_KEY at import time).
+"""
@@ -0,0 +1,180 @@
+"""Geocode cache backed by a local SQLite file.
+
+Replaces the JSON dict that was parsed whole at import time and rewritten
+whole (indent=2) after every miss. Writes are now single-row upserts, reads
+are primary-key lookups, and SQLite's WAL mode makes the file safe to share
+between gunicorn workers (and the Telegram bot thread).
+
+Keys are normalized full addresses (see `normalize`), values [lat, lng] or
+None. A None means Google had no answer; it expires after `negative_ttl`
+seconds so the address is tried again — the old cache remembered failures
+forever.
+
+Batches claim their addresses in a `pending` table first (`claim`), so when
+several workers rebuild the same sheet only one of them pays the Geocoding
+API for each address; a claim older than `claim_ttl` seconds belongs to a
+worker that died and is taken over.
+
+data/geocode_cache.json stays the git-tracked seed (Render's disk is wiped on
+every deploy): it is imported with INSERT OR IGNORE whenever its mtime
+changes, so nothing already resolved is lost and the file isn't re-parsed on
+every boot.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+NEGATIVE_TTL = 7 * 24 * 3600  # seconds before a "not found" is retried
+CLAIM_TTL = 10 * 60           # seconds before another worker's claim is stale
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocodes (
+    address    TEXT PRIMARY KEY,
+    lat        REAL,
+    lng        REAL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pending (
+    address    TEXT PRIMARY KEY,
+    claimed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def normalize(address):
+    """Cache key for an address: case- and whitespace-insensitive."""
+    return ' '.join(str(address).split()).casefold()
+
+
+class GeocodeStore:
+    """Dict-like view of the geocode table: `key in store`, `store[key]`,
+    `store.update({key: [lat, lng] | None})`, `len(store)`."""
+
+    def __init__(self, path, seed_json=None, negative_ttl=NEGATIVE_TTL, claim_ttl=CLAIM_TTL):
+        self.path = path
+        self.negative_ttl = negative_ttl
+        self.claim_ttl = claim_ttl
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.executescript(_SCHEMA)
+        if seed_json:
+            self.import_json(seed_json)
+
+    def _conn(self):
+        # sqlite3 connections are per-thread; the pool threads each get one.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _row(self, key):
+        row = self._conn().execute(
+            'SELECT lat, lng, updated_at FROM geocodes WHERE address = ?',
+            (normalize(key),)).fetchone()
+        if row is None:
+            return None
+        if row[0] is None and time.time() - row[2] > self.negative_ttl:
+            return None  # expired "not found" — treat as a miss
+        return row
+
+    def __contains__(self, key):
+        return self._row(key) is not None
+
+    def __getitem__(self, key):
+        row = self._row(key)
+        if row is None:
+            raise KeyError(key)
+        return None if row[0] is None else [row[0], row[1]]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __len__(self):
+        return self._conn().execute('SELECT COUNT(*) FROM geocodes').fetchone()[0]
+
+    def update(self, results, replace=True):
+        """Upsert {address: [lat, lng] | None} in one transaction."""
+        now = time.time()
+        rows = [(normalize(k), v[0] if v else None, v[1] if v else None, now)
+                for k, v in results.items()]
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT OR IGNORE'
+        conn = self._conn()
+        with conn:
+            conn.executemany(f'{verb} INTO geocodes (address, lat, lng, updated_at) '
+                             'VALUES (?, ?, ?, ?)', rows)
+
+    def claim(self, keys):
+        """Claim `keys` for a lookup by this process; returns the ones it got.
+        Keys already cached, or claimed elsewhere less than `claim_ttl` seconds
+        ago, are left out. One IMMEDIATE transaction (the database write lock),
+        so two workers never claim the same address."""
+        now = time.time()
+        conn = self._conn()
+        claimed = []
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            for key in dict.fromkeys(keys):
+                if self._row(key) is not None:
+                    continue
+                held = conn.execute('SELECT claimed_at FROM pending WHERE address = ?',
+                                    (normalize(key),)).fetchone()
+                if held and now - held[0] < self.claim_ttl:
+                    continue
+                conn.execute('INSERT OR REPLACE INTO pending (address, claimed_at) VALUES (?, ?)',
+                             (normalize(key), now))
+                claimed.append(key)
+        return claimed
+
+    def release(self, keys):
+        """Drop this process's claims on `keys` (answered or given up on)."""
+        conn = self._conn()
+        with conn:
+            conn.executemany('DELETE FROM pending WHERE address = ?',
+                             [(normalize(k),) for k in keys])
+
+    def claimed(self, keys):
+        """The `keys` some process currently holds a live claim on."""
+        cutoff = time.time() - self.claim_ttl
+        conn = self._conn()
+        return [k for k in keys if conn.execute(
+            'SELECT 1 FROM pending WHERE address = ? AND claimed_at > ?',
+            (normalize(k), cutoff)).fetchone()]
+
+    def import_json(self, path):
+        """Merge a legacy {address: [lat, lng] | None} JSON file, without
+        overwriting newer rows. Skipped when the file hasn't changed since the
+        last import."""
+        if not os.path.exists(path):
+            return 0
+        stamp = str(os.path.getmtime(path))
+        conn = self._conn()
+        seen = conn.execute("SELECT value FROM meta WHERE key = 'seed_mtime'").fetchone()
+        if seen and seen[0] == stamp:
+            return 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not import geocode seed {path}: {e}")
+            return 0
+        self.update({k: v if v and len(v) == 2 else None for k, v in data.items()},
+                    replace=False)
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seed_mtime', ?)",
+                         (stamp,))
+        print(f"📍 Imported {len(data)} geocodes from {path}")
+        return len(data)
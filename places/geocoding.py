@@ -0,0 +1,164 @@
+"""Batch geocoding for places that have an address but no coordinates.
+
+The old path geocoded inside the /api/places request, one address at a time,
+rewriting the whole cache file after every lookup — a sheet import with a few
+hundred new venues held a visitor's request for minutes. Now a rebuild only
+reads the cache (`apply_cached`), and the misses — deduplicated — go to ONE
+background batch (`submit`) that resolves them through a small thread pool,
+paced by a token bucket (rate_limit.py) so we stay inside the Google Geocoding
+QPS quota, with retry + exponential backoff for transient errors, and writes
+the results to the cache in one go at the end.
+
+With a GeocodeStore the dedupe spans processes too: a batch claims its
+addresses in the shared store, looks up only the ones it got, and waits for
+the rest to land from whichever gunicorn worker claimed them — so the API is
+paid once per address, not once per worker.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from geopy.exc import GeocoderRateLimited, GeocoderTimedOut, GeocoderUnavailable
+
+from rate_limit import TokenBucket
+
+# Worth retrying: the request may well succeed a moment later.
+_TRANSIENT = (GeocoderTimedOut, GeocoderUnavailable, GeocoderRateLimited)
+
+# Returned by a lookup that failed for a transient reason after all retries.
+# Unlike None ("Google has no such address") it is NOT cached, so the address
+# is tried again by the next batch.
+FAILED = object()
+
+
+def full_address(address, city=''):
+    """The geocoder query (and cache key) for an address: pinned to Israel."""
+    if not address:
+        return None
+    return f"{address}, {city}, Israel" if city else f"{address}, Israel"
+
+
+def has_coordinates(place):
+    return (place.get('Latitude') not in (None, '')
+            and place.get('Longitude') not in (None, ''))
+
+
+class BatchGeocoder:
+    """Resolves address batches through `geocode` (e.g. GoogleV3.geocode) and
+    keeps the results in `cache` — a dict or a GeocodeStore ({full address:
+    [lat, lng] or None}). `save(cache)`, if given, runs once per batch for
+    caches that don't persist on update. A cache with claim()/release()
+    (GeocodeStore) makes `submit` batches share work across processes; other
+    workers' answers are polled for every `poll` seconds."""
+
+    def __init__(self, geocode, cache, save=None, workers=4, rate=10, retries=3, backoff=0.5,
+                 poll=2.0):
+        self.geocode = geocode
+        self.cache = cache
+        self.save = save
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.poll = poll
+        self.bucket = TokenBucket(rate)
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def apply_cached(self, places):
+        """Fill Latitude/Longitude on `places` (in place) from the cache and
+        return the deduplicated addresses that still need a lookup."""
+        missing = {}
+        for place in places:
+            if has_coordinates(place):
+                continue
+            key = full_address(place.get('Address', ''), place.get('City', ''))
+            if not key:
+                continue
+            cached = self.cache.get(key, FAILED)
+            if cached is FAILED:
+                missing[key] = None
+            elif cached and len(cached) == 2:
+                place['Latitude'], place['Longitude'] = cached[0], cached[1]
+        return list(missing)
+
+    def _lookup(self, key):
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            try:
+                location = self.geocode(key)
+                return [location.latitude, location.longitude] if location else None
+            except _TRANSIENT as e:
+                if attempt == self.retries:
+                    print(f"  ⚠️ Geocoding gave up on {key}: {e}")
+                    return FAILED
+                time.sleep(self.backoff * 2 ** attempt)
+            except Exception as e:
+                print(f"  ⚠️ Geocoding error for {key}: {e}")
+                return FAILED
+
+    def resolve(self, keys):
+        """Look up `keys` concurrently; returns {key: [lat, lng] | None} for
+        every key that got a definitive answer. Cached and saved once."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        t0 = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            answers = list(pool.map(self._lookup, keys))
+        results = {k: v for k, v in zip(keys, answers) if v is not FAILED}
+        self.cache.update(results)
+        if self.save:
+            self.save(self.cache)
+        found = sum(1 for v in results.values() if v)
+        print(f"📍 Geocoded batch of {len(keys)} in {time.monotonic() - t0:.1f}s "
+              f"({found} found, {len(keys) - len(results)} to retry)")
+        return results
+
+    def _resolve_shared(self, keys):
+        """resolve() for the keys this process claims in the shared cache,
+        then the answers other processes find for the rest, as they land
+        (until their claims are released or go stale)."""
+        if not hasattr(self.cache, 'claim'):
+            return self.resolve(keys)
+        mine = self.cache.claim(keys)
+        try:
+            results = self.resolve(mine)
+        finally:
+            self.cache.release(mine)
+        claimed = set(mine)
+        waiting = [k for k in keys if k not in claimed]
+        while waiting:
+            for key in waiting:
+                cached = self.cache.get(key, FAILED)
+                if cached is not FAILED:
+                    results[key] = cached
+            waiting = [k for k in waiting if k not in results]
+            waiting = self.cache.claimed(waiting)
+            if waiting:
+                time.sleep(self.poll)
+        return results
+
+    def submit(self, keys, on_done=None):
+        """Resolve `keys` on a background thread, skipping any already in an
+        in-flight batch (of this process, or of another one sharing the cache);
+        `on_done(results)` runs on that thread afterwards."""
+        with self._lock:
+            keys = [k for k in dict.fromkeys(keys) if k not in self._in_flight]
+            if not keys:
+                return None
+            self._in_flight.update(keys)
+
+        def run():
+            try:
+                results = self._resolve_shared(keys)
+                if on_done:
+                    on_done(results)
+            except Exception as e:
+                print(f"⚠️ Geocoding batch failed: {e}")
+            finally:
+                with self._lock:
+                    self._in_flight.difference_update(keys)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
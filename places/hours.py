@@ -0,0 +1,121 @@
+"""Happy-hour availability: "which places are on at <time>?" answered from a
+precomputed bitmap instead of filtering the full list in the browser.
+
+A place is on at a moment when that weekday's column (Sunday..Saturday) is
+ticked AND the time falls inside its `OpeningHours` text. That text is free
+form ("18:00 - 20:00", "After 20:00", "17-19, 22:00-close", "מ-20:00"), so
+`parse_hours` turns it into (start, end) minute windows once per snapshot;
+text we can't read counts as all day, since the ticked days are still a
+real signal.
+
+The index keeps one int per quarter hour of the week (7 × 96 slots); bit i is
+set when place i is on in that slot. A query is one list lookup plus walking
+the set bits. Windows past midnight spill into the next day's slots.
+"""
+import re
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+DAYS = ('Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday')
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEK_SLOTS = 7 * SLOTS_PER_DAY
+
+LOCAL_TZ = ZoneInfo('Asia/Jerusalem')
+
+# "After 20:00" / "till close": the bar's night ends around 2am.
+END_OF_NIGHT = 26 * 60
+# "Until 19:00" with no start: assume it begins at noon.
+DEFAULT_START = 12 * 60
+
+_TIME = r'(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?'
+_RANGE = re.compile(_TIME + r'\s*(?:-|–|—|to|until|till|עד)\s*(?:' + _TIME
+                    + r'|(close|closing|סגירה))', re.IGNORECASE)
+_AFTER = re.compile(r'(?:after|from|since|starting|אחרי|החל\s*מ|מ)\s*-?\s*' + _TIME,
+                    re.IGNORECASE)
+_UNTIL = re.compile(r'(?:until|till|up\s+to|עד)\s*-?\s*' + _TIME, re.IGNORECASE)
+
+
+def _minutes(hour, minute, ampm):
+    h, m = int(hour), int(minute or 0)
+    if ampm:
+        h = h % 12 + (12 if ampm.lower() == 'pm' else 0)
+    if h > 24 or m > 59 or (h == 24 and m):
+        raise ValueError('not a time')  # 24:00 is midnight; 24:30 is not a time
+    return h * 60 + m
+
+
+def _window(start, end):
+    if end <= start:
+        end += 24 * 60  # crosses midnight
+    return start, min(end, start + 24 * 60)
+
+
+def parse_hours(text):
+    """Free-text happy-hour times → [(start_min, end_min)]; end may pass 1440
+    (i.e. runs past midnight). [] when nothing recognizable is found."""
+    text = str(text or '')
+    windows = []
+
+    def take(pattern, build):
+        nonlocal text
+        for m in pattern.finditer(text):
+            try:
+                windows.append(build(m.groups()))
+            except ValueError:
+                continue
+        text = pattern.sub(' ', text)
+
+    take(_RANGE, lambda g: _window(_minutes(*g[0:3]),
+                                   END_OF_NIGHT if g[6] else _minutes(*g[3:6])))
+    take(_AFTER, lambda g: _window(_minutes(*g), END_OF_NIGHT))
+    take(_UNTIL, lambda g: _window(DEFAULT_START, _minutes(*g)))
+    return sorted(windows)
+
+
+def _ticked(value):
+    return value is True or (isinstance(value, str) and value.strip().lower() in ('yes', 'true'))
+
+
+def parse_open_at(value):
+    """`now` or an ISO datetime → an aware datetime in Israel time. Naive
+    values are taken as Israel time. Raises ValueError otherwise."""
+    if value.strip().lower() == 'now':
+        return datetime.now(LOCAL_TZ)
+    when = datetime.fromisoformat(value.strip())
+    if when.tzinfo is None:
+        return when.replace(tzinfo=LOCAL_TZ)
+    return when.astimezone(LOCAL_TZ)
+
+
+class AvailabilityIndex:
+    """Per-quarter-hour bitmaps of which places are on, for the whole week."""
+
+    def __init__(self, places):
+        self.places = places
+        self.windows = []
+        self.slots = [0] * WEEK_SLOTS
+        for i, place in enumerate(places):
+            windows = parse_hours(place.get('OpeningHours')) or [(0, 24 * 60)]
+            self.windows.append(windows)
+            bit = 1 << i
+            for day, name in enumerate(DAYS):
+                if not _ticked(place.get(name)):
+                    continue
+                base = day * SLOTS_PER_DAY
+                for start, end in windows:
+                    first = start // SLOT_MINUTES
+                    last = -(-end // SLOT_MINUTES)  # ceil: a partial slot counts
+                    for slot in range(first, last):
+                        self.slots[(base + slot) % WEEK_SLOTS] |= bit
+
+    def open_at(self, when):
+        """Places on at `when` (a datetime, already in local time), in list order."""
+        day = when.isoweekday() % 7  # Sunday = 0, as in DAYS
+        mask = self.slots[day * SLOTS_PER_DAY + (when.hour * 60 + when.minute) // SLOT_MINUTES]
+        hits = []
+        while mask:
+            low = mask & -mask
+            hits.append(self.places[low.bit_length() - 1])
+            mask ^= low
+        return hits
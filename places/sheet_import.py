@@ -0,0 +1,191 @@
+"""Google Sheet → places rows, column-at-a-time.
+
+The old fallback in app.py trimmed with a per-column lambda, coerced Kosher
+with a per-ROW `apply`, and then looped over `to_dict` records in Python to
+find missing coordinates. Here each column is handled whole: string clean-up
+runs once per distinct value (see _per_unique), coordinates go through
+pd.to_numeric, filters and the geocode check are boolean masks, and records
+are zipped from per-column lists (scripts/bench_sheet_import.py: ~2x faster
+end to end at 10k rows, read_csv included).
+
+`SheetImport` holds the result as a typed frame: text columns str, weekday /
+Verified / Kosher bool, Latitude / Longitude float64 (NaN = missing), plus a
+`needs_geocode` mask. `upsert_places` writes it to `ig_happy_hours` in two
+bulk statements.
+"""
+from datetime import datetime
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+
+# Google Sheets column → the key /api/places (and the map JS) uses.
+COLUMN_MAPPING = {
+    'Place Name (English)': 'Name',
+    'Place Name (Hebrew)': 'NameHebrew',
+    'Instagram Link': 'InstagramURL',
+    'Category': 'Category',
+    'Description': 'Description',
+    'Address': 'Address',
+    'City': 'City',
+    'Google Maps Link': 'GoogleMapsLink',
+    'Reservation Link': 'ReservationLink',
+    'OpeningHours': 'OpeningHours',
+    'Latitude': 'Latitude',
+    'Longitude': 'Longitude',
+    'Recommended': 'Recommended',
+    'Sunday': 'Sunday',
+    'Monday': 'Monday',
+    'Tuesday': 'Tuesday',
+    'Wednesday': 'Wednesday',
+    'Thursday': 'Thursday',
+    'Friday': 'Friday',
+    'Saturday': 'Saturday',
+    'Verified': 'Verified',
+    'Kosher': 'Kosher'
+}
+
+# /api/places key → HappyHourPlace attribute (the inverse of its to_dict()).
+MODEL_FIELDS = {
+    'Name': 'name', 'NameHebrew': 'name_hebrew', 'Address': 'address', 'City': 'city',
+    'Latitude': 'latitude', 'Longitude': 'longitude', 'Category': 'category',
+    'Description': 'description', 'OpeningHours': 'opening_hours',
+    'Sunday': 'sunday', 'Monday': 'monday', 'Tuesday': 'tuesday',
+    'Wednesday': 'wednesday', 'Thursday': 'thursday', 'Friday': 'friday',
+    'Saturday': 'saturday', 'ReservationLink': 'reservation_link',
+    'GoogleMapsLink': 'google_maps_link', 'InstagramURL': 'instagram_url',
+    'ImageURL': 'image_url', 'Verified': 'verified', 'Kosher': 'kosher',
+    'Recommended': 'recommended',
+}
+
+BOOL_COLUMNS = ('Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday',
+                'Saturday', 'Verified', 'Kosher')
+COORD_COLUMNS = ('Latitude', 'Longitude')
+TRUE_VALUES = ('true', 'yes', '1', '1.0')
+
+
+def _text(value):
+    return '' if pd.isna(value) else str(value).strip()
+
+
+def _truthy(value):
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def _per_unique(series, fn):
+    """`fn` over a column, evaluated once per distinct value and broadcast
+    back with NumPy fancy indexing. Sheet columns repeat a lot (TRUE/FALSE,
+    cities, categories, "17:00-19:00"), so this is a handful of Python calls
+    per column rather than one per row."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    mapped = np.array([fn(v) for v in uniques] or [fn(None)], dtype=object)
+    return pd.Series(mapped[codes], index=series.index, name=series.name)
+
+
+def normalize_sheet(df):
+    """Raw sheet frame → typed frame with the frontend's column names."""
+    df = df.copy()
+    # Strip whitespace from column names, keep the first of any duplicates
+    df.columns = df.columns.str.strip()
+    df = df.loc[:, ~df.columns.duplicated()]
+    # Drop the InstagramURL column if it exists (we only use Instagram Link)
+    if 'InstagramURL' in df.columns:
+        df = df.drop(columns=['InstagramURL'])
+    df = df.rename(columns={k: v for k, v in COLUMN_MAPPING.items() if k in df.columns})
+
+    for col in df.columns:
+        if col in BOOL_COLUMNS:
+            df[col] = _per_unique(df[col], _truthy).astype(bool)
+        elif col in COORD_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+        else:
+            # NaN → "" (NaN is not valid JSON), then trim ("After 20:00 ")
+            df[col] = _per_unique(df[col], _text)
+
+    # Rows without a Name or Category aren't places
+    keep = pd.Series(True, index=df.index)
+    for col in ('Name', 'Category'):
+        if col in df.columns:
+            keep &= df[col] != ''
+    return df[keep].reset_index(drop=True)
+
+
+def _to_records(frame):
+    """DataFrame.to_dict('records') built column-wise: one `tolist()` per
+    column (native str/bool/float, NaN → None) zipped into dicts. About 3x
+    faster than to_dict, which boxes every cell separately."""
+    columns = []
+    for col in frame.columns:
+        values = frame[col]
+        if values.dtype.kind == 'f':
+            cells = values.to_numpy(dtype=object)
+            cells[values.isna().to_numpy()] = None
+            columns.append(cells.tolist())
+        else:
+            columns.append(values.tolist())
+    names = list(frame.columns)
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+class SheetImport:
+    """A normalized sheet, ready to serve or to upsert."""
+
+    def __init__(self, frame):
+        self.frame = frame
+        missing = pd.Series(True, index=frame.index)
+        if all(c in frame.columns for c in COORD_COLUMNS):
+            missing = frame['Latitude'].isna() | frame['Longitude'].isna()
+        self.needs_geocode = missing & (frame['Address'] != '' if 'Address' in frame.columns
+                                        else False)
+
+    @classmethod
+    def from_csv(cls, text):
+        return cls(normalize_sheet(pd.read_csv(StringIO(text))))
+
+    def __len__(self):
+        return len(self.frame)
+
+    def records(self):
+        """Rows as /api/places dicts; missing coordinates are None."""
+        return _to_records(self.frame)
+
+    def model_rows(self):
+        """Rows keyed by HappyHourPlace attribute, deduplicated by name (last
+        row wins, like the Telegram bot's case-insensitive duplicate check)."""
+        cols = [c for c in self.frame.columns if c in MODEL_FIELDS]
+        frame = self.frame[cols].rename(columns=MODEL_FIELDS)
+        frame = frame.assign(_key=frame['name'].str.lower()).drop_duplicates('_key', keep='last')
+        return _to_records(frame.drop(columns='_key'))
+
+def upsert_places(imported):
+    """Insert new places and update existing ones (matched on trimmed,
+    lower-cased name) in one bulk INSERT + one bulk UPDATE, then bump the
+    'places' cache version. Returns (inserted, updated)."""
+    from database.models import db, CacheVersion, HappyHourPlace
+
+    key = sa.func.lower(sa.func.trim(HappyHourPlace.name))
+    existing = dict(db.session.execute(sa.select(key, HappyHourPlace.id)).all())
+    now = datetime.utcnow()
+    inserts, updates = [], []
+    for row in imported.model_rows():
+        place_id = existing.get(row['name'].lower())
+        if place_id is None:
+            inserts.append(dict(row, created_at=now, updated_at=now))
+        else:
+            # A blank coordinate in the sheet must not wipe one set in admin
+            row = {k: v for k, v in row.items()
+                   if not (k in ('latitude', 'longitude') and v is None)}
+            updates.append(dict(row, id=place_id, updated_at=now))
+    try:
+        if inserts:
+            db.session.execute(sa.insert(HappyHourPlace), inserts)
+        if updates:
+            db.session.execute(sa.update(HappyHourPlace), updates)
+        CacheVersion.bump('places')
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    print(f"📥 Sheet import: {len(inserts)} new, {len(updates)} updated places")
+    return len(inserts), len(updates)
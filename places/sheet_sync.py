@@ -0,0 +1,214 @@
+"""Google Sheet mirror: conditional GETs, content hash, per-row change sets.
+
+The sheet export used to be downloaded in full and re-parsed on every rebuild
+that fell back to it. `SheetSync` keeps the last CSV on disk next to a small
+JSON sidecar (ETag, Last-Modified, sha256 of the body, per-row hashes):
+
+- requests carry If-None-Match / If-Modified-Since, so an unchanged sheet is a
+  304 with no body. Google's CSV export often sends no validators at all, so a
+  200 whose sha256 matches the mirror is treated the same way;
+- the parsed SheetImport is kept in memory per content hash, so "not modified"
+  costs no pandas work either;
+- if the fetch fails, the mirror is served (offline / Google hiccup).
+
+Each consumer (e.g. the admin DB import) keeps its own baseline of
+row hashes, keyed by lower-cased place name, and `fetch(consumer)` returns the
+rows that are new or changed since that consumer last called `commit()`. So a
+failed import is retried with the same rows, and one consumer catching up
+doesn't hide changes from another.
+
+The sidecar is shared by the gunicorn workers: every read-modify-write of it
+happens under an flock() on <name>.meta.lock and starts from a fresh read, so
+a worker only changes the validators it fetched or its consumer's baseline
+and never writes back a stale copy of the rest.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import requests
+
+from places.sheet_import import SheetImport
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def _atomic_write(path, data):
+    """Temp file + os.replace: a concurrent reader never sees half a file."""
+    dir_name = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=dir_name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def row_hashes(imported):
+    """{lower-cased name: hex hash of the normalized row}, computed for all
+    rows at once with pandas' vectorized hash. Later duplicates win, matching
+    upsert_places."""
+    frame = imported.frame
+    if frame.empty or 'Name' not in frame.columns:
+        return {}
+    hashes = pd.util.hash_pandas_object(frame, index=False)
+    return dict(zip(frame['Name'].str.lower().tolist(),
+                    (f'{h:016x}' for h in hashes.tolist())))
+
+
+class SheetChanges:
+    """The result of one fetch, as seen by one consumer.
+
+    `imported` is the whole sheet; `changed` only the rows that are new or
+    differ from the consumer's baseline; `removed` the names that vanished.
+    `modified` is False when the sheet body itself didn't change (304 or
+    same hash) and `offline` True when the mirror was served after a
+    failed fetch.
+    """
+
+    def __init__(self, sync, consumer, imported, hashes, baseline, modified, offline):
+        self._sync = sync
+        self.consumer = consumer
+        self.imported = imported
+        self.modified = modified
+        self.offline = offline
+        self._hashes = hashes
+        frame = imported.frame
+        if 'Name' in frame.columns:
+            keys = frame['Name'].str.lower()
+            mask = keys.map(baseline) != keys.map(hashes)  # new names map to NaN
+        else:
+            mask = pd.Series(False, index=frame.index)
+        self.changed = SheetImport(frame[mask].reset_index(drop=True))
+        self.removed = sorted(set(baseline) - set(hashes))
+
+    def __bool__(self):
+        return bool(len(self.changed) or self.removed)
+
+    def commit(self):
+        """Advance this consumer's baseline to the fetched sheet — call once the
+        changed rows have been handled, so a failure retries them."""
+        self._sync._commit(self.consumer, self._hashes)
+
+
+class SheetSync:
+    """Mirror of one CSV export URL under `directory` (<name>.csv + <name>.meta.json)."""
+
+    def __init__(self, url, directory, name='sheet', timeout=10, session=None):
+        self.url = url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.csv_path = os.path.join(directory, f'{name}.csv')
+        self.meta_path = os.path.join(directory, f'{name}.meta.json')
+        self.lock_path = os.path.join(directory, f'{name}.meta.lock')
+        self._lock = threading.Lock()
+        self._parsed = None  # (sha256, SheetImport, row hashes)
+        os.makedirs(directory, exist_ok=True)
+        self.meta = self._read_meta()
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {'baselines': {}}
+        if not os.path.exists(self.csv_path):
+            meta.pop('sha256', None)  # validators without the body are useless
+            meta.pop('etag', None)
+            meta.pop('last_modified', None)
+        meta.setdefault('baselines', {})
+        return meta
+
+    def _write_meta(self):
+        _atomic_write(self.meta_path, json.dumps(self.meta, ensure_ascii=False).encode('utf-8'))
+
+    @contextmanager
+    def _locked(self):
+        """Hold this process's lock and the cross-process flock, with
+        `self.meta` re-read from disk. Blocking, but only held around file
+        reads and writes, never the HTTP request."""
+        with self._lock:
+            fd = None
+            if fcntl:
+                fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                self.meta = self._read_meta()
+                yield self.meta
+            finally:
+                if fd is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                    os.close(fd)
+
+    def _conditional_headers(self):
+        headers = {}
+        if self.meta.get('sha256'):
+            if self.meta.get('etag'):
+                headers['If-None-Match'] = self.meta['etag']
+            if self.meta.get('last_modified'):
+                headers['If-Modified-Since'] = self.meta['last_modified']
+        return headers
+
+    def _mirror(self):
+        """The mirrored sheet, parsed once per content hash."""
+        sha = self.meta.get('sha256')
+        if self._parsed is None or self._parsed[0] != sha:
+            with open(self.csv_path, 'rb') as f:
+                imported = SheetImport.from_csv(f.read().decode('utf-8'))
+            self._parsed = (sha, imported, row_hashes(imported))
+        return self._parsed
+
+    def fetch(self, consumer='default'):
+        """Fetch the sheet (conditionally) and diff it against `consumer`'s
+        baseline. Raises only when the fetch fails and there's no mirror."""
+        with self._locked():
+            headers = self._conditional_headers()
+        modified, offline = True, False
+        try:
+            response = self.session.get(self.url, headers=headers, timeout=self.timeout,
+                                        proxies={'http': None, 'https': None})
+            if response.status_code != 304:
+                response.raise_for_status()
+            with self._locked() as meta:
+                if response.status_code == 304:
+                    modified = False
+                else:
+                    body = response.content
+                    sha = hashlib.sha256(body).hexdigest()
+                    modified = sha != meta.get('sha256')
+                    if modified:
+                        _atomic_write(self.csv_path, body)
+                    meta.update(sha256=sha,
+                                etag=response.headers.get('ETag'),
+                                last_modified=response.headers.get('Last-Modified'))
+                meta['fetched_at'] = datetime.utcnow().isoformat()
+                self._write_meta()
+        except Exception as e:
+            if not self.meta.get('sha256'):
+                raise
+            print(f"⚠️ Sheet fetch failed ({e}) — using the local mirror")
+            modified, offline = False, True
+        with self._locked() as meta:
+            sha, imported, hashes = self._mirror()
+            baseline = meta['baselines'].get(consumer, {})
+        if modified:
+            print(f"📄 Sheet changed ({len(imported)} rows, sha {sha[:8]})")
+        return SheetChanges(self, consumer, imported, hashes, baseline, modified, offline)
+
+    def _commit(self, consumer, hashes):
+        with self._locked() as meta:
+            meta['baselines'][consumer] = hashes
+            self._write_meta()
@@ -0,0 +1,76 @@
+"""Pre-rendered /api/places payload.
+
+The places list only changes when the cache is rebuilt, but the map page asks
+for it on every visit. So the list is serialized ONCE per rebuild into
+immutable bytes — identity, gzip and (if the Brotli wheel is installed) br —
+tagged with a content hash. A request then costs an ETag compare and a dict
+lookup: `304 Not Modified` when the browser already has this version,
+otherwise the pre-encoded body for the best encoding it accepts.
+"""
+import gzip
+import hashlib
+import json
+
+from flask import Response
+
+from .hours import AvailabilityIndex
+from .spatial import SpatialIndex
+
+# Browsers revalidate every time (the 304 is cheap), so an admin edit shows on
+# the next page load instead of after some max-age.
+CACHE_CONTROL = 'public, no-cache'
+
+# Order of preference when the client accepts several.
+_ENCODINGS = ('br', 'gzip')
+
+
+def _brotli(body):
+    """br-encode, or None when the optional `brotli` package is missing."""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(body, quality=11)
+
+
+class PlacesSnapshot:
+    """One immutable, pre-encoded version of the places payload, plus the
+    query indexes derived from it (built here so they also rebuild exactly
+    once per data change)."""
+
+    def __init__(self, places):
+        self.places = places
+        self.count = len(places)
+        self.spatial = SpatialIndex(places)
+        self.hours = AvailabilityIndex(places)
+        body = json.dumps(places, ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies = {'identity': body,
+                       'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+        br = _brotli(body)
+        if br is not None:
+            self.bodies['br'] = br
+
+    def _encoding_for(self, req):
+        for enc in _ENCODINGS:
+            if enc in self.bodies and req.accept_encodings[enc]:
+                return enc
+        return 'identity'
+
+    def respond(self, req, status=200):
+        """The Flask response for `req`: 304 if its If-None-Match already names
+        this version, else the pre-encoded body. One ETag covers every encoding
+        (the JSON is the same; Vary tells shared caches to key on encoding)."""
+        if req.if_none_match.contains_weak(self.etag):
+            resp = Response(status=304)
+        else:
+            enc = self._encoding_for(req)
+            resp = Response(self.bodies[enc], status=status,
+                            mimetype='application/json')
+            if enc != 'identity':
+                resp.headers['Content-Encoding'] = enc
+        resp.set_etag(self.etag)
+        resp.headers['Cache-Control'] = CACHE_CONTROL
+        resp.vary.add('Accept-Encoding')
+        return resp
@@ -0,0 +1,85 @@
+"""In-memory spatial index over the places list, for viewport (bounding box)
+and "near me" (radius) queries answered server-side.
+
+A uniform lat/lng grid: each place goes in one bucket of CELL_DEG × CELL_DEG
+(~1 km around Tel Aviv), so a query only visits the buckets overlapping its
+box instead of every place. Built once per snapshot (places/snapshot.py) and
+read-only afterwards, so no locking.
+"""
+import math
+
+CELL_DEG = 0.01
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.32
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def check_bbox(south, west, north, east):
+    """Raise ValueError unless the box has an area: an inverted (south above
+    north, west east of east) or zero-width box would match nothing."""
+    if not (south < north and west < east):
+        raise ValueError("bbox needs south < north and west < east")
+
+
+def _coords(place):
+    try:
+        lat, lng = float(place.get('Latitude')), float(place.get('Longitude'))
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(lat) or math.isnan(lng):
+        return None
+    return lat, lng
+
+
+class SpatialIndex:
+    """Grid index of places by coordinates; places without any are left out."""
+
+    def __init__(self, places, cell_deg=CELL_DEG):
+        self.cell_deg = cell_deg
+        self.buckets = {}       # (row, col) -> [(lat, lng, place), ...]
+        self.size = 0
+        for place in places:
+            coords = _coords(place)
+            if coords:
+                self.buckets.setdefault(self._cell(*coords), []).append((*coords, place))
+                self.size += 1
+
+    def _cell(self, lat, lng):
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def _candidates(self, south, west, north, east):
+        r0, c0 = self._cell(south, west)
+        r1, c1 = self._cell(north, east)
+        if (r1 - r0 + 1) * (c1 - c0 + 1) > len(self.buckets):
+            # A box wider than the data: cheaper to walk the buckets we have.
+            cells = (k for k in self.buckets if r0 <= k[0] <= r1 and c0 <= k[1] <= c1)
+        else:
+            cells = ((r, c) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1))
+        for cell in cells:
+            yield from self.buckets.get(cell, ())
+
+    def within_bbox(self, south, west, north, east, center=None):
+        """[(distance_km, place)] inside the box, nearest to `center` (default:
+        the box's middle) first."""
+        if center is None:
+            center = ((south + north) / 2, (west + east) / 2)
+        hits = [(haversine_km(center[0], center[1], lat, lng), place)
+                for lat, lng, place in self._candidates(south, west, north, east)
+                if south <= lat <= north and west <= lng <= east]
+        hits.sort(key=lambda h: h[0])
+        return hits
+
+    def within_radius(self, lat, lng, radius_km):
+        """[(distance_km, place)] within `radius_km` of (lat, lng), nearest first."""
+        dlat = radius_km / KM_PER_DEG_LAT
+        dlng = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        hits = [h for h in self.within_bbox(lat - dlat, lng - dlng, lat + dlat, lng + dlng,
+                                            center=(lat, lng))
+                if h[0] <= radius_km]
+        return hits
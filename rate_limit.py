@@ -0,0 +1,37 @@
+"""Token-bucket rate limiter shared by the paid-API clients (Google geocoding
+in places/geocoding.py, Gemini in talent/extract.py).
+
+    bucket = TokenBucket(rate=2)
+    bucket.acquire()  # blocks until a call is allowed
+    ...call the API...
+
+The bucket lives in this process: every thread of one gunicorn worker shares
+it, but N workers each get their own, so the rate an API sees is up to
+N × `rate`. Size the per-process rate from the quota and the worker count.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe rate limiter: `rate` tokens per second, bursts up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self._tokens = self.capacity
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._ts) * self.rate)
+                self._ts = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,99 @@
+"""Time the old row-wise sheet normalization against places/sheet_import.py.
+
+    python scripts/bench_sheet_import.py [rows]
+
+Builds a synthetic sheet (default 10,000 rows, with the real column names,
+trailing spaces, blank rows and missing coordinates) and runs each pipeline a
+few times on it. Doesn't import app, so no API keys or DB are needed.
+"""
+import os
+import sys
+import time
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from places.sheet_import import COLUMN_MAPPING, SheetImport
+
+DAYS = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+
+def synthetic_sheet(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = np.arange(rows)
+    df = pd.DataFrame({
+        'Place Name (English)': [f'Bar {i} ' if i % 50 else '' for i in idx],
+        'Place Name (Hebrew)': [f'בר {i}' for i in idx],
+        'Instagram Link': [f'https://instagram.com/bar{i}' for i in idx],
+        'Category': rng.choice(['Bar', 'Restaurant', 'Cafe '], rows),
+        'Description': 'Half price on all drinks ',
+        'Address': [f'Dizengoff {i % 300}' for i in idx],
+        'City': rng.choice(['Tel Aviv', 'Haifa', 'Jerusalem'], rows),
+        'Google Maps Link': '',
+        'Reservation Link': '',
+        'OpeningHours': rng.choice(['17:00-19:00', 'After 20:00 ', '18:00 - close'], rows),
+        'Latitude': np.where(idx % 10, 32.0 + rng.random(rows) / 10, np.nan),
+        'Longitude': np.where(idx % 10, 34.7 + rng.random(rows) / 10, np.nan),
+        'Recommended': '',
+        'Verified': rng.choice(['TRUE', 'FALSE', ''], rows),
+        'Kosher': rng.choice(['yes', 'no', 'TRUE', ''], rows),
+    })
+    for day in DAYS:
+        df[day] = rng.choice(['TRUE', 'FALSE'], rows)
+    return df.to_csv(index=False)
+
+
+def legacy(text):
+    """app.load_places' sheet branch as it was before places/sheet_import.py."""
+    df = pd.read_csv(StringIO(text))
+    df.columns = df.columns.str.strip()
+    df = df.loc[:, ~df.columns.duplicated()]
+    if 'InstagramURL' in df.columns:
+        df = df.drop(columns=['InstagramURL'])
+    df = df.rename(columns={k: v for k, v in COLUMN_MAPPING.items() if k in df.columns})
+    df = df.fillna("")
+    df = df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
+    if 'Name' in df.columns:
+        df = df[df['Name'].str.strip().astype(bool)]
+    if 'Category' in df.columns:
+        df = df[df['Category'].str.strip().astype(bool)]
+    if 'Kosher' in df.columns:
+        df['Kosher'] = df['Kosher'].apply(
+            lambda v: True if str(v).strip().lower() in ('true', 'yes', '1') else False
+        )
+    places = df.to_dict(orient='records')
+    # fill_coordinates' old scan for rows to geocode
+    missing = [p for p in places
+               if (not p.get('Latitude') or not p.get('Longitude')) and p.get('Address')]
+    return places, missing
+
+
+def vectorized(text):
+    imported = SheetImport.from_csv(text)
+    return imported.records(), imported.frame[imported.needs_geocode]
+
+
+def best_of(fn, text, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    text = synthetic_sheet(rows)
+    print(f"📊 {rows:,} rows, {len(text) / 1e6:.1f} MB of CSV")
+    old, new = best_of(legacy, text), best_of(vectorized, text)
+    print(f"  row-wise:   {old * 1000:8.1f} ms")
+    print(f"  vectorized: {new * 1000:8.1f} ms  ({old / new:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
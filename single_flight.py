@@ -0,0 +1,96 @@
+"""Single-flight guard: at most one run of a job at a time across the threads
+of this process AND the gunicorn workers sharing its disk.
+
+    flight = SingleFlight('instagram sync', 'data/ig_sync.lock')
+    with flight.attempt() as acquired:
+        if acquired:
+            ...rebuild...
+
+Nobody waits: a caller that loses the race gets `acquired=False` and keeps
+serving whatever it already has. Across threads it's a non-blocking
+threading.Lock; across processes an exclusive, non-blocking flock() on the
+lock file, which the kernel releases if the holder dies (no stale lock to
+clean up). Where fcntl doesn't exist (Windows dev boxes) only the thread
+half applies. It doesn't span machines: the workers of one instance share
+the lock file, separate instances each run their own.
+
+Counters (`stats()`) show how often the guard actually saved a duplicate run.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class SingleFlight:
+    def __init__(self, name, lock_path=None):
+        self.name = name
+        self.lock_path = lock_path
+        self._lock = threading.Lock()
+        self._counts_lock = threading.Lock()
+        self.counts = {'runs': 0, 'failures': 0, 'busy_thread': 0, 'busy_process': 0}
+        self.last_started = None
+        self.last_duration = None
+        if lock_path:
+            os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+
+    def _count(self, key):
+        with self._counts_lock:
+            self.counts[key] += 1
+
+    def _lock_file(self):
+        """An open, flock()ed fd, or None if another process holds it."""
+        if not (self.lock_path and fcntl):
+            return -1  # nothing to lock beyond this process
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    @contextmanager
+    def attempt(self):
+        """Yield True if this caller gets to run the job, False if a run is
+        already in flight (in this process or another)."""
+        if not self._lock.acquire(blocking=False):
+            self._count('busy_thread')
+            yield False
+            return
+        try:
+            fd = self._lock_file()
+            if fd is None:
+                self._count('busy_process')
+                yield False
+                return
+            try:
+                self.last_started = time.time()
+                started = time.monotonic()
+                self._count('runs')
+                try:
+                    yield True
+                except BaseException:
+                    self._count('failures')
+                    raise
+                finally:
+                    self.last_duration = time.monotonic() - started
+            finally:
+                if fd >= 0:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                    os.close(fd)
+        finally:
+            self._lock.release()
+
+    def stats(self):
+        with self._counts_lock:
+            counts = dict(self.counts)
+        return dict(counts, name=self.name, in_flight=self._lock.locked(),
+                    last_started=self.last_started,
+                    last_duration_s=(round(self.last_duration, 3)
+                                     if self.last_duration is not None else None))
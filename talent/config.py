@@ -27,6 +27,30 @@ def fallback_model():
     return os.environ.get('GEMINI_CV_FALLBACK_MODEL', '').strip() or None
 
 
+def analysis_workers():
+    """CVs extracted in parallel by one process's background analyzer."""
+    return max(1, int(os.environ.get('TALENT_ANALYSIS_WORKERS', '4') or 4))
+
+
+def analysis_stale_minutes():
+    """A CV 'running' for longer than this was claimed by a process that
+    died; the next analyzer run puts it back to 'pending'."""
+    return max(1, int(os.environ.get('TALENT_ANALYSIS_STALE_MINUTES', '30') or 30))
+
+
+def gemini_qps():
+    """Talent Gemini calls per second (extraction + matching), PER PROCESS:
+    each gunicorn worker paces its own analyzer, so the total against the
+    Gemini quota is up to workers × this. Set it to quota / worker count."""
+    return max(0.1, float(os.environ.get('TALENT_GEMINI_QPS', '2') or 2))
+
+
+def ingest_workers():
+    """Attachments parsed at once during a Gmail sync (each parse is its own
+    sandboxed subprocess)."""
+    return max(1, int(os.environ.get('TALENT_INGEST_WORKERS', '4') or 4))
+
+
 def gmail_config():
     """Gmail ingestion via IMAP app password. Unset = sync disabled (the rest
     of the dashboard, incl. manual uploads, works without it)."""
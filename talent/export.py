@@ -0,0 +1,64 @@
+"""Streaming ZIP archives for the CV export (/admin/talent/cvs.zip).
+
+The export used to build the whole archive in a BytesIO before sending a
+byte — up to 2,000 CVs of up to 10MB each in one worker's RAM. stream_zip()
+instead yields the archive while it is written: zipfile writes into a
+write-only sink (no seek(), so it emits data descriptors after each entry
+instead of patching headers), and the generator hands the sink's bytes to
+the response after every CHUNK of input. Memory is bounded by the blob being
+written, not the archive.
+
+PDF and DOCX are already compressed (DOCX is itself a ZIP), so they go in
+STORED: deflating them again burns CPU for ~1-2%.
+"""
+import zipfile
+
+CHUNK = 1024 * 1024
+STORED_EXTS = ('.pdf', '.docx')
+
+
+def compress_type(ext):
+    return zipfile.ZIP_STORED if (ext or '').lower() in STORED_EXTS else zipfile.ZIP_DEFLATED
+
+
+class _Sink:
+    """Write-only file object for zipfile; stream_zip() empties it."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def stream_zip(entries):
+    """Yield a ZIP archive of `entries`: (name, data, modified datetime or
+    None, compress type) tuples, consumed one at a time."""
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w') as zf:
+        for name, data, modified, method in entries:
+            info = zipfile.ZipInfo(name, date_time=(modified.timetuple()[:6] if modified
+                                                    else (1980, 1, 1, 0, 0, 0)))
+            info.compress_type = method
+            info.external_attr = 0o600 << 16
+            info.file_size = len(data)
+            view = memoryview(data)
+            with zf.open(info, 'w') as f:
+                for i in range(0, len(view), CHUNK):
+                    f.write(view[i:i + CHUNK])
+                    yield from sink.drain()
+            yield from sink.drain()
+    yield from sink.drain()  # central directory
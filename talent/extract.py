@@ -7,6 +7,7 @@ yields nothing (scanned PDFs). Output is a strict, small JSON schema — never
 a rewritten CV.
 """
 import base64
+import hashlib
 import json
 import os
 import re
@@ -14,15 +15,22 @@ import shutil
 import tempfile
 from datetime import datetime
 
+from sqlalchemy.exc import IntegrityError
+
 from cv_review import sandbox
 from cv_review.gemini import GeminiError, UsageTracker, api_key, generate_json
 from database.models import db
+from rate_limit import TokenBucket
 
 from . import config
-from .models import TalentAiLog
+from .models import TalentAiLog, TalentExtractionCache
 
 PDF_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdf_worker.py')
 
+# Every Talent Gemini call, from any analyzer thread of this process, takes a
+# token first (the bucket is per process: see config.gemini_qps()).
+_gemini_bucket = TokenBucket(config.gemini_qps())
+
 _STR = {'type': 'string'}
 _STR_ARR = {'type': 'array', 'items': _STR}
 
@@ -146,6 +154,7 @@ def _call_with_fallback(parts, schema, *, purpose, tracker, model, kind,
         models.append(fb)
     last_exc = None
     for m in models:
+        _gemini_bucket.acquire()
         try:
             data = generate_json(parts, schema, purpose=purpose, usage=tracker,
                                  key=key, model=m,
@@ -158,15 +167,60 @@ def _call_with_fallback(parts, schema, *, purpose, tracker, model, kind,
     raise last_exc
 
 
+def extraction_key(cv):
+    """Cache key for `cv`'s extraction: what Gemini would be sent, reduced to
+    a sha256 together with the extraction version. Whitespace is collapsed so
+    the same document parsed twice still meets. None if there's nothing to
+    extract from."""
+    if cv.text:
+        content = b'text:' + ' '.join(cv.text.split()).encode('utf-8')
+    elif cv.ext == '.pdf' and cv.file:
+        content = b'pdf:' + cv.file
+    else:
+        return None
+    digest = hashlib.sha256(f'v{config.EXTRACTION_VERSION}\n'.encode())
+    digest.update(content)
+    return digest.hexdigest()
+
+
+def _cached_extraction(key):
+    row = db.session.get(TalentExtractionCache, key) if key else None
+    if row is None or row.extraction_version != config.EXTRACTION_VERSION:
+        return None
+    row.hits = (row.hits or 0) + 1
+    row.last_hit_at = datetime.utcnow()
+    return row
+
+
+def _store_extraction(key, data, model):
+    """Best-effort: a concurrent analyzer may have stored the same key."""
+    if not key:
+        return
+    try:
+        db.session.add(TalentExtractionCache(
+            key=key, extraction_version=config.EXTRACTION_VERSION,
+            analysis=data, model=model))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+
+
 def run_extraction(cv, candidate):
     """Gemini structured extraction for one CV version. Stores the analysis on
     the CV row (§24: cached per version) and backfills EMPTY candidate fields
-    only — admin edits are never clobbered by a re-run."""
+    only — admin edits are never clobbered by a re-run. A CV whose content was
+    already extracted under the current EXTRACTION_VERSION reuses that result
+    without an API call."""
     cv.analysis_status = 'running'
+    cv.claimed_at = datetime.utcnow()
     db.session.commit()
     tracker = UsageTracker()
+    key = extraction_key(cv)
     try:
-        if cv.text:
+        cached = _cached_extraction(key)
+        if cached is not None:
+            data, model = cached.analysis, cached.model
+        elif cv.text:
             parts = [{'text': EXTRACTION_PROMPT},
                      {'text': 'CV TEXT:\n' + cv.text}]
         elif cv.ext == '.pdf' and cv.file:
@@ -178,15 +232,18 @@ def run_extraction(cv, candidate):
         else:
             raise GeminiError('No readable text in this document')
 
-        data = _call_with_fallback(
-            parts, EXTRACTION_SCHEMA, purpose='talent_extract',
-            tracker=tracker, model=config.extraction_model(),
-            kind='extract', candidate_id=candidate.id)
+        if cached is None:
+            data = _call_with_fallback(
+                parts, EXTRACTION_SCHEMA, purpose='talent_extract',
+                tracker=tracker, model=config.extraction_model(),
+                kind='extract', candidate_id=candidate.id)
+            model = tracker.calls[-1]['model'] if tracker.calls else config.extraction_model()
+            _store_extraction(key, data, model)
 
         cv.analysis = data
         cv.analysis_status = 'complete'
         cv.analysis_error = None
-        cv.analysis_model = tracker.calls[-1]['model'] if tracker.calls else config.extraction_model()
+        cv.analysis_model = model
         cv.extraction_version = config.EXTRACTION_VERSION
         cv.analyzed_at = datetime.utcnow()
 
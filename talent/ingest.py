@@ -4,6 +4,12 @@ Read-only mailbox access with an app password (TALENT_GMAIL_USER /
 TALENT_GMAIL_APP_PASSWORD). Sync is idempotent: emails dedupe on Message-ID,
 so running it any number of times ingests each CV email once. Gmail is ONLY
 an ingestion source — all state lives in the dashboard DB (§38).
+
+New messages are pipelined: full bodies come FETCH_CHUNK at a time in one
+multi-UID FETCH; each message's CV attachment goes to a small pool that runs
+the sandboxed PDF/DOCX parse (config.ingest_workers() subprocesses at most)
+while the next chunk downloads; then the chunk's emails, candidates and CVs
+are committed together.
 """
 import email
 import email.header
@@ -11,16 +17,22 @@ import email.utils
 import imaplib
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 from database.models import db
 
 from . import config
+from .extract import extract_text
 from .models import TalentEmail
-from .pipeline import UploadError, add_cv, ensure_candidate
+from .pipeline import (UploadError, add_cv, ensure_candidate, mirror_cv_to_drive,
+                       validate_upload)
 
 logger = logging.getLogger('talent')
 
+FETCH_CHUNK = 10  # full messages per FETCH (attachments up to 10MB each)
+_SKIPPED = object()
+
 _CV_NAME_HINT = re.compile(r'cv|resume|קורות', re.IGNORECASE)
 
 
@@ -72,6 +84,92 @@ def _cv_attachments(msg):
     return found
 
 
+def _fetch_messages(box, uids):
+    """{uid: Message} for `uids`, in ONE UID FETCH round trip."""
+    _typ, resp = box.uid('FETCH', ','.join(uids), '(BODY.PEEK[])')
+    out = {}
+    resp = resp or []
+    for i, item in enumerate(resp):
+        if not isinstance(item, tuple):
+            continue
+        # The UID usually precedes the literal; some servers send it after
+        m = re.search(rb'UID (\d+)', item[0])
+        if not m and i + 1 < len(resp) and isinstance(resp[i + 1], bytes):
+            m = re.search(rb'UID (\d+)', resp[i + 1])
+        if m:
+            out[m.group(1).decode()] = email.message_from_bytes(item[1])
+    return out
+
+
+def _incoming(msgid, msg, cfg, pool):
+    """A fetched message as a dict ready for _commit_batch, its attachment's
+    text parse already submitted to `pool`. None for my own outbound mail,
+    _SKIPPED when there's no valid CV attachment."""
+    from_name, from_email = email.utils.parseaddr(msg.get('From', ''))
+    from_email = (from_email or '').lower()[:256]
+    if from_email == cfg['user'].lower():
+        return None  # my own outbound mail is not a candidate
+    for filename, payload in _cv_attachments(msg):
+        try:
+            ext = validate_upload(payload, filename)
+        except UploadError as exc:
+            logger.info('talent sync: attachment %r rejected: %s', filename, exc)
+            continue
+        # first valid CV-looking attachment wins
+        return {'message_id': msgid, 'from_name': _decode(from_name)[:256],
+                'from_email': from_email, 'subject': _decode(msg.get('Subject'))[:1000],
+                'snippet': _body_snippet(msg), 'received_at': _received_at(msg),
+                'filename': filename, 'payload': payload,
+                'text': pool.submit(extract_text, payload, ext)}
+    return _SKIPPED
+
+
+def _commit_batch(batch, summary):
+    """Store a chunk of incoming CV emails in one transaction, then mirror
+    the CVs to Drive. Each email gets its own SAVEPOINT, so one that fails
+    (bad data, a constraint) is skipped without taking the rest of the chunk
+    with it. Nothing is lost either way: an email not stored stays unknown
+    and the next sync picks it up again."""
+    if not batch:
+        return
+    added = []
+    try:
+        for item in batch:
+            try:
+                extracted = item['text'].result()
+            except Exception as exc:
+                logger.warning('talent sync: parsing %r failed: %s', item['filename'], exc)
+                extracted = ('', 'none')
+            try:
+                with db.session.begin_nested():
+                    row = TalentEmail(message_id=item['message_id'],
+                                      from_name=item['from_name'],
+                                      from_email=item['from_email'], subject=item['subject'],
+                                      snippet=item['snippet'], received_at=item['received_at'])
+                    db.session.add(row)
+                    db.session.flush()
+                    cand, was_new = ensure_candidate(email=item['from_email'],
+                                                     name=item['from_name'], source='EMAIL')
+                    cv = add_cv(cand, item['payload'], item['filename'], email_id=row.id,
+                                extracted=extracted, commit=False)
+                    row.candidate_id = cand.id
+            except Exception as exc:
+                logger.warning('talent sync: email %s not stored: %s', item['message_id'], exc)
+                continue
+            added.append((cand, cv, was_new))
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        logger.warning('talent sync: batch of %d emails not stored: %s', len(batch), exc)
+        return
+    for cand, cv, was_new in added:
+        mirror_cv_to_drive(cand, cv)
+        summary['new_emails'] += 1
+        summary['new_cvs'] += 1
+        if was_new:
+            summary['new_candidates'] += 1
+
+
 def sync_gmail():
     """Pull recent inbox emails, ingest new CV emails, return a summary dict.
     Fast (no AI) — the caller kicks off background analysis afterwards."""
@@ -122,57 +220,33 @@ def sync_gmail():
         known.update(mid for (mid,) in db.session.query(TalentEmail.message_id)
                      .filter(TalentEmail.message_id.in_(chunk)).all())
 
+    new = {}
     for uid, msgid in uid_msgid:
-        if msgid in known:
-            continue
-        try:
-            _typ, full = box.uid('FETCH', uid, '(BODY.PEEK[])')
-            raw = next(item[1] for item in full if isinstance(item, tuple))
-            msg = email.message_from_bytes(raw)
-        except Exception as exc:
-            logger.warning('talent sync: fetch uid %s failed: %s', uid, exc)
-            continue
-
-        from_name, from_email = email.utils.parseaddr(msg.get('From', ''))
-        from_name = _decode(from_name)[:256]
-        from_email = (from_email or '').lower()[:256]
-        if from_email == cfg['user'].lower():
-            continue  # my own outbound mail is not a candidate
-        attachments = _cv_attachments(msg)
-        if not attachments:
-            summary['skipped'] += 1
-            continue
-
-        row = TalentEmail(message_id=msgid, from_name=from_name,
-                          from_email=from_email, subject=_decode(msg.get('Subject'))[:1000],
-                          snippet=_body_snippet(msg), received_at=_received_at(msg))
-        db.session.add(row)
-        db.session.flush()
-
-        cand, was_new = ensure_candidate(email=from_email, name=from_name,
-                                         source='EMAIL')
-        cv_added = False
-        for filename, payload in attachments:
+        if msgid not in known:
+            new.setdefault(msgid, uid)  # the same email under two UIDs: once
+    new = list(new.items())
+    with ThreadPoolExecutor(max_workers=config.ingest_workers(),
+                            thread_name_prefix='talent-ingest') as pool:
+        parsing = []
+        for i in range(0, len(new), FETCH_CHUNK):
+            chunk = new[i:i + FETCH_CHUNK]
             try:
-                add_cv(cand, payload, filename, email_id=row.id)
-                cv_added = True
-                break  # first valid CV-looking attachment wins
-            except UploadError as exc:
-                logger.info('talent sync: attachment %r rejected: %s', filename, exc)
-        if not cv_added:
-            db.session.delete(row)
-            if was_new:
-                db.session.delete(cand)  # no CV survived -> no empty card
-            db.session.commit()
-            summary['skipped'] += 1
-            continue
-        row.candidate_id = cand.id
-        db.session.commit()
-        summary['new_emails'] += 1
-        summary['new_cvs'] += 1
-        if was_new:
-            summary['new_candidates'] += 1
-        known.add(msgid)
+                messages = _fetch_messages(box, [uid for _, uid in chunk])
+            except (imaplib.IMAP4.error, OSError) as exc:
+                logger.warning('talent sync: fetch of %d messages failed: %s', len(chunk), exc)
+                messages = {}
+            fetched = []
+            for msgid, uid in chunk:
+                if uid not in messages:
+                    continue
+                item = _incoming(msgid, messages[uid], cfg, pool)
+                if item is _SKIPPED:
+                    summary['skipped'] += 1
+                elif item is not None:
+                    fetched.append(item)
+            _commit_batch(parsing, summary)  # previous chunk, parsed meanwhile
+            parsing = fetched
+        _commit_batch(parsing, summary)
 
     try:
         box.logout()
@@ -4,7 +4,13 @@ Cost discipline (§25, §37): a cheap deterministic prefilter picks plausible
 companies from the stored structured extraction; ONE Gemini call then judges
 the whole shortlist together. Never one API request per company. The reverse
 direction (new company -> existing candidates) works the same way.
+
+After a Gmail sync the background analyzer batches further (§25): pending
+candidates whose shortlists overlap share ONE call over a candidates x
+companies matrix (run_batch_matching), sized to a token budget.
 """
+import json
+import logging
 from datetime import datetime
 
 from cv_review.gemini import UsageTracker
@@ -13,9 +19,21 @@ from database.models import db
 from . import config
 from .extract import _call_with_fallback
 from .models import TalentMatch
+from .prefilter import GENERIC_ROLE_WORDS, _tokens, company_index
 
 SHORTLIST_CAP = 15
 
+# Batch sizing (run_batch_matching). Prompt size is estimated from the JSON
+# we send (~3 chars/token — Hebrew notes tokenize worse than English); each
+# requested pair costs roughly PAIR_OUTPUT_TOKENS of response.
+BATCH_MAX_CANDIDATES = 8
+BATCH_MAX_PAIRS = 60
+BATCH_TOKEN_BUDGET = 24000
+PAIR_OUTPUT_TOKENS = 110
+MAX_MATCH_OUTPUT_TOKENS = 8192
+
+logger = logging.getLogger('talent')
+
 _STR = {'type': 'string'}
 _STR_ARR = {'type': 'array', 'items': _STR}
 
@@ -49,18 +67,18 @@ Rules:
 - Be decisive and concise; bullets under 10 words.
 """
 
+BATCH_NOTE = """Several candidates and companies are given below. Judge ONLY the pairs listed under PAIRS —
+exactly one entry per pair, each with its candidate_id and company_id."""
 
-def _tokens(*values):
-    """Lowercased word set from strings/lists, for fuzzy overlap tests."""
-    out = set()
-    for v in values:
-        items = v if isinstance(v, (list, tuple)) else [v]
-        for item in items:
-            for w in str(item or '').lower().replace('/', ' ').split():
-                w = w.strip('.,()')
-                if len(w) > 1:
-                    out.add(w)
-    return out
+BATCH_MATCH_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'matches': {'type': 'array', 'items': dict(
+            MATCH_SCHEMA['properties']['matches']['items'],
+            required=['candidate_id', 'company_id', 'fit', 'pros', 'cons'])},
+    },
+    'required': ['matches'],
+}
 
 
 def _roles_overlap(analysis, company):
@@ -69,9 +87,9 @@ def _roles_overlap(analysis, company):
         return True
     cand = _tokens(analysis.get('roles'), analysis.get('current_title'))
     # Generic words shared by most role names don't establish an overlap.
-    cand -= {'engineer', 'developer', 'senior', 'junior', 'lead', 'staff'}
+    cand -= GENERIC_ROLE_WORDS
     for role in targets:
-        t = _tokens(role) - {'engineer', 'developer', 'senior', 'junior', 'lead', 'staff'}
+        t = _tokens(role) - GENERIC_ROLE_WORDS
         if not t or (t & cand):
             return True
     return False
@@ -79,7 +97,9 @@ def _roles_overlap(analysis, company):
 
 def plausible(analysis, company):
     """Deterministic prefilter — recall-oriented: only HARD constraint failures
-    exclude a company; Gemini refines the survivors. Returns (ok, score)."""
+    exclude a company; Gemini refines the survivors. Returns (ok, score).
+    One pair at a time; shortlists go through the equivalent precomputed
+    indexes in prefilter.py."""
     if not analysis:
         return False, 0
     # Hard constraints
@@ -104,13 +124,8 @@ def plausible(analysis, company):
 
 def shortlist_companies(analysis, companies):
     """Plausible active companies, best-first, capped."""
-    scored = []
-    for c in companies:
-        ok, score = plausible(analysis, c)
-        if ok:
-            scored.append((score, c))
-    scored.sort(key=lambda t: -t[0])
-    return [c for _, c in scored[:SHORTLIST_CAP]]
+    companies = list(companies)
+    return [companies[i] for i in company_index(companies).shortlist(analysis, SHORTLIST_CAP)]
 
 
 def _candidate_profile(candidate, analysis):
@@ -157,7 +172,6 @@ def _upsert_match(candidate_id, company_id, verdict, model, existing_by_company)
 def run_matching(candidate, analysis, companies):
     """Candidate -> companies: prefilter, then ONE Gemini call for the whole
     shortlist. Upserts talent_matches; admin overrides survive untouched."""
-    import json as _json
     short = shortlist_companies(analysis, [c for c in companies if c.active])
     existing = {m.company_id: m for m in TalentMatch.query.filter_by(
         candidate_id=candidate.id).all()}
@@ -166,9 +180,9 @@ def run_matching(candidate, analysis, companies):
 
     tracker = UsageTracker()
     parts = [{'text': MATCH_PROMPT},
-             {'text': 'CANDIDATE:\n' + _json.dumps(_candidate_profile(candidate, analysis),
+             {'text': 'CANDIDATE:\n' + json.dumps(_candidate_profile(candidate, analysis),
                                                    ensure_ascii=False)},
-             {'text': 'COMPANIES:\n' + _json.dumps([_company_profile(c) for c in short],
+             {'text': 'COMPANIES:\n' + json.dumps([_company_profile(c) for c in short],
                                                    ensure_ascii=False)}]
     data = _call_with_fallback(parts, MATCH_SCHEMA, purpose='talent_match',
                                tracker=tracker, model=config.matching_model(),
@@ -186,16 +200,15 @@ def run_matching(candidate, analysis, companies):
 def run_reverse_matching(company, candidates_with_analysis):
     """New/edited company -> existing candidates (§37): ONE Gemini call judging
     the already-shortlisted candidates against this single company."""
-    import json as _json
     if not candidates_with_analysis:
         return []
     tracker = UsageTracker()
     profiles = [_candidate_profile(cand, analysis)
                 for cand, analysis in candidates_with_analysis]
     parts = [{'text': MATCH_PROMPT},
-             {'text': 'COMPANY:\n' + _json.dumps(_company_profile(company),
+             {'text': 'COMPANY:\n' + json.dumps(_company_profile(company),
                                                  ensure_ascii=False)},
-             {'text': 'CANDIDATES:\n' + _json.dumps(profiles, ensure_ascii=False)}]
+             {'text': 'CANDIDATES:\n' + json.dumps(profiles, ensure_ascii=False)}]
     data = _call_with_fallback(parts, MATCH_SCHEMA, purpose='talent_match_reverse',
                                tracker=tracker, model=config.matching_model(),
                                kind='match', candidate_id=None)
@@ -216,3 +229,122 @@ def run_reverse_matching(company, candidates_with_analysis):
         updated.append(cid)
     db.session.commit()
     return updated
+
+
+def _estimate_tokens(obj):
+    return len(json.dumps(obj, ensure_ascii=False)) // 3 + 1
+
+
+class MatchBatch:
+    """Candidates sharing one matching call: each with its own shortlist, the
+    companies being the union of those shortlists."""
+
+    def __init__(self):
+        self.items = []       # [(candidate, analysis, shortlist)]
+        self.companies = {}   # company id -> company
+        self.tokens = _estimate_tokens(MATCH_PROMPT + BATCH_NOTE)
+        self.pairs = 0
+
+    def cost(self, profile_tokens, shortlist, company_tokens):
+        """Prompt tokens that adding this candidate would add."""
+        return (profile_tokens + _estimate_tokens({'candidate_id': '', 'company_id': 0})
+                * len(shortlist)
+                + sum(company_tokens[c.id] for c in shortlist if c.id not in self.companies))
+
+    def add(self, candidate, analysis, shortlist, tokens):
+        self.items.append((candidate, analysis, shortlist))
+        self.companies.update((c.id, c) for c in shortlist)
+        self.tokens += tokens
+        self.pairs += len(shortlist)
+
+
+def plan_batches(items, companies, max_candidates=BATCH_MAX_CANDIDATES,
+                 max_pairs=BATCH_MAX_PAIRS, token_budget=BATCH_TOKEN_BUDGET):
+    """Group (candidate, analysis) items into MatchBatches. Widest shortlists
+    seed batches; every other candidate joins the batch it shares the most
+    companies with, if that keeps the batch within its candidate, pair and
+    token limits — else it starts a new one. Candidates with an empty
+    shortlist need no call and are left out."""
+    active = [c for c in companies if c.active]
+    company_tokens = {}
+    entries = []
+    for candidate, analysis in items:
+        short = shortlist_companies(analysis, active)
+        if short:
+            entries.append((candidate, analysis, short))
+            for c in short:
+                if c.id not in company_tokens:
+                    company_tokens[c.id] = _estimate_tokens(_company_profile(c))
+    entries.sort(key=lambda e: -len(e[2]))
+
+    batches = []
+    for candidate, analysis, short in entries:
+        profile_tokens = _estimate_tokens(_candidate_profile(candidate, analysis))
+        ids = {c.id for c in short}
+        best, best_overlap, best_cost = None, 0, 0
+        for batch in batches:
+            overlap = len(ids & batch.companies.keys())
+            if overlap <= best_overlap:
+                continue
+            cost = batch.cost(profile_tokens, short, company_tokens)
+            if (len(batch.items) < max_candidates
+                    and batch.pairs + len(short) <= max_pairs
+                    and batch.tokens + cost <= token_budget):
+                best, best_overlap, best_cost = batch, overlap, cost
+        if best is None:
+            best = MatchBatch()
+            batches.append(best)
+            best_cost = best.cost(profile_tokens, short, company_tokens)
+        best.add(candidate, analysis, short, best_cost)
+    return batches
+
+
+def _match_batch(batch):
+    """ONE Gemini call for every (candidate, shortlisted company) pair of
+    `batch`; each verdict is routed to its own pair's talent_matches row."""
+    tracker = UsageTracker()
+    pairs = [{'candidate_id': cand.id, 'company_id': c.id}
+             for cand, _, short in batch.items for c in short]
+    parts = [{'text': MATCH_PROMPT + '\n' + BATCH_NOTE},
+             {'text': 'CANDIDATES:\n' + json.dumps(
+                 [_candidate_profile(cand, analysis) for cand, analysis, _ in batch.items],
+                 ensure_ascii=False)},
+             {'text': 'COMPANIES:\n' + json.dumps(
+                 [_company_profile(c) for c in batch.companies.values()],
+                 ensure_ascii=False)},
+             {'text': 'PAIRS:\n' + json.dumps(pairs)}]
+    data = _call_with_fallback(
+        parts, BATCH_MATCH_SCHEMA, purpose='talent_match_batch', tracker=tracker,
+        model=config.matching_model(), kind='match', candidate_id=None,
+        max_output_tokens=min(MAX_MATCH_OUTPUT_TOKENS,
+                              1024 + PAIR_OUTPUT_TOKENS * len(pairs)))
+    model = tracker.calls[-1]['model'] if tracker.calls else config.matching_model()
+
+    wanted = {(p['candidate_id'], p['company_id']) for p in pairs}
+    existing = {cand.id: {} for cand, _, _ in batch.items}
+    for row in TalentMatch.query.filter(TalentMatch.candidate_id.in_(list(existing))).all():
+        existing[row.candidate_id][row.company_id] = row
+    for verdict in data.get('matches', []):
+        key = (verdict.get('candidate_id'), verdict.get('company_id'))
+        if key in wanted:
+            _upsert_match(key[0], key[1], verdict, model, existing[key[0]])
+    db.session.commit()
+    return {cand.id: [existing[cand.id][c.id] for c in short if c.id in existing[cand.id]]
+            for cand, _, short in batch.items}
+
+
+def run_batch_matching(items, companies):
+    """Many candidates -> companies in as few calls as plan_batches allows.
+    `items` is [(candidate, analysis)]. Returns {candidate_id: [TalentMatch]}
+    for the candidates that were matched; a failed batch — AI error, odd
+    response, DB error — is rolled back, logged and only costs itself (the CVs
+    stay analyzed, matching can be re-run)."""
+    results = {}
+    for batch in plan_batches(items, companies):
+        try:
+            results.update(_match_batch(batch))
+        except Exception as exc:
+            db.session.rollback()
+            logger.warning('talent batch matching failed for %d candidates: %s',
+                           len(batch.items), exc)
+    return results
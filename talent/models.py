@@ -139,6 +139,7 @@ class TalentCv(db.Model):
     analysis = db.Column(db.JSON)                 # structured extraction (§22)
     analysis_status = db.Column(db.String(16), default='pending')  # pending|running|complete|failed
     analysis_error = db.Column(db.Text)
+    claimed_at = db.Column(db.DateTime)           # when it went 'running' (stale-claim sweep)
     analysis_model = db.Column(db.String(64))
     extraction_version = db.Column(db.Integer)
     analyzed_at = db.Column(db.DateTime)
@@ -148,6 +149,23 @@ class TalentCv(db.Model):
         return f'<TalentCv v{self.version} {self.filename} {self.analysis_status}>'
 
 
+class TalentExtractionCache(db.Model):
+    """Content-addressed extraction results: the same CV arriving again (Gmail
+    resend, manual re-upload, a WhatsApp application) reuses the analysis
+    instead of paying Gemini twice. The key hashes the extraction version and
+    the normalized CV text (the file bytes for scanned PDFs), so bumping
+    config.EXTRACTION_VERSION is what invalidates it."""
+    __tablename__ = 'talent_extraction_cache'
+
+    key = db.Column(db.String(64), primary_key=True)  # sha256 hex
+    extraction_version = db.Column(db.Integer, nullable=False)
+    analysis = db.Column(db.JSON, nullable=False)
+    model = db.Column(db.String(64))
+    hits = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_hit_at = db.Column(db.DateTime)
+
+
 class TalentMatch(db.Model):
     """Candidate x company fit. AI writes ai_* fields; the admin override
     (admin_fit) is separate and ALWAYS wins in the UI — a future AI re-run
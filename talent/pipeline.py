@@ -8,12 +8,15 @@ import io
 import logging
 import os
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
 from database.models import db
 
 from . import config
 from .extract import extract_text, run_extraction
-from .matching import run_matching
+from .matching import run_batch_matching, run_matching
 from .models import TalentCandidate, TalentCompany, TalentCv
 
 logger = logging.getLogger('talent')
@@ -90,11 +93,16 @@ def ensure_candidate(email=None, name=None, source='EMAIL'):
     return cand, True
 
 
-def add_cv(candidate, file_bytes, filename, email_id=None):
+def add_cv(candidate, file_bytes, filename, email_id=None, extracted=None,
+           commit=True):
     """Store a new CV version (old versions kept, newest active — §36) and
-    extract its text locally. No AI here — analysis is a separate step."""
+    extract its text locally. No AI here — analysis is a separate step.
+
+    `extracted` is an extract_text() result computed ahead of time (Gmail
+    sync parses attachments in parallel). With commit=False the row is only
+    flushed: the caller commits a whole batch, then mirrors to Drive."""
     ext = validate_upload(file_bytes, filename)
-    text, text_source = extract_text(file_bytes, ext)
+    text, text_source = extracted or extract_text(file_bytes, ext)
     version = 1 + db.session.query(db.func.count(TalentCv.id)).filter(
         TalentCv.candidate_id == candidate.id).scalar()
     TalentCv.query.filter_by(candidate_id=candidate.id, is_active=True) \
@@ -104,6 +112,9 @@ def add_cv(candidate, file_bytes, filename, email_id=None):
                   file=file_bytes, text=text, text_source=text_source,
                   email_id=email_id, analysis_status='pending')
     db.session.add(cv)
+    if not commit:
+        db.session.flush()
+        return cv
     db.session.commit()
     mirror_cv_to_drive(candidate, cv)  # personal copy, best-effort
     return cv
@@ -123,10 +134,134 @@ def analyze_candidate(candidate, cv=None):
 
 
 # ---- Background batch analyzer ---------------------------------------------
-# One at a time per process; a second sync while one runs just queues nothing
-# extra — pending CVs are picked up by the running batch's next loop anyway.
+# One coordinator per process; a second sync while one runs just queues
+# nothing extra — pending CVs are picked up by the running loop's next claim.
+# The coordinator claims rounds of pending CVs, extracts them on a pool of
+# config.analysis_workers() threads (all paced by the Gemini QPS limit in
+# extract.py), then matches the round together so candidates with overlapping
+# shortlists share a call. Claims are atomic, so the coordinators of several
+# gunicorn workers never analyze the same CV twice; a claim left 'running' by
+# a process that died is put back to 'pending' by the next run's sweep.
 _analyze_lock = threading.Lock()
 
+ANALYZE_BATCH_SIZE = 16
+
+_progress_lock = threading.Lock()
+_progress = {'running': False, 'workers': 0, 'claimed': 0, 'extracted': 0,
+             'failed': 0, 'matched': 0, 'started_at': None, 'finished_at': None}
+
+
+def _bump(**counts):
+    with _progress_lock:
+        for key, n in counts.items():
+            _progress[key] += n
+
+
+def analysis_progress():
+    """This process's analyzer: running or not, and counts for the current
+    (or last) run."""
+    with _progress_lock:
+        return dict(_progress)
+
+
+def claim_pending(limit):
+    """Atomically move up to `limit` pending active CVs to 'running' and
+    return them, oldest first. Postgres: SELECT ... FOR UPDATE SKIP LOCKED, so
+    concurrent claimers get disjoint rows without waiting on each other.
+    Elsewhere (SQLite) there are no row locks: each row is claimed with a
+    conditional UPDATE and one another claimer already took is skipped."""
+    query = TalentCv.query.filter_by(analysis_status='pending', is_active=True) \
+        .order_by(TalentCv.created_at).limit(limit)
+    now = datetime.utcnow()
+    if db.engine.dialect.name == 'postgresql':
+        cvs = query.with_for_update(skip_locked=True).all()
+        for cv in cvs:
+            cv.analysis_status = 'running'
+            cv.claimed_at = now
+        db.session.commit()
+        return cvs
+    claimed = []
+    for cv_id in [cv.id for cv in query.all()]:
+        n = TalentCv.query.filter_by(id=cv_id, analysis_status='pending') \
+            .update({'analysis_status': 'running', 'claimed_at': now},
+                    synchronize_session=False)
+        if n:
+            claimed.append(cv_id)
+    db.session.commit()
+    if not claimed:
+        return []
+    db.session.expire_all()
+    return TalentCv.query.filter(TalentCv.id.in_(claimed)) \
+        .order_by(TalentCv.created_at).all()
+
+
+def sweep_stale_claims():
+    """Put CVs a dead process left 'running' (claimed longer ago than
+    config.analysis_stale_minutes(), or before claims were timestamped) back
+    to 'pending'. Returns how many."""
+    cutoff = datetime.utcnow() - timedelta(minutes=config.analysis_stale_minutes())
+    n = TalentCv.query.filter(
+        TalentCv.analysis_status == 'running',
+        db.or_(TalentCv.claimed_at.is_(None), TalentCv.claimed_at < cutoff),
+    ).update({'analysis_status': 'pending', 'claimed_at': None},
+             synchronize_session=False)
+    db.session.commit()
+    if n:
+        logger.warning('talent: reset %d stale running CV(s) to pending', n)
+    return n
+
+
+def _extract_one(app, cv_id):
+    """Pool task: extraction for one claimed CV in its own app context (own
+    DB session). Returns True on success; a failure is stored on the row."""
+    with app.app_context():
+        cv = db.session.get(TalentCv, cv_id)
+        cand = db.session.get(TalentCandidate, cv.candidate_id)
+        try:
+            run_extraction(cv, cand)
+            return True
+        except Exception as exc:
+            logger.warning('talent analyze failed for %s: %s', cv_id, exc)
+            db.session.rollback()
+            # Mark failed so the row can't strand as running and the UI
+            # offers Re-analyze.
+            if cv.analysis_status != 'complete':
+                cv.analysis_status = 'failed'
+                cv.analysis_error = str(exc)[:500]
+            db.session.commit()
+            return False
+
+
+def drain_pending(app, workers=None):
+    """Claim and analyze pending CVs until none are left. Runs in the
+    caller's app context; extraction fans out to `workers` threads."""
+    workers = workers or config.analysis_workers()
+    sweep_stale_claims()
+    with ThreadPoolExecutor(max_workers=workers,
+                            thread_name_prefix='talent-analyze') as pool:
+        while True:
+            cvs = claim_pending(ANALYZE_BATCH_SIZE)
+            if not cvs:
+                break
+            _bump(claimed=len(cvs))
+            ids = [cv.id for cv in cvs]
+            ok = [cv_id for cv_id, done in
+                  zip(ids, pool.map(lambda cv_id: _extract_one(app, cv_id), ids)) if done]
+            _bump(extracted=len(ok), failed=len(ids) - len(ok))
+            if not ok:
+                continue
+            # Extraction is done either way: a matching failure keeps the CVs
+            # 'complete' (the UI can re-run matching).
+            db.session.expire_all()  # the pool's sessions wrote these rows
+            try:
+                extracted = [(db.session.get(TalentCandidate, cv.candidate_id), cv.analysis)
+                             for cv in TalentCv.query.filter(TalentCv.id.in_(ok)).all()]
+                companies = TalentCompany.query.filter_by(active=True).all()
+                _bump(matched=len(run_batch_matching(extracted, companies)))
+            except Exception as exc:
+                logger.warning('talent matching failed for %d CVs: %s', len(ok), exc)
+                db.session.rollback()
+
 
 def analyze_pending_async(app):
     """Analyze every pending CV in a background thread (same app-context
@@ -136,27 +271,16 @@ def analyze_pending_async(app):
         with app.app_context():
             if not _analyze_lock.acquire(blocking=False):
                 return
+            workers = config.analysis_workers()
+            with _progress_lock:
+                _progress.update(running=True, workers=workers, claimed=0, extracted=0,
+                                 failed=0, matched=0, started_at=time.time(),
+                                 finished_at=None)
             try:
-                while True:
-                    cv = TalentCv.query.filter_by(analysis_status='pending',
-                                                  is_active=True) \
-                        .order_by(TalentCv.created_at).first()
-                    if cv is None:
-                        break
-                    cand = db.session.get(TalentCandidate, cv.candidate_id)
-                    try:
-                        analyze_candidate(cand, cv)
-                    except Exception as exc:
-                        logger.warning('talent analyze failed for %s: %s', cv.id, exc)
-                        db.session.rollback()
-                        # Extraction done but matching failed -> keep 'complete';
-                        # otherwise mark failed so the row can't strand as
-                        # pending/running and the UI offers Re-analyze.
-                        if cv.analysis_status != 'complete':
-                            cv.analysis_status = 'failed'
-                            cv.analysis_error = str(exc)[:500]
-                        db.session.commit()
+                drain_pending(app, workers)
             finally:
+                with _progress_lock:
+                    _progress.update(running=False, finished_at=time.time())
                 _analyze_lock.release()
 
     threading.Thread(target=worker, daemon=True).start()
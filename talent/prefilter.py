@@ -0,0 +1,192 @@
+"""Precomputed indexes for the deterministic matching prefilter.
+
+plausible() (matching.py) re-tokenizes a company's roles and skills for every
+candidate it is asked about, and shortlisting runs it over every active
+company. Here each company is tokenized ONCE into CompanyFeatures (role token
+sets, seniority set, min years, skill sets), and a CompanyIndex keeps inverted
+maps token -> companies:
+
+- roles: the hard role-overlap test only has to look at companies sharing a
+  role token with the candidate, plus the "open" ones (no target roles, or a
+  target made only of generic words) that accept anyone;
+- skills: a candidate's skill tokens walk the required/preferred maps to
+  score the survivors, instead of intersecting every company's sets.
+
+The verdicts and scores are exactly plausible()'s. Indexes are cached per
+process and rebuilt when the set of companies or any updated_at changes,
+i.e. once per company edit. CandidateIndex is the same thing the other way
+round, for the reverse shortlist (new company -> stored analyses).
+
+Indexes outlive the request (and DB session) they were built in, so they hold
+no ORM objects: results are positions in the list the index was built from,
+which the caller maps back onto its own, identically ordered, list.
+"""
+import threading
+
+# Shared by most role names; they don't establish a role overlap.
+GENERIC_ROLE_WORDS = frozenset({'engineer', 'developer', 'senior', 'junior', 'lead', 'staff'})
+
+
+def _tokens(*values):
+    """Lowercased word set from strings/lists, for fuzzy overlap tests."""
+    out = set()
+    for v in values:
+        items = v if isinstance(v, (list, tuple)) else [v]
+        for item in items:
+            for w in str(item or '').lower().replace('/', ' ').split():
+                w = w.strip('.,()')
+                if len(w) > 1:
+                    out.add(w)
+    return out
+
+
+class CompanyFeatures:
+    """One company's prefilter inputs, tokenized once."""
+
+    def __init__(self, company):
+        targets = [_tokens(role) - GENERIC_ROLE_WORDS for role in company.target_roles or []]
+        # Any target role with only generic words (or none at all) accepts everyone
+        self.open_roles = not targets or not all(targets)
+        self.role_tokens = set().union(*targets) if targets else set()
+        self.seniority = {s.upper() for s in company.target_seniority or []}
+        self.min_years = company.min_years
+        self.required = _tokens(company.required_skills)
+        self.preferred = _tokens(company.preferred_skills)
+
+
+class CandidateFeatures:
+    """One stored analysis' prefilter inputs, tokenized once."""
+
+    def __init__(self, analysis):
+        self.role_tokens = (_tokens(analysis.get('roles'), analysis.get('current_title'))
+                            - GENERIC_ROLE_WORDS)
+        self.skills = _tokens(analysis.get('skills'))
+        self.years = analysis.get('years_experience')
+        self.seniority = analysis.get('seniority')
+
+
+def _passes(company, candidate):
+    """plausible()'s hard constraints other than role overlap."""
+    years = candidate.years
+    if company.min_years and years is not None and years < company.min_years - 1:
+        return False
+    sen = candidate.seniority
+    return not (company.seniority and sen and sen.upper() not in company.seniority)
+
+
+def _years_bonus(company, candidate):
+    years = candidate.years
+    return 1 if company.min_years and years is not None and years >= company.min_years else 0
+
+
+def _post(index, tokens, i):
+    for t in tokens:
+        index.setdefault(t, []).append(i)
+
+
+class CompanyIndex:
+    """Candidate -> companies prefilter over a fixed list of companies."""
+
+    def __init__(self, companies):
+        self.features = [CompanyFeatures(c) for c in companies]
+        self.open = [i for i, f in enumerate(self.features) if f.open_roles]
+        self.by_role = {}
+        self.by_required = {}
+        self.by_preferred = {}
+        for i, f in enumerate(self.features):
+            _post(self.by_role, f.role_tokens, i)
+            _post(self.by_required, f.required, i)
+            _post(self.by_preferred, f.preferred, i)
+
+    def scored(self, analysis):
+        """[(score, position)] for every plausible company, in index order."""
+        if not analysis:
+            return []
+        cand = CandidateFeatures(analysis)
+        hits = set(self.open)
+        for t in cand.role_tokens:
+            hits.update(self.by_role.get(t, ()))
+        scores = {i: 1 + _years_bonus(self.features[i], cand)
+                  for i in hits if _passes(self.features[i], cand)}
+        for t in cand.skills:
+            for i in self.by_required.get(t, ()):
+                if i in scores:
+                    scores[i] += 2
+            for i in self.by_preferred.get(t, ()):
+                if i in scores:
+                    scores[i] += 1
+        return [(scores[i], i) for i in sorted(scores)]
+
+    def shortlist(self, analysis, cap):
+        """Positions of the plausible companies, best-first (ties keep index
+        order), capped."""
+        scored = self.scored(analysis)
+        scored.sort(key=lambda t: -t[0])
+        return [i for _, i in scored[:cap]]
+
+
+class CandidateIndex:
+    """Company -> candidates prefilter over a list of stored analyses."""
+
+    def __init__(self, analyses):
+        self.features = [CandidateFeatures(analysis) for analysis in analyses]
+        self.by_role = {}
+        self.by_skill = {}
+        for i, f in enumerate(self.features):
+            _post(self.by_role, f.role_tokens, i)
+            _post(self.by_skill, f.skills, i)
+
+    def scored(self, company):
+        """[(score, position)] for every candidate plausible for `company`,
+        best-first (ties keep index order)."""
+        comp = CompanyFeatures(company)
+        if comp.open_roles:
+            hits = range(len(self.features))
+        else:
+            hits = set()
+            for t in comp.role_tokens:
+                hits.update(self.by_role.get(t, ()))
+        scores = {i: 1 + _years_bonus(comp, self.features[i])
+                  for i in hits if _passes(comp, self.features[i])}
+        for t in comp.required:
+            for i in self.by_skill.get(t, ()):
+                if i in scores:
+                    scores[i] += 2
+        for t in comp.preferred:
+            for i in self.by_skill.get(t, ()):
+                if i in scores:
+                    scores[i] += 1
+        ranked = sorted(scores, key=lambda i: (-scores[i], i))
+        return [(scores[i], i) for i in ranked]
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _cached(kind, signature, build):
+    """The last index built for `kind`, rebuilt when `signature` changes."""
+    with _cache_lock:
+        hit = _cache.get(kind)
+        if hit is not None and hit[0] == signature:
+            return hit[1]
+    index = build()
+    with _cache_lock:
+        _cache[kind] = (signature, index)
+    return index
+
+
+def company_index(companies):
+    """CompanyIndex over `companies` (a list), reused until one is added,
+    removed, reordered or edited (updated_at moves)."""
+    if any(c.id is None for c in companies):  # unsaved: nothing to key on
+        return CompanyIndex(companies)
+    signature = tuple((c.id, c.updated_at) for c in companies)
+    return _cached('companies', signature, lambda: CompanyIndex(companies))
+
+
+def candidate_index(analyses, versions):
+    """CandidateIndex over `analyses` (a list); `versions` identifies them,
+    one entry each (e.g. (cv id, analyzed_at)), so a re-analysis or a new CV
+    rebuilds it."""
+    return _cached('candidates', tuple(versions), lambda: CandidateIndex(analyses))
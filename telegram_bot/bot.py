@@ -117,7 +117,7 @@ if bot:
         if not _flask_app: return
         
         with _flask_app.app_context():
-            from database.models import db, HappyHourPlace
+            from database.models import db, CacheVersion, HappyHourPlace
             place = HappyHourPlace.query.get(place_id)
             if not place:
                 bot.reply_to(message, f"❌ No place found with ID {place_id}.")
@@ -125,6 +125,7 @@ if bot:
                 
             name = place.name
             db.session.delete(place)
+            CacheVersion.bump('places')  # the map cache rebuilds on every worker
             db.session.commit()
             bot.reply_to(message, f"✅ Successfully deleted '{name}' from the database.")
 
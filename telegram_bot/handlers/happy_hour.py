@@ -1,6 +1,6 @@
 import json
 from telegram_bot.handlers.base import BaseApprovalHandler
-from database.models import db, HappyHourPlace
+from database.models import db, CacheVersion, HappyHourPlace
 
 class HappyHourHandler(BaseApprovalHandler):
     """
@@ -44,6 +44,7 @@ class HappyHourHandler(BaseApprovalHandler):
                 if data.get('reservation_link'): place.reservation_link = data.get('reservation_link')
                 if 'kosher' in data: place.kosher = bool(data.get('kosher'))
 
+                CacheVersion.bump('places')  # the map cache rebuilds on every worker
                 db.session.commit()
                 print(f"🔄 [SUCCESS] Updated Happy Hour place: {place.name}")
                 return True
@@ -77,6 +78,7 @@ class HappyHourHandler(BaseApprovalHandler):
                     saturday=False,
                 )
                 db.session.add(place)
+                CacheVersion.bump('places')  # the map cache rebuilds on every worker
                 db.session.commit()
                 print(f"🍷 [SUCCESS] Saved Happy Hour place: {place.name}")
                 return True
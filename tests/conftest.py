@@ -1,6 +1,10 @@
 import pytest
+import requests.adapters
 from flask import Flask
 
+# The real transport, saved before no_real_http patches it per test
+_REAL_SEND = requests.adapters.HTTPAdapter.send
+
 
 @pytest.fixture()
 def app_ctx():
@@ -17,6 +21,21 @@ def app_ctx():
         db.session.remove()
 
 
+@pytest.fixture()
+def file_db(tmp_path):
+    """Like app_ctx, but on a file: in-memory SQLite is ONE connection shared
+    by every thread, which a worker pool's concurrent sessions would trample."""
+    from database.models import db
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'app.db'}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
 @pytest.fixture(autouse=True)
 def no_real_http(monkeypatch):
     """Every test runs with real HTTP disabled — any attempted network call
@@ -32,3 +51,14 @@ def no_real_http(monkeypatch):
 
     monkeypatch.setattr(requests.adapters.HTTPAdapter, 'send', _blocked)
     yield attempted
+
+
+@pytest.fixture()
+def localhost_http(monkeypatch):
+    """Re-allow HTTP to 127.0.0.1 only, for tests that run a stub server
+    (Google Sheet export, Graph API) on a local port."""
+    def local_only(self, request, *a, **kw):
+        assert request.url.startswith('http://127.0.0.1:'), request.url
+        return _REAL_SEND(self, request, *a, **kw)
+
+    monkeypatch.setattr(requests.adapters.HTTPAdapter, 'send', local_only)
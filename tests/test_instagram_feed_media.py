@@ -0,0 +1,122 @@
+"""MediaCache against a local stub CDN: download once, resized variants,
+expired-URL refresh, LRU trimming."""
+import io
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from instagram_feed.media import MediaCache, pick_width
+
+PIL = pytest.importorskip('PIL.Image')
+
+
+def jpeg(width=1080, height=1350):
+    out = io.BytesIO()
+    PIL.new('RGB', (width, height), (200, 40, 40)).save(out, 'JPEG')
+    return out.getvalue()
+
+
+@pytest.fixture()
+def cdn(localhost_http):
+    state = {'hits': [], 'expired': set(), 'body': jpeg()}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state['hits'].append(self.path)
+            if self.path in state['expired']:
+                self.send_response(403)
+                self.end_headers()
+                return
+            body = state['body']
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05},
+                     daemon=True).start()
+    state['base'] = f'http://127.0.0.1:{server.server_address[1]}'
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def post(cdn, pid='111', **extra):
+    return dict({'id': pid, 'media_type': 'IMAGE', 'media_url': f"{cdn['base']}/{pid}.jpg"},
+                **extra)
+
+
+def test_pick_width():
+    assert pick_width(None) == 640 and pick_width('abc') == 640
+    assert pick_width(200) == 320 and pick_width('321') == 640 and pick_width(5000) == 1080
+
+
+def test_variants_are_resized_and_share_one_download(cdn, tmp_path):
+    cache = MediaCache(str(tmp_path))
+    path, mimetype = cache.get(post(cdn), 320, 'webp')
+    assert mimetype == 'image/webp'
+    with PIL.open(path) as img:
+        assert img.format == 'WEBP' and img.size == (320, 400)
+    path, mimetype = cache.get(post(cdn), 640, 'jpeg')
+    with PIL.open(path) as img:
+        assert img.format == 'JPEG' and img.width == 640
+    assert os.path.getsize(path) < len(cdn['body'])
+    cache.get(post(cdn), 320, 'webp')
+    assert cdn['hits'] == ['/111.jpg']
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 2
+
+
+def test_small_images_are_not_upscaled_and_videos_use_the_thumbnail(cdn, tmp_path):
+    cdn['body'] = jpeg(200, 200)
+    cache = MediaCache(str(tmp_path))
+    video = post(cdn, '222', media_type='VIDEO', media_url=f"{cdn['base']}/222.mp4",
+                 thumbnail_url=f"{cdn['base']}/222-thumb.jpg")
+    path, _ = cache.get(video, 640, 'jpeg')
+    with PIL.open(path) as img:
+        assert img.size == (200, 200)
+    assert cdn['hits'] == ['/222-thumb.jpg']
+
+
+def test_expired_cdn_url_is_refreshed_through_the_graph_api(cdn, tmp_path):
+    cdn['expired'].add('/111.jpg')
+    refreshed = []
+
+    def refresh(media_id):
+        refreshed.append(media_id)
+        return {'id': media_id, 'media_type': 'IMAGE', 'media_url': f"{cdn['base']}/111-new.jpg"}
+
+    cache = MediaCache(str(tmp_path), refresh_url=refresh)
+    cache.get(post(cdn), 320, 'jpeg')
+    assert refreshed == ['111'] and cdn['hits'] == ['/111.jpg', '/111-new.jpg']
+    assert cache.stats['refreshed_urls'] == 1
+
+
+def test_least_recently_used_files_are_evicted_past_the_budget(cdn, tmp_path):
+    cache = MediaCache(str(tmp_path), max_bytes=10 ** 9)
+    for pid in ('1', '2', '3'):
+        cache.get(post(cdn, pid), 320, 'jpeg')
+    old = os.path.getmtime(tmp_path / '2_320.jpeg') - 100
+    for name in ('1.src', '1_320.jpeg'):
+        os.utime(tmp_path / name, (old, old))  # post 1 is the least recently used
+
+    cache.max_bytes = cache.total_bytes - 1
+    cache.get(post(cdn, '3'), 640, 'jpeg')  # a new variant triggers trimming
+    names = set(os.listdir(tmp_path))
+    assert '1.src' not in names  # oldest first
+    assert {'2.src', '3.src', '3_640.jpeg'} <= names
+    assert cache.total_bytes <= cache.max_bytes * 0.9 and cache.stats['evicted'] >= 1
+
+    restarted = MediaCache(str(tmp_path))
+    assert restarted.total_bytes == cache.total_bytes
+
+
+def test_unsafe_ids_are_rejected(cdn, tmp_path):
+    with pytest.raises(ValueError):
+        MediaCache(str(tmp_path)).get(post(cdn, '../x'), 320, 'jpeg')
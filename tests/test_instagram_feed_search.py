@@ -0,0 +1,55 @@
+"""Caption index: normalization, fields, prefix matching and ranking."""
+from instagram_feed.search import CaptionIndex, normalize, tokenize
+
+
+def post(pid, caption, day=1):
+    return {'id': pid, 'caption': caption, 'timestamp': f'2026-03-{day:02d}T12:00:00+0000'}
+
+
+def ids(hits):
+    return [p['id'] for p in hits]
+
+
+def test_normalize_drops_niqqud_and_final_letters():
+    assert normalize('שֻׁלְחָן') == normalize('שלחן') == 'שלחנ'
+    assert normalize('Crème Brûlée') == 'creme brulee'
+
+
+def test_tokenize_fields_and_in_word_quotes():
+    assert tokenize('#Sushi @cafe.xoho ג׳חנון') == [
+        ('#', 'sushi'), ('', 'sushi'), ('@', 'cafe.xoho'), ('', 'cafe'), ('', 'xoho'),
+        ('', 'גחנונ')]
+    assert tokenize('#sushi', query=True) == [('#', 'sushi')]
+
+
+def test_hebrew_matches_across_niqqud_final_letters_and_prefix_letters():
+    index = CaptionIndex([post('a', 'הכי טובים בתל אביב: שֻׁלְחָן שף'),
+                          post('b', 'Burgers in Haifa')])
+    assert ids(index.search('שולחן')) == []  # different spelling (plene) is not the same word
+    assert ids(index.search('שלחן')) == ['a']
+    assert ids(index.search('תל אביב')) == ['a']   # "בתל" indexes "תל" too
+    assert ids(index.search('טוב')) == ['a']       # prefix of "טובים" (final mem)
+    assert ids(index.search('burg')) == ['b']
+
+
+def test_all_terms_must_match_and_hashtag_queries_only_hit_tags():
+    index = CaptionIndex([post('tag', 'Dinner #sushi'), post('word', 'sushi dinner'),
+                          post('other', 'Pizza night')])
+    assert sorted(ids(index.search('sushi dinner'))) == ['tag', 'word']
+    assert ids(index.search('#sushi')) == ['tag']
+    assert ids(index.search('sushi pizza')) == []
+
+
+def test_ranking_prefers_exact_and_tagged_then_recent():
+    index = CaptionIndex([
+        post('partial-new', 'sushiya opening', day=20),
+        post('exact-old', 'best sushi', day=1),
+        post('tagged', 'friday #sushi', day=1),
+        post('exact-new', 'sushi again', day=28),
+    ])
+    assert ids(index.search('sushi')) == ['tagged', 'exact-new', 'exact-old', 'partial-new']
+
+
+def test_queries_without_word_characters_fall_back_to_substring():
+    index = CaptionIndex([post('a', 'Sushi 🍣'), post('b', 'Pizza 🍕')])
+    assert ids(index.search('🍣')) == ['a']
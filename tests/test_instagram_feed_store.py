@@ -0,0 +1,79 @@
+"""PostStore: parse-once, mtime-validated, compact posts with slice + search."""
+import json
+import os
+
+from instagram_feed.store import PostStore
+
+POSTS = [{'id': str(i), 'caption': f'Post {i} #Sushi' if i % 2 else f'Post {i} burger',
+          'media_url': f'https://cdn/{i}.jpg', 'permalink': f'https://ig/p/{i}',
+          'media_type': 'IMAGE', 'timestamp': f'2026-01-{i + 1:02d}T12:00:00+0000',
+          'like_count': i, 'media_product_type': 'FEED', 'is_shared_to_feed': True,
+          'username': 'ofoodiez'} for i in range(30)]
+
+
+def write(path, posts):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(posts, f)
+
+
+def test_page_and_search_keep_only_feed_fields(tmp_path):
+    path = tmp_path / 'ig.json'
+    write(path, POSTS)
+    store = PostStore(str(path))
+    page, has_more = store.page(0, 12)
+    assert [p['id'] for p in page] == [str(i) for i in range(12)] and has_more
+    assert 'media_product_type' not in page[0] and 'username' not in page[0]
+    assert page[0]['like_count'] == 0
+    assert store.page(24, 12) == (store.posts()[24:], False)
+
+    hits, has_more = store.search('  SUSHI ', 0, 100)
+    assert sorted(int(p['id']) for p in hits) == list(range(1, 30, 2)) and not has_more
+    assert store.search('', 0, 5) == store.page(0, 5)
+
+
+def test_parses_once_and_reloads_when_the_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / 'ig.json'
+    write(path, POSTS[:3])
+    store = PostStore(str(path))
+    loads = []
+    real_load = json.load
+    monkeypatch.setattr(json, 'load', lambda f: loads.append(1) or real_load(f))
+    for _ in range(5):
+        assert len(store) == 3
+    assert len(loads) == 1
+
+    write(path, POSTS[:4])  # another worker refreshed the file
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert len(store) == 4 and len(loads) == 2
+
+
+def test_replace_persists_for_other_workers_and_sets_age(tmp_path):
+    path = tmp_path / 'ig.json'
+    store = PostStore(str(path))
+    assert store.age() == float('inf') and store.posts() == []
+    store.replace(POSTS)
+    assert store.age() < 5
+    other = PostStore(str(path))
+    assert other.posts() == store.posts()
+    assert set(other.posts()[0]) <= {'id', 'caption', 'media_url', 'permalink', 'media_type',
+                                     'timestamp', 'like_count'}
+
+
+def test_memory_only_posts_win_over_the_file(tmp_path):
+    path = tmp_path / 'ig.json'
+    write(path, POSTS)
+    store = PostStore(str(path))
+    store.replace(POSTS[:2], persist=False)
+    assert len(store) == 2 and store.age() < 5
+
+
+def test_unreadable_file_keeps_the_previous_posts(tmp_path):
+    path = tmp_path / 'ig.json'
+    write(path, POSTS[:3])
+    store = PostStore(str(path))
+    assert len(store) == 3
+    path.write_text('{not json', encoding='utf-8')
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert len(store) == 3
@@ -0,0 +1,172 @@
+"""InstagramSync against a local stub of the Graph API: incremental paging,
+parallel engagement refresh, full re-fetch, and the store it writes."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from instagram_feed.store import PostStore
+from instagram_feed.sync import InstagramSync
+
+
+def media(i, **extra):
+    return dict({'id': f'm{i}', 'caption': f'post {i}', 'media_url': f'https://cdn/{i}.jpg',
+                 'permalink': f'https://ig/p/{i}', 'media_type': 'IMAGE',
+                 'timestamp': f'2026-02-{i:02d}T10:00:00+0000', 'like_count': i,
+                 'comments_count': 0}, **extra)
+
+
+class StubGraph:
+    def __init__(self):
+        self.media = [media(i) for i in range(1, 13)]  # oldest first; served newest first
+        self.page_size = 5
+        self.calls = []  # ('media', after) / ('ids', n)
+
+
+@pytest.fixture()
+def graph(localhost_http):
+    stub = StubGraph()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            assert q.get('access_token') == 'tok'
+            if url.path.endswith('/media'):
+                after = int(q.get('after', 0))
+                stub.calls.append(('media', after))
+                newest_first = stub.media[::-1]
+                body = {'data': newest_first[after:after + stub.page_size]}
+                if after + stub.page_size < len(newest_first):
+                    body['paging'] = {'next': f'{base}/ig1/media?access_token=tok'
+                                              f'&after={after + stub.page_size}'}
+            elif 'ids' not in q:  # one media object (fetch_media)
+                stub.calls.append(('one', url.path.rsplit('/', 1)[-1]))
+                body = {m['id']: m for m in stub.media}[url.path.rsplit('/', 1)[-1]]
+            else:
+                ids = q['ids'].split(',')
+                stub.calls.append(('ids', len(ids)))
+                by_id = {m['id']: m for m in stub.media}
+                body = {i: {'id': i, 'like_count': by_id[i]['like_count'],
+                            'comments_count': by_id[i]['comments_count']} for i in ids}
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    base = f'http://127.0.0.1:{server.server_address[1]}/v25.0'
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05},
+                     daemon=True).start()
+    stub.base = base
+    yield stub
+    server.shutdown()
+    server.server_close()
+
+
+def make_sync(graph, tmp_path, **kw):
+    store = PostStore(str(tmp_path / 'ig.json'))
+    return store, InstagramSync(store, graph.base, lambda: ('ig1', 'tok'), **kw)
+
+
+def test_first_round_fetches_everything_newest_first(graph, tmp_path):
+    graph.media.append(media(13, media_product_type='REELS', is_shared_to_feed=False))
+    store, sync = make_sync(graph, tmp_path)
+    assert sync.sync() == {'new': 12, 'refreshed': 0, 'total': 12, 'full': True}
+    assert [p['id'] for p in store.posts()][:2] == ['m12', 'm11']  # hidden reel skipped
+    assert [c for c in graph.calls if c[0] == 'media'] == [('media', 0), ('media', 5),
+                                                           ('media', 10)]
+    assert PostStore(str(tmp_path / 'ig.json')).posts() == store.posts()
+
+
+def test_incremental_round_stops_at_known_posts_and_refreshes_counts(graph, tmp_path):
+    store, sync = make_sync(graph, tmp_path, refresh_recent=7)
+    sync.sync()
+    graph.calls.clear()
+    graph.media += [media(20), media(21)]
+    graph.media[0]['like_count'] = 999  # m1 — too old to be refreshed
+    graph.media[10]['like_count'] = 500  # m11
+
+    result = sync.sync()
+    assert result == {'new': 2, 'refreshed': 7, 'total': 14, 'full': False}
+    assert graph.calls[0] == ('media', 0) and ('media', 5) not in graph.calls  # one page
+    assert ('ids', 7) in graph.calls
+    likes = {p['id']: p['like_count'] for p in store.posts()}
+    assert [p['id'] for p in store.posts()][:3] == ['m21', 'm20', 'm12']
+    assert likes['m11'] == 500 and likes['m1'] == 1
+
+
+def test_engagement_batches_are_split_at_50_ids(graph, tmp_path):
+    graph.media = [media(i % 28 + 1) | {'id': f'm{i}'} for i in range(1, 121)]
+    graph.page_size = 100
+    store, sync = make_sync(graph, tmp_path, refresh_recent=120)
+    sync.sync()
+    graph.calls.clear()
+    sync.sync(full=False)
+    assert sorted(n for kind, n in graph.calls if kind == 'ids') == [20, 50, 50]
+
+
+def test_full_round_drops_posts_deleted_on_instagram(graph, tmp_path):
+    store, sync = make_sync(graph, tmp_path)
+    sync.sync()
+    del graph.media[3]  # m4
+    sync.sync(full=True)
+    assert 'm4' not in {p['id'] for p in store.posts()} and len(store) == 11
+
+
+def test_no_account_skips_the_round(graph, tmp_path):
+    store = PostStore(str(tmp_path / 'ig.json'))
+    sync = InstagramSync(store, graph.base, lambda: None)
+    assert sync.sync() is None and graph.calls == [] and len(store) == 0
+
+
+def test_rounds_are_single_flight_across_workers(graph, tmp_path):
+    from single_flight import SingleFlight
+    lock = str(tmp_path / 'ig.lock')
+    store, sync = make_sync(graph, tmp_path, flight=SingleFlight('ig', lock))
+    _, other_worker = make_sync(graph, tmp_path, flight=SingleFlight('ig', lock))
+
+    with other_worker.flight.attempt():
+        assert sync.sync() is None and sync.last_skip == 'busy'
+    assert graph.calls == []
+
+    assert sync.sync(if_older_than=300)['full']
+    # The other worker's turn comes right after: the file is fresh, so it skips
+    graph.calls.clear()
+    assert other_worker.sync(if_older_than=300) is None
+    assert other_worker.last_skip == 'fresh' and graph.calls == []
+    assert other_worker.stats()['skipped_fresh'] == 1
+    assert sync.stats()['busy_process'] == 1 and sync.stats()['runs'] == 1
+
+
+def test_last_full_round_is_shared_by_workers(graph, tmp_path):
+    store, sync = make_sync(graph, tmp_path)
+    assert sync.sync()['full']
+    _, new_worker = make_sync(graph, tmp_path)  # or this worker after a restart
+    assert not new_worker.sync()['full']
+
+    new_worker.full_interval = 0
+    assert new_worker.sync()['full']
+
+
+def test_fetch_media_reuses_the_account(graph, tmp_path):
+    calls = []
+
+    def account():
+        calls.append(1)
+        return 'ig1', 'tok'
+
+    store = PostStore(str(tmp_path / 'ig.json'))
+    sync = InstagramSync(store, graph.base, account)
+    sync.sync()
+    assert len(calls) == 1
+    for _ in range(3):
+        assert sync.fetch_media('m1')['media_url'] == 'https://cdn/1.jpg'
+    assert len(calls) == 1  # the sync's answer, not a DB read per request
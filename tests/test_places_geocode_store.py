@@ -0,0 +1,57 @@
+"""SQLite geocode store: JSON seed import, normalized keys, negative TTL."""
+import json
+import threading
+
+from places.geocode_store import GeocodeStore
+
+
+def test_seed_json_is_imported_once(tmp_path):
+    seed = tmp_path / 'geocode_cache.json'
+    seed.write_text(json.dumps({'Frishman 39, Tel Aviv, Israel': [32.07, 34.77],
+                                'Nowhere, Israel': None}), encoding='utf-8')
+    store = GeocodeStore(str(tmp_path / 'g.sqlite3'), seed_json=str(seed))
+    assert len(store) == 2
+    assert store['frishman  39, tel aviv, ISRAEL'] == [32.07, 34.77]
+    assert 'Nowhere, Israel' in store and store['Nowhere, Israel'] is None
+    # Unchanged seed: not re-read; newer rows are never overwritten by it.
+    store.update({'Frishman 39, Tel Aviv, Israel': [1.0, 2.0]})
+    assert GeocodeStore(store.path, seed_json=str(seed))['Frishman 39, Tel Aviv, Israel'] == [1.0, 2.0]
+
+
+def test_not_found_expires_after_ttl(tmp_path):
+    store = GeocodeStore(str(tmp_path / 'g.sqlite3'), negative_ttl=-1)
+    store.update({'Nowhere, Israel': None, 'Allenby 5, Israel': [32.0, 34.7]})
+    assert 'Nowhere, Israel' not in store
+    assert store.get('Nowhere, Israel', 'miss') == 'miss'
+    assert store['Allenby 5, Israel'] == [32.0, 34.7]
+
+
+def test_shared_between_threads_and_instances(tmp_path):
+    path = str(tmp_path / 'g.sqlite3')
+    store = GeocodeStore(path)
+
+    def write(i):
+        store.update({f'Street {i}, Israel': [float(i), 0.0]})
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    other = GeocodeStore(path)  # e.g. another gunicorn worker
+    assert len(other) == 8 and other['Street 3, Israel'] == [3.0, 0.0]
+
+
+def test_claims_are_exclusive_until_released_or_stale(tmp_path):
+    path = str(tmp_path / 'g.sqlite3')
+    a, b = GeocodeStore(path), GeocodeStore(path)
+    a.update({'Cached, Israel': [32.0, 34.7]})
+    assert a.claim(['X, Israel', 'Y, Israel', 'Cached, Israel']) == ['X, Israel', 'Y, Israel']
+    assert b.claim(['x,  ISRAEL', 'Z, Israel']) == ['Z, Israel']
+    assert b.claimed(['X, Israel', 'W, Israel']) == ['X, Israel']
+    a.release(['X, Israel'])
+    assert b.claim(['X, Israel']) == ['X, Israel']
+
+    stale = GeocodeStore(path, claim_ttl=-1)  # every claim counts as abandoned
+    assert stale.claimed(['Y, Israel']) == []
+    assert stale.claim(['Y, Israel']) == ['Y, Israel']
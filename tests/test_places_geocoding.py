@@ -0,0 +1,92 @@
+"""Batch geocoder: dedupe (in process and across workers), retries, one
+cache flush per batch."""
+from types import SimpleNamespace
+
+from geopy.exc import GeocoderTimedOut
+
+from places.geocode_store import GeocodeStore
+from places.geocoding import BatchGeocoder, full_address
+
+
+class FakeGeocoder:
+    def __init__(self, flaky=()):
+        self.calls = []
+        self.flaky = set(flaky)
+
+    def __call__(self, query):
+        self.calls.append(query)
+        if query in self.flaky:
+            self.flaky.discard(query)
+            raise GeocoderTimedOut('slow')
+        if query.startswith('Nowhere'):
+            return None
+        return SimpleNamespace(latitude=32.0, longitude=34.7)
+
+
+def _geocoder(fake, cache=None, saves=None):
+    saves = saves if saves is not None else []
+    return BatchGeocoder(fake, {} if cache is None else cache,
+                         lambda c: saves.append(dict(c)), rate=1000, backoff=0)
+
+
+def test_apply_cached_fills_hits_and_dedupes_misses():
+    key = full_address('Dizengoff 1', 'Tel Aviv')
+    geo = _geocoder(FakeGeocoder(), cache={key: [32.1, 34.8]})
+    places = [{'Address': 'Dizengoff 1', 'City': 'Tel Aviv'},
+              {'Address': 'Allenby 5', 'City': 'Tel Aviv'},
+              {'Address': 'Allenby 5', 'City': 'Tel Aviv'},
+              {'Address': 'Has coords', 'Latitude': 1.0, 'Longitude': 2.0},
+              {'Address': ''}]
+    missing = geo.apply_cached(places)
+    assert places[0]['Latitude'] == 32.1 and places[0]['Longitude'] == 34.8
+    assert missing == [full_address('Allenby 5', 'Tel Aviv')]
+
+
+def test_resolve_saves_once_and_retries_transient_errors():
+    fake = FakeGeocoder(flaky={'A, Israel'})
+    saves = []
+    geo = _geocoder(fake, saves=saves)
+    results = geo.resolve(['A, Israel', 'B, Israel', 'Nowhere, Israel', 'A, Israel'])
+    assert results == {'A, Israel': [32.0, 34.7], 'B, Israel': [32.0, 34.7],
+                       'Nowhere, Israel': None}
+    assert fake.calls.count('A, Israel') == 2
+    assert len(saves) == 1 and saves[0] == results
+
+
+def test_exhausted_retries_are_not_cached():
+    fake = FakeGeocoder()
+    fake.flaky = {'A, Israel'}
+    geo = _geocoder(fake)
+    geo.retries = 0
+    assert geo.resolve(['A, Israel']) == {}
+    assert 'A, Israel' not in geo.cache
+
+
+def test_submit_runs_in_background_and_skips_in_flight_keys():
+    done = []
+    geo = _geocoder(FakeGeocoder())
+    thread = geo.submit(['A, Israel'], on_done=done.append)
+    thread.join(5)
+    assert done == [{'A, Israel': [32.0, 34.7]}]
+    geo._in_flight.add('B, Israel')
+    assert geo.submit(['B, Israel']) is None
+
+
+
+def test_workers_sharing_a_store_look_each_address_up_once(tmp_path):
+    path = str(tmp_path / 'g.sqlite3')
+    fake = FakeGeocoder()
+    first = BatchGeocoder(fake, GeocodeStore(path), rate=1000, backoff=0, poll=0.01)
+    second = BatchGeocoder(fake, GeocodeStore(path), rate=1000, backoff=0, poll=0.01)
+    # The first worker's batch is mid-flight: it holds the claim on A
+    first.cache.claim(['A, Israel'])
+    done = []
+    thread = second.submit(['A, Israel', 'B, Israel'], on_done=done.append)
+    thread.join(0.2)
+    assert thread.is_alive() and fake.calls == ['B, Israel']  # waits for A
+
+    first.resolve(['A, Israel'])
+    first.cache.release(['A, Israel'])
+    thread.join(5)
+    assert fake.calls == ['B, Israel', 'A, Israel']
+    assert done == [{'A, Israel': [32.0, 34.7], 'B, Israel': [32.0, 34.7]}]
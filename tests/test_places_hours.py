@@ -0,0 +1,62 @@
+"""Happy-hour text parsing and the open-at bitmap index."""
+from datetime import datetime, timezone
+
+import pytest
+
+from places.hours import AvailabilityIndex, parse_hours, parse_open_at
+
+H = 60
+
+
+@pytest.mark.parametrize('text, windows', [
+    ('18:00 - 20:00', [(18 * H, 20 * H)]),
+    ('After 20:00', [(20 * H, 26 * H)]),
+    ('מ-20:00', [(20 * H, 26 * H)]),
+    ('17-19, 22:00-close', [(17 * H, 19 * H), (22 * H, 26 * H)]),
+    ('22:00 – 01:30', [(22 * H, 25 * H + 30)]),
+    ('5pm to 7:30pm', [(17 * H, 19 * H + 30)]),
+    ('20:00 עד 22:00', [(20 * H, 22 * H)]),
+    ('Until 19:00', [(12 * H, 19 * H)]),
+    ('20:00-24:00', [(20 * H, 24 * H)]),
+    ('24:30 - 02:00', []),  # not a time, not 00:30
+    ('After 24:30', []),
+    ('All night long', []),
+    ('', []),
+])
+def test_parse_hours(text, windows):
+    assert parse_hours(text) == windows
+
+
+PLACES = [
+    {'Name': 'early', 'OpeningHours': '17:00-19:00', 'Sunday': True, 'Friday': True},
+    {'Name': 'late', 'OpeningHours': 'After 22:00', 'Thursday': True},
+    {'Name': 'unknown', 'OpeningHours': 'ask the bartender', 'Sunday': 'Yes'},
+    {'Name': 'no days', 'OpeningHours': '17:00-19:00'},
+]
+
+
+def _names(index, iso):
+    return [p['Name'] for p in index.open_at(parse_open_at(iso))]
+
+
+def test_open_at_respects_days_and_windows():
+    index = AvailabilityIndex(PLACES)
+    # 2026-10-18 is a Sunday
+    assert _names(index, '2026-10-18T18:00') == ['early', 'unknown']
+    assert _names(index, '2026-10-18T19:00') == ['unknown']
+    assert _names(index, '2026-10-18T16:59') == ['unknown']
+    assert _names(index, '2026-10-17T18:00') == []          # Saturday
+
+
+def test_window_past_midnight_spills_into_next_day():
+    index = AvailabilityIndex(PLACES)
+    assert _names(index, '2026-10-22T23:00') == ['late']   # Thursday
+    assert _names(index, '2026-10-23T01:30') == ['late']   # Friday small hours
+    assert _names(index, '2026-10-23T02:00') == []
+
+
+def test_open_at_converts_to_israel_time():
+    when = parse_open_at(datetime(2026, 10, 18, 15, 0, tzinfo=timezone.utc).isoformat())
+    assert (when.hour, when.minute) == (18, 0)
+    with pytest.raises(ValueError):
+        parse_open_at('tonight')
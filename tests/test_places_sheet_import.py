@@ -0,0 +1,64 @@
+"""Sheet import: column-wise normalization and the bulk upsert."""
+import math
+
+import pandas as pd
+
+from places.sheet_import import SheetImport, normalize_sheet, upsert_places
+
+CSV = (
+    "Place Name (English) ,Category,Address,City,OpeningHours,Latitude,Longitude,"
+    "Sunday,Monday,Kosher,Verified,InstagramURL,Instagram Link\n"
+    "Bar One ,Bar,Dizengoff 1,Tel Aviv,After 20:00 ,32.08,34.77,TRUE,FALSE,yes,,old,https://ig/one\n"
+    ",Bar,Nowhere,Tel Aviv,,,,TRUE,TRUE,no,,,\n"
+    "No Category,,Allenby 2,Tel Aviv,,,,,,,,,\n"
+    "Cafe Two,Cafe,Herzl 3,Haifa,17:00-19:00,,,FALSE,TRUE,1,TRUE,,\n"
+)
+
+
+def test_normalize_renames_trims_and_types_columns():
+    imp = SheetImport.from_csv(CSV)
+    assert len(imp) == 2  # rows without Name or Category dropped
+    one, two = imp.records()
+    assert one['Name'] == 'Bar One'
+    assert one['OpeningHours'] == 'After 20:00'
+    assert one['InstagramURL'] == 'https://ig/one'  # "Instagram Link", not the stale column
+    assert one['Sunday'] is True and one['Monday'] is False
+    assert one['Kosher'] is True and two['Kosher'] is True
+    assert one['Verified'] is False and two['Verified'] is True
+    assert one['Latitude'] == 32.08
+    assert two['Latitude'] is None and two['Longitude'] is None
+
+
+def test_needs_geocode_marks_rows_with_address_but_no_coordinates():
+    imp = SheetImport.from_csv(CSV)
+    assert imp.needs_geocode.tolist() == [False, True]
+
+
+def test_normalize_matches_row_wise_values_for_repeated_cells():
+    df = pd.DataFrame({'Place Name (English)': ['A ', 'B', 'C'],
+                       'Category': ['Bar', 'Bar ', None],
+                       'City': [' Haifa', ' Haifa', float('nan')]})
+    out = normalize_sheet(df)
+    assert out['Category'].tolist() == ['Bar', 'Bar']
+    assert out['City'].tolist() == ['Haifa', 'Haifa']
+
+
+def test_upsert_inserts_then_updates_by_name(app_ctx):
+    from database.models import db, CacheVersion, HappyHourPlace
+
+    assert upsert_places(SheetImport.from_csv(CSV)) == (2, 0)
+    cafe = HappyHourPlace.query.filter_by(name='Cafe Two').one()
+    assert cafe.monday is True and cafe.kosher is True and cafe.latitude is None
+
+    # Admin pins the cafe; the next sheet pass has it renamed in case only
+    cafe.latitude, cafe.longitude = 32.8, 35.0
+    db.session.commit()
+    again = CSV.replace('Cafe Two', 'CAFE TWO').replace('17:00-19:00', '18:00-20:00')
+    assert upsert_places(SheetImport.from_csv(again)) == (0, 2)
+
+    assert HappyHourPlace.query.count() == 2
+    cafe = db.session.get(HappyHourPlace, cafe.id)
+    assert cafe.name == 'CAFE TWO'
+    assert cafe.opening_hours == '18:00-20:00'
+    assert math.isclose(cafe.latitude, 32.8)  # a blank sheet cell keeps it
+    assert CacheVersion.current('places') == 2
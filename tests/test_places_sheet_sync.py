@@ -0,0 +1,149 @@
+"""Sheet mirror against a local stub of the CSV export: conditional GETs,
+content hashing, per-consumer row diffs and the offline fallback."""
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from places.sheet_sync import SheetSync
+
+HEADER = "Place Name (English),Category,Address,City,OpeningHours,Latitude,Longitude\n"
+ROWS = {
+    'one': "Bar One,Bar,Dizengoff 1,Tel Aviv,17:00-19:00,32.08,34.77\n",
+    'two': "Cafe Two,Cafe,Herzl 3,Haifa,After 20:00,,\n",
+}
+
+
+class StubSheet:
+    """The CSV export: serves `body` with an ETag (unless etag=False) and
+    answers If-None-Match with 304, like a well-behaved origin."""
+
+    def __init__(self):
+        self.body = HEADER + ''.join(ROWS.values())
+        self.etag = True
+        self.requests = []  # (status, If-None-Match)
+        self.down = False
+
+
+@pytest.fixture()
+def stub(localhost_http):
+    sheet = StubSheet()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if sheet.down:
+                self.send_response(503)
+                self.end_headers()
+                sheet.requests.append((503, None))
+                return
+            body = sheet.body.encode('utf-8')
+            tag = '"%s"' % hashlib.md5(body).hexdigest()
+            sent = self.headers.get('If-None-Match')
+            if sheet.etag and sent == tag:
+                self.send_response(304)
+                self.end_headers()
+                sheet.requests.append((304, sent))
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/csv')
+            self.send_header('Content-Length', str(len(body)))
+            if sheet.etag:
+                self.send_header('ETag', tag)
+            self.end_headers()
+            self.wfile.write(body)
+            sheet.requests.append((200, sent))
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05},
+                     daemon=True).start()
+
+    sheet.url = f'http://127.0.0.1:{server.server_address[1]}/export?format=csv'
+    yield sheet
+    server.shutdown()
+    server.server_close()
+
+
+def names(imported):
+    return imported.frame['Name'].tolist()
+
+
+def test_first_fetch_mirrors_and_reports_every_row(stub, tmp_path):
+    sync = SheetSync(stub.url, str(tmp_path))
+    changes = sync.fetch('map')
+    assert changes.modified and not changes.offline
+    assert names(changes.changed) == ['Bar One', 'Cafe Two']
+    assert (tmp_path / 'sheet.csv').read_text(encoding='utf-8') == stub.body
+    changes.commit()
+
+
+def test_unchanged_sheet_is_a_304_and_an_empty_diff(stub, tmp_path):
+    sync = SheetSync(stub.url, str(tmp_path))
+    sync.fetch('map').commit()
+    changes = sync.fetch('map')
+    assert stub.requests[-1][0] == 304
+    assert not changes.modified and not changes
+    assert len(changes.imported) == 2  # the mirror still serves the full sheet
+
+
+def test_only_edited_and_new_rows_are_reported(stub, tmp_path):
+    sync = SheetSync(stub.url, str(tmp_path))
+    sync.fetch('map').commit()
+    stub.body = (HEADER + ROWS['one'].replace('17:00-19:00', '18:00-20:00')
+                 + "New Place,Bar,Allenby 5,Tel Aviv,,,\n")
+    changes = sync.fetch('map')
+    assert changes.modified and stub.requests[-1][0] == 200
+    assert names(changes.changed) == ['Bar One', 'New Place']
+    assert changes.removed == ['cafe two']
+
+
+def test_same_body_without_validators_counts_as_unchanged(stub, tmp_path):
+    stub.etag = False  # Google's export often sends no ETag/Last-Modified
+    sync = SheetSync(stub.url, str(tmp_path))
+    sync.fetch('map').commit()
+    changes = sync.fetch('map')
+    assert stub.requests[-1] == (200, None)
+    assert not changes.modified and not changes
+
+
+def test_consumers_keep_their_own_baselines(stub, tmp_path):
+    sync = SheetSync(stub.url, str(tmp_path))
+    sync.fetch('map').commit()
+    assert len(sync.fetch('db-import').changed) == 2
+    # Not committed (say the import failed): the rows come back next time
+    assert len(sync.fetch('db-import').changed) == 2
+
+
+def test_state_survives_a_restart_and_fetch_failures_use_the_mirror(stub, tmp_path):
+    SheetSync(stub.url, str(tmp_path)).fetch('map').commit()
+
+    restarted = SheetSync(stub.url, str(tmp_path))
+    assert not restarted.fetch('map')
+    assert stub.requests[-1][0] == 304  # validators came from the sidecar
+
+    stub.down = True
+    changes = restarted.fetch('map')
+    assert changes.offline and names(changes.imported) == ['Bar One', 'Cafe Two']
+
+
+def test_fetch_failure_without_a_mirror_raises(stub, tmp_path):
+    stub.down = True
+    with pytest.raises(Exception):
+        SheetSync(stub.url, str(tmp_path)).fetch('map')
+
+
+def test_workers_sharing_the_sidecar_keep_each_others_state(stub, tmp_path):
+    # Two gunicorn workers: each holds its own SheetSync over the same files
+    a = SheetSync(stub.url, str(tmp_path))
+    b = SheetSync(stub.url, str(tmp_path))
+    a.fetch('map').commit()
+    b.fetch('db-import').commit()
+    assert stub.requests[-1][0] == 304  # b sent the ETag a stored
+    a.fetch('map').commit()             # a's stale in-memory meta must not win
+
+    restarted = SheetSync(stub.url, str(tmp_path))
+    assert set(restarted.meta['baselines']) == {'map', 'db-import'}
+    assert not restarted.fetch('db-import')
@@ -0,0 +1,55 @@
+"""/api/places pre-rendered snapshot: encodings, ETag revalidation."""
+import gzip
+import json
+
+import pytest
+from flask import Flask, request
+
+from places.snapshot import PlacesSnapshot
+
+PLACES = [{'id': 1, 'Name': 'Bellboy', 'NameHebrew': 'בלבוי', 'Latitude': 32.07,
+           'Longitude': 34.77, 'Kosher': False}]
+
+
+@pytest.fixture()
+def client():
+    app = Flask(__name__)
+    snapshot = PlacesSnapshot(PLACES)
+    app.add_url_rule('/api/places', 'places', lambda: snapshot.respond(request))
+    app.snapshot = snapshot
+    return app.test_client()
+
+
+def test_identity_body_is_the_places_json(client):
+    resp = client.get('/api/places')
+    assert resp.status_code == 200
+    assert 'Content-Encoding' not in resp.headers
+    assert json.loads(resp.data) == PLACES
+    assert 'Accept-Encoding' in resp.headers['Vary']
+
+
+def test_gzip_served_pre_encoded(client):
+    resp = client.get('/api/places', headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(resp.data)) == PLACES
+
+
+def test_brotli_preferred_when_accepted(client):
+    brotli = pytest.importorskip('brotli')
+    resp = client.get('/api/places', headers={'Accept-Encoding': 'gzip, br'})
+    assert resp.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(resp.data)) == PLACES
+
+
+def test_if_none_match_gets_304(client):
+    etag = client.get('/api/places').headers['ETag']
+    resp = client.get('/api/places', headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+    assert resp.data == b''
+    assert resp.headers['ETag'] == etag
+
+
+def test_etag_tracks_content():
+    assert PlacesSnapshot(PLACES).etag == PlacesSnapshot(PLACES).etag
+    changed = [dict(PLACES[0], Name='Bellboy TLV')]
+    assert PlacesSnapshot(changed).etag != PlacesSnapshot(PLACES).etag
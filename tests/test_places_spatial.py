@@ -0,0 +1,58 @@
+"""Grid spatial index: bbox and radius queries match a brute-force scan."""
+import random
+
+import pytest
+
+from places.spatial import SpatialIndex, check_bbox, haversine_km
+
+random.seed(7)
+PLACES = [{'id': i, 'Latitude': 32.0 + random.random() * 0.2,
+           'Longitude': 34.7 + random.random() * 0.2} for i in range(500)]
+PLACES += [{'id': 'no-coords', 'Latitude': None, 'Longitude': ''},
+           {'id': 'text-coords', 'Latitude': '32.05', 'Longitude': '34.75'}]
+
+
+def _brute_radius(lat, lng, km):
+    out = []
+    for p in PLACES:
+        try:
+            d = haversine_km(lat, lng, float(p['Latitude']), float(p['Longitude']))
+        except (TypeError, ValueError):
+            continue
+        if d <= km:
+            out.append(p['id'])
+    return sorted(out, key=str)
+
+
+def test_radius_matches_brute_force_and_is_sorted():
+    index = SpatialIndex(PLACES)
+    assert index.size == 501
+    hits = index.within_radius(32.08, 34.78, 3)
+    assert sorted((p['id'] for _, p in hits), key=str) == _brute_radius(32.08, 34.78, 3)
+    distances = [d for d, _ in hits]
+    assert distances == sorted(distances) and distances[-1] <= 3
+
+
+def test_bbox_includes_only_places_inside():
+    index = SpatialIndex(PLACES)
+    hits = index.within_bbox(32.05, 34.75, 32.1, 34.8)
+    expected = {p['id'] for p in PLACES
+                if isinstance(p['Latitude'], float)
+                and 32.05 <= p['Latitude'] <= 32.1 and 34.75 <= p['Longitude'] <= 34.8}
+    assert {p['id'] for _, p in hits} - {'text-coords'} == expected
+
+
+def test_world_sized_box_returns_everything():
+    index = SpatialIndex(PLACES)
+    assert len(index.within_bbox(-90, -180, 90, 180)) == 501
+
+
+@pytest.mark.parametrize('bbox', [
+    (32.1, 34.7, 32.0, 34.8),   # south above north
+    (32.0, 34.8, 32.1, 34.7),   # west east of east
+    (32.0, 34.7, 32.0, 34.8),   # no height
+])
+def test_check_bbox_rejects_boxes_without_area(bbox):
+    with pytest.raises(ValueError):
+        check_bbox(*bbox)
+    check_bbox(32.0, 34.7, 32.1, 34.8)
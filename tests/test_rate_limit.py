@@ -0,0 +1,24 @@
+"""TokenBucket pacing."""
+import threading
+import time
+
+from rate_limit import TokenBucket
+
+
+def test_token_bucket_paces_calls():
+    bucket = TokenBucket(rate=50, burst=1)
+    t0 = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - t0 >= 0.09
+
+
+def test_threads_share_one_bucket():
+    bucket = TokenBucket(rate=100, burst=1)
+    t0 = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(11)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert time.monotonic() - t0 >= 0.09
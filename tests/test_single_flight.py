@@ -0,0 +1,75 @@
+"""SingleFlight: one holder across threads and processes, counters."""
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight, fcntl
+
+
+def test_concurrent_threads_run_the_job_once():
+    flight = SingleFlight('job')
+    started, release = threading.Event(), threading.Event()
+    outcomes = []
+
+    def holder():
+        with flight.attempt() as acquired:
+            outcomes.append(acquired)
+            started.set()
+            release.wait(5)
+
+    t = threading.Thread(target=holder)
+    t.start()
+    started.wait(5)
+    for _ in range(3):
+        with flight.attempt() as acquired:
+            outcomes.append(acquired)
+    assert flight.stats()['in_flight']
+    release.set()
+    t.join()
+    assert outcomes == [True, False, False, False]
+    stats = flight.stats()
+    assert stats['runs'] == 1 and stats['busy_thread'] == 3 and not stats['in_flight']
+    with flight.attempt() as acquired:
+        assert acquired  # released afterwards
+
+
+def test_failures_are_counted_and_release_the_lock(tmp_path):
+    flight = SingleFlight('job', str(tmp_path / 'job.lock'))
+    with pytest.raises(RuntimeError):
+        with flight.attempt():
+            raise RuntimeError('boom')
+    assert flight.stats()['failures'] == 1
+    with flight.attempt() as acquired:
+        assert acquired
+
+
+@pytest.mark.skipif(fcntl is None, reason='flock needs fcntl')
+def test_another_process_holding_the_lock_file_wins(tmp_path):
+    path = tmp_path / 'job.lock'
+    holder = subprocess.Popen(
+        [sys.executable, '-c',
+         'import fcntl, os, sys, time\n'
+         f'fd = os.open({str(path)!r}, os.O_RDWR | os.O_CREAT)\n'
+         'fcntl.flock(fd, fcntl.LOCK_EX)\n'
+         'print("locked", flush=True)\n'
+         'time.sleep(30)\n'],
+        stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == 'locked'
+        flight = SingleFlight('job', str(path))
+        with flight.attempt() as acquired:
+            assert not acquired
+        assert flight.stats()['busy_process'] == 1
+    finally:
+        holder.kill()
+        holder.wait()
+    # The kernel dropped the dead holder's lock
+    deadline = time.monotonic() + 5
+    while True:
+        with flight.attempt() as acquired:
+            if acquired or time.monotonic() > deadline:
+                break
+    assert acquired
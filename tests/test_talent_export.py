@@ -0,0 +1,43 @@
+"""Streaming CV export archive (talent/export.py)."""
+import io
+import zipfile
+from datetime import datetime
+
+from talent import export
+
+
+def test_stream_is_a_valid_zip_with_stored_pdfs():
+    pdf = b'%PDF-1.7 ' + bytes(range(256)) * 20
+    notes = b'plain text ' * 500
+    entries = [('Dana_Levi/v1_cv.pdf', pdf, datetime(2026, 5, 1, 9, 30), export.compress_type('.pdf')),
+               ('Dana_Levi/v2_cv.docx', b'PK\x03\x04docx', None, export.compress_type('.DOCX')),
+               ('notes.txt', notes, None, export.compress_type('.txt'))]
+
+    archive = b''.join(export.stream_zip(iter(entries)))
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        assert zf.testzip() is None
+        infos = {i.filename: i for i in zf.infolist()}
+        assert zf.read('Dana_Levi/v1_cv.pdf') == pdf
+        assert zf.read('notes.txt') == notes
+        assert infos['Dana_Levi/v1_cv.pdf'].compress_type == zipfile.ZIP_STORED
+        assert infos['Dana_Levi/v2_cv.docx'].compress_type == zipfile.ZIP_STORED
+        assert infos['notes.txt'].compress_type == zipfile.ZIP_DEFLATED
+        assert infos['Dana_Levi/v1_cv.pdf'].date_time == (2026, 5, 1, 9, 30, 0)
+
+
+def test_output_streams_while_entries_are_consumed(monkeypatch):
+    monkeypatch.setattr(export, 'CHUNK', 1024)
+    consumed = []
+
+    def entries():
+        for i in range(3):
+            consumed.append(i)
+            yield f'cv{i}.pdf', bytes([i]) * 5000, None, export.compress_type('.pdf')
+
+    stream = export.stream_zip(entries())
+    first = next(stream)
+    assert first.startswith(b'PK\x03\x04') and consumed == [0]  # before the rest is read
+    sizes = [len(first)] + [len(chunk) for chunk in stream]
+    assert consumed == [0, 1, 2]
+    assert max(sizes) <= 1024 + 100  # one slice (plus a header) at a time
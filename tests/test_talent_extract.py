@@ -0,0 +1,70 @@
+"""Content-addressed extraction cache (talent/extract.py): a CV seen before
+under the same EXTRACTION_VERSION costs no Gemini call."""
+import pytest
+
+from database.models import db
+from talent import config, extract
+from talent.models import TalentCandidate, TalentCv, TalentExtractionCache
+
+
+@pytest.fixture()
+def fake_gemini(monkeypatch):
+    calls = []
+
+    def fake(parts, schema, *, purpose, tracker, model, kind, candidate_id,
+             max_output_tokens=2048):
+        calls.append(candidate_id)
+        return {'name': 'Dana Levi', 'summary': 'Backend engineer.', 'skills': ['Go'],
+                'roles': ['Backend Engineer'], 'cv_quality': 'GOOD', 'rating': 'STRONG',
+                'rating_reasons': ['Solid backend'], 'years_experience': 6}
+
+    monkeypatch.setattr(extract, '_call_with_fallback', fake)
+    return calls
+
+
+def _cv(text, name=None, **kw):
+    cand = TalentCandidate(name=name)
+    db.session.add(cand)
+    db.session.flush()
+    cv = TalentCv(candidate_id=cand.id, filename='cv.pdf', ext='.pdf', text=text,
+                  analysis_status='pending', **kw)
+    db.session.add(cv)
+    db.session.commit()
+    return cand, cv
+
+
+def test_same_cv_text_is_extracted_once(app_ctx, fake_gemini):
+    cand1, cv1 = _cv('Dana Levi\nBackend engineer, Go')
+    cand2, cv2 = _cv('Dana  Levi\n\nBackend engineer, Go  ')  # same CV, re-parsed
+
+    first = extract.run_extraction(cv1, cand1)
+    second = extract.run_extraction(cv2, cand2)
+
+    assert fake_gemini == [cand1.id]
+    assert second == first
+    assert cv2.analysis_status == 'complete' and cv2.analysis == first
+    assert cand2.name == 'Dana Levi' and cand2.years_experience == 6
+    row = db.session.get(TalentExtractionCache, extract.extraction_key(cv1))
+    assert row.hits == 1 and row.last_hit_at is not None
+
+
+def test_other_content_and_version_bump_miss(app_ctx, fake_gemini, monkeypatch):
+    cand1, cv1 = _cv('CV one')
+    cand2, cv2 = _cv('CV two')
+    extract.run_extraction(cv1, cand1)
+    extract.run_extraction(cv2, cand2)
+    assert len(fake_gemini) == 2
+
+    monkeypatch.setattr(config, 'EXTRACTION_VERSION', config.EXTRACTION_VERSION + 1)
+    cand3, cv3 = _cv('CV one')
+    extract.run_extraction(cv3, cand3)
+    assert len(fake_gemini) == 3
+    assert cv3.extraction_version == config.EXTRACTION_VERSION
+
+
+def test_scanned_pdfs_key_on_the_file(app_ctx):
+    _, a = _cv('', file=b'%PDF-1.7 scan A')
+    _, b = _cv('', file=b'%PDF-1.7 scan B')
+    _, empty = _cv('')
+    assert extract.extraction_key(a) != extract.extraction_key(b)
+    assert extract.extraction_key(empty) is None
@@ -0,0 +1,145 @@
+"""Gmail sync pipeline (talent/ingest.py) against a fake IMAP mailbox:
+multi-UID body fetches, pooled attachment parsing, batched commits."""
+import re
+from email.message import EmailMessage
+
+import pytest
+
+from database.models import db
+from talent import ingest
+from talent.models import TalentCandidate, TalentCv, TalentEmail
+
+ME = 'me@example.com'
+
+
+def _mail(msgid, sender, attachment=None):
+    msg = EmailMessage()
+    msg['Message-ID'] = msgid
+    msg['From'] = sender
+    msg['Subject'] = 'My CV'
+    msg['Date'] = 'Mon, 05 Oct 2026 10:00:00 +0000'
+    msg.set_content('Hi, attached.')
+    if attachment:
+        name, data = attachment
+        msg.add_attachment(data, maintype='application', subtype='pdf', filename=name)
+    return msg.as_bytes()
+
+
+class FakeImap:
+    def __init__(self, mails):
+        self.mails = mails  # {uid: raw bytes}
+        self.body_fetches = []
+
+    def __call__(self, host, timeout=None):
+        return self
+
+    def login(self, user, password):
+        pass
+
+    def select(self, folder, readonly=False):
+        pass
+
+    def logout(self):
+        pass
+
+    def uid(self, command, *args):
+        if command == 'SEARCH':
+            return 'OK', [' '.join(self.mails).encode()]
+        uids, what = args[0].split(','), args[1]
+        if what == '(BODY.PEEK[])':
+            self.body_fetches.append(uids)
+        resp = []
+        for n, uid in enumerate(uids, 1):
+            raw = self.mails[uid]
+            if 'HEADER.FIELDS' in what:
+                raw = re.search(rb'Message-ID: [^\r\n]*\r?\n', raw).group(0)
+            resp.append((f'{n} (UID {uid} BODY[] {{{len(raw)}}}'.encode(), raw))
+            resp.append(b')')
+        return 'OK', resp
+
+
+@pytest.fixture()
+def mailbox(monkeypatch):
+    monkeypatch.setenv('TALENT_GMAIL_USER', ME)
+    monkeypatch.setenv('TALENT_GMAIL_APP_PASSWORD', 'secret')
+    monkeypatch.setattr(ingest, 'FETCH_CHUNK', 2)
+    monkeypatch.setattr(ingest, 'extract_text',
+                        lambda data, ext: (data.decode('latin-1')[9:], 'pypdf'))
+    mirrored = []
+    monkeypatch.setattr(ingest, 'mirror_cv_to_drive', lambda cand, cv: mirrored.append(cv.id))
+
+    def install(mails):
+        box = FakeImap(mails)
+        monkeypatch.setattr(ingest.imaplib, 'IMAP4_SSL', box)
+        box.mirrored = mirrored
+        return box
+    return install
+
+
+def test_sync_pipeline(app_ctx, mailbox):
+    db.session.add(TalentEmail(message_id='<old@x>', from_email='old@x.com'))
+    db.session.commit()
+    box = mailbox({
+        '1': _mail('<a1@x>', 'Alice <alice@x.com>', ('alice_cv.pdf', b'%PDF-1.7 Alice one')),
+        '2': _mail('<b1@x>', 'Bob <bob@x.com>', ('cv.pdf', b'not a pdf')),
+        '3': _mail('<me@x>', ME, ('cv.pdf', b'%PDF-1.7 mine')),
+        '4': _mail('<old@x>', 'Old <old@x.com>', ('cv.pdf', b'%PDF-1.7 old')),
+        '5': _mail('<a2@x>', 'Alice <alice@x.com>', ('alice_cv.pdf', b'%PDF-1.7 Alice two')),
+        '6': _mail('<c1@x>', 'Carol <carol@x.com>', ('resume.pdf', b'%PDF-1.7 Carol')),
+    })
+
+    summary = ingest.sync_gmail()
+
+    assert summary == {'ok': True, 'scanned': 6, 'new_emails': 3, 'new_candidates': 2,
+                       'new_cvs': 3, 'skipped': 1}
+    # 5 new messages, 2 per FETCH; the already-known one is never downloaded
+    assert box.body_fetches == [['1', '2'], ['3', '5'], ['6']]
+    alice = TalentCandidate.query.filter_by(email='alice@x.com').one()
+    cvs = TalentCv.query.filter_by(candidate_id=alice.id).order_by(TalentCv.version).all()
+    assert [(cv.version, cv.is_active, cv.text) for cv in cvs] == [
+        (1, False, 'Alice one'), (2, True, 'Alice two')]
+    assert {e.message_id for e in TalentEmail.query.all()} == {'<old@x>', '<a1@x>', '<a2@x>', '<c1@x>'}
+    assert len(box.mirrored) == 3
+
+    assert ingest.sync_gmail()['new_emails'] == 0  # idempotent
+
+
+def test_failed_batch_is_retried_next_sync(app_ctx, mailbox, monkeypatch):
+    box = mailbox({
+        '1': _mail('<a1@x>', 'Alice <alice@x.com>', ('cv.pdf', b'%PDF-1.7 Alice')),
+        '2': _mail('<c1@x>', 'Carol <carol@x.com>', ('cv.pdf', b'%PDF-1.7 Carol')),
+    })
+    real_add_cv = ingest.add_cv
+
+    def broken(*a, **kw):
+        raise RuntimeError('db hiccup')
+
+    monkeypatch.setattr(ingest, 'add_cv', broken)
+    assert ingest.sync_gmail()['new_emails'] == 0
+    assert TalentEmail.query.count() == 0 and TalentCandidate.query.count() == 0
+
+    monkeypatch.setattr(ingest, 'add_cv', real_add_cv)
+    assert ingest.sync_gmail()['new_emails'] == 2
+    assert box.mirrored and TalentCv.query.count() == 2
+
+
+def test_one_bad_email_does_not_sink_its_chunk(app_ctx, mailbox, monkeypatch):
+    box = mailbox({
+        '1': _mail('<a1@x>', 'Alice <alice@x.com>', ('cv.pdf', b'%PDF-1.7 Alice')),
+        '2': _mail('<b1@x>', 'Bob <bob@x.com>', ('bad.pdf', b'%PDF-1.7 Bob')),
+        '3': _mail('<c1@x>', 'Carol <carol@x.com>', ('cv.pdf', b'%PDF-1.7 Carol')),
+    })
+    real_add_cv = ingest.add_cv
+
+    def picky(cand, data, filename, **kw):
+        if filename == 'bad.pdf':
+            raise RuntimeError('bad row')
+        return real_add_cv(cand, data, filename, **kw)
+
+    monkeypatch.setattr(ingest, 'add_cv', picky)
+    summary = ingest.sync_gmail()
+
+    assert (summary['new_emails'], summary['new_candidates']) == (2, 2)
+    assert {e.message_id for e in TalentEmail.query.all()} == {'<a1@x>', '<c1@x>'}
+    assert TalentCandidate.query.filter_by(email='bob@x.com').count() == 0
+    assert len(box.mirrored) == 2
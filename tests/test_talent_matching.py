@@ -0,0 +1,120 @@
+"""Batched candidate -> company matching (talent/matching.py) against a fake
+model: batch planning, one call per batch, per-pair routing of verdicts."""
+import json
+
+import pytest
+
+from cv_review.gemini import GeminiError
+from database.models import db
+from talent import matching
+from talent.models import TalentCandidate, TalentCompany, TalentMatch
+
+
+def _company(name, roles, skills=(), **kw):
+    c = TalentCompany(name=name, referral_method='EMAIL', active=True,
+                      target_roles=list(roles), required_skills=list(skills), **kw)
+    db.session.add(c)
+    return c
+
+
+def _candidate(name, roles, skills=()):
+    cand = TalentCandidate(name=name)
+    db.session.add(cand)
+    return cand, {'roles': list(roles), 'skills': list(skills), 'summary': name}
+
+
+@pytest.fixture()
+def fake_model(monkeypatch):
+    """Answers every requested pair (fit by company name); records calls."""
+    calls = []
+
+    def fake(parts, schema, *, purpose, tracker, model, kind, candidate_id,
+             max_output_tokens=2048):
+        pairs = json.loads(parts[-1]['text'].split('\n', 1)[1])
+        calls.append({'purpose': purpose, 'pairs': pairs,
+                      'max_output_tokens': max_output_tokens})
+        return {'matches': [dict(p, fit='STRONG', pros=['Backend'], cons=[])
+                            for p in pairs]
+                + [{'candidate_id': 'nobody', 'company_id': pairs[0]['company_id'],
+                    'fit': 'STRONG', 'pros': [], 'cons': []}]}
+
+    monkeypatch.setattr(matching, '_call_with_fallback', fake)
+    return calls
+
+
+def test_overlapping_shortlists_share_a_batch(app_ctx):
+    acme = _company('Acme', ['Backend Engineer'])
+    globex = _company('Globex', ['Backend Engineer', 'Data Engineer'])
+    initech = _company('Initech', ['Designer'])
+    a = _candidate('A', ['Backend Engineer'])
+    b = _candidate('B', ['Data Engineer'])
+    c = _candidate('C', ['Product Designer'])
+    db.session.commit()
+
+    batches = matching.plan_batches([a, b, c], [acme, globex, initech])
+    groups = sorted(sorted(cand.name for cand, _, _ in batch.items) for batch in batches)
+    assert groups == [['A', 'B'], ['C']]
+
+
+def test_batches_respect_limits(app_ctx):
+    companies = [_company(f'Co{i}', ['Backend Engineer'], hiring_notes='x' * 1500)
+                 for i in range(4)]
+    items = [_candidate(f'C{i}', ['Backend Engineer']) for i in range(5)]
+    db.session.commit()
+
+    by_count = matching.plan_batches(items, companies, max_candidates=2)
+    assert [len(b.items) for b in by_count] == [2, 2, 1]
+    by_pairs = matching.plan_batches(items, companies, max_pairs=8)
+    assert all(b.pairs <= 8 for b in by_pairs) and len(by_pairs) == 3
+    # Each company's ~1.5k-char notes: a small budget fits one candidate's
+    # shortlist, every further candidate still adds its own profile + pairs.
+    tight = matching.plan_batches(items, companies, token_budget=2600)
+    assert all(b.tokens <= 2600 for b in tight if len(b.items) > 1)
+    assert len(tight) > 1
+
+
+def test_one_call_routes_each_pair(app_ctx, fake_model):
+    acme = _company('Acme', ['Backend Engineer'])
+    globex = _company('Globex', ['Backend Engineer', 'Data Engineer'])
+    a = _candidate('A', ['Backend Engineer'])
+    b = _candidate('B', ['Data Engineer'])
+    db.session.commit()
+    kept = TalentMatch(candidate_id=a[0].id, company_id=acme.id, ai_fit='NO_MATCH',
+                       admin_fit='MAYBE', overridden=True)
+    db.session.add(kept)
+    db.session.commit()
+
+    results = matching.run_batch_matching([a, b], [acme, globex])
+
+    assert len(fake_model) == 1
+    call = fake_model[0]
+    assert call['purpose'] == 'talent_match_batch'
+    assert {(p['candidate_id'], p['company_id']) for p in call['pairs']} == {
+        (a[0].id, acme.id), (a[0].id, globex.id), (b[0].id, globex.id)}
+    assert call['max_output_tokens'] == 1024 + 3 * matching.PAIR_OUTPUT_TOKENS
+
+    rows = {(m.candidate_id, m.company_id): m for m in TalentMatch.query.all()}
+    assert set(rows) == {(a[0].id, acme.id), (a[0].id, globex.id), (b[0].id, globex.id)}
+    assert all(m.ai_fit == 'STRONG' for m in rows.values())
+    assert rows[(a[0].id, acme.id)].admin_fit == 'MAYBE'  # override untouched
+    assert {k: len(v) for k, v in results.items()} == {a[0].id: 2, b[0].id: 1}
+
+
+@pytest.mark.parametrize('error', [GeminiError('quota'), KeyError('matches')])
+def test_failed_batch_only_costs_itself(app_ctx, monkeypatch, error):
+    backend = _company('Acme', ['Backend Engineer'])
+    design = _company('Initech', ['Designer'])
+    a = _candidate('A', ['Backend Engineer'])
+    c = _candidate('C', ['Product Designer'])
+    db.session.commit()
+
+    def flaky(parts, schema, **kw):
+        pairs = json.loads(parts[-1]['text'].split('\n', 1)[1])
+        if pairs[0]['company_id'] == backend.id:
+            raise error
+        return {'matches': [dict(p, fit='MAYBE', pros=[], cons=[]) for p in pairs]}
+
+    monkeypatch.setattr(matching, '_call_with_fallback', flaky)
+    results = matching.run_batch_matching([a, c], [backend, design])
+    assert list(results) == [c[0].id]
+    assert [(m.candidate_id, m.ai_fit) for m in TalentMatch.query.all()] == [(c[0].id, 'MAYBE')]
@@ -0,0 +1,87 @@
+"""Background analyzer (talent/pipeline.py): atomic claims of pending CVs and
+the extraction pool feeding batched matching. Extraction/matching are faked."""
+import threading
+from datetime import datetime, timedelta
+
+from database.models import db
+from talent import pipeline
+from talent.models import TalentCandidate, TalentCv
+
+
+def _pending_cvs(n, **kw):
+    cvs = []
+    for i in range(n):
+        cand = TalentCandidate(name=f'C{i}')
+        db.session.add(cand)
+        db.session.flush()
+        cv = TalentCv(candidate_id=cand.id, filename=f'c{i}.pdf', ext='.pdf',
+                      text='cv', analysis_status='pending', **kw)
+        db.session.add(cv)
+        cvs.append(cv)
+    db.session.commit()
+    return cvs
+
+
+def test_claims_are_disjoint(app_ctx):
+    _pending_cvs(5)
+    _pending_cvs(1, is_active=False)
+
+    first = pipeline.claim_pending(3)
+    second = pipeline.claim_pending(3)
+
+    assert len(first) == 3 and len(second) == 2
+    assert not {cv.id for cv in first} & {cv.id for cv in second}
+    assert all(cv.analysis_status == 'running' for cv in first + second)
+    assert pipeline.claim_pending(3) == []
+
+
+def test_drain_extracts_in_parallel_then_matches_together(file_db, monkeypatch):
+    cvs = _pending_cvs(5)
+    broken = cvs[2].id
+    threads = set()
+    matched = []
+
+    def fake_extraction(cv, candidate):
+        threads.add(threading.current_thread().name)
+        if cv.id == broken:
+            raise RuntimeError('no text')
+        cv.analysis = {'roles': ['Backend Engineer'], 'skills': []}
+        cv.analysis_status = 'complete'
+        db.session.commit()
+        return cv.analysis
+
+    def fake_matching(items, companies):
+        matched.append(sorted(cand.name for cand, _ in items))
+        return {cand.id: [] for cand, _ in items}
+
+    monkeypatch.setattr(pipeline, 'run_extraction', fake_extraction)
+    monkeypatch.setattr(pipeline, 'run_batch_matching', fake_matching)
+    before = pipeline.analysis_progress()
+
+    pipeline.drain_pending(file_db, workers=3)
+
+    assert all(name.startswith('talent-analyze') for name in threads)
+    assert matched == [['C0', 'C1', 'C3', 'C4']]  # one matching round
+    db.session.expire_all()
+    statuses = {cv.id: cv.analysis_status for cv in TalentCv.query.all()}
+    assert statuses.pop(broken) == 'failed'
+    assert set(statuses.values()) == {'complete'}
+    after = pipeline.analysis_progress()
+    assert after['claimed'] - before['claimed'] == 5
+    assert after['extracted'] - before['extracted'] == 4
+    assert after['failed'] - before['failed'] == 1
+    assert after['matched'] - before['matched'] == 4
+
+
+def test_stale_claims_go_back_to_pending(app_ctx):
+    fresh, stale, legacy = _pending_cvs(3)
+    pipeline.claim_pending(3)
+    stale.claimed_at = datetime.utcnow() - timedelta(hours=2)
+    legacy.claimed_at = None  # claimed before claims were timestamped
+    db.session.commit()
+
+    assert pipeline.sweep_stale_claims() == 2
+    db.session.expire_all()
+    assert (fresh.analysis_status, stale.analysis_status, legacy.analysis_status) == (
+        'running', 'pending', 'pending')
+    assert {cv.id for cv in pipeline.claim_pending(3)} == {stale.id, legacy.id}
@@ -0,0 +1,70 @@
+"""Precomputed prefilter indexes (talent/prefilter.py) must agree exactly with
+the pairwise plausible() they replace, both directions."""
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from talent import prefilter
+from talent.matching import SHORTLIST_CAP, plausible
+
+ROLES = ['Backend Engineer', 'Data Engineer', 'Frontend Developer', 'DevOps',
+         'Product Manager', 'Senior Engineer', 'ML / AI Researcher', 'Security Analyst']
+SKILLS = ['Python', 'Go', 'Kubernetes', 'React', 'SQL', 'AWS', 'Spark', 'Terraform',
+          'TypeScript', 'PyTorch']
+SENIORITY = ['JUNIOR', 'MID', 'SENIOR', 'STAFF']
+
+
+def _company(rng, i):
+    return SimpleNamespace(
+        id=i, updated_at=datetime(2026, 1, 1),
+        target_roles=rng.sample(ROLES, rng.randint(0, 2)),
+        target_seniority=rng.sample(SENIORITY, rng.randint(0, 2)),
+        required_skills=rng.sample(SKILLS, rng.randint(0, 3)),
+        preferred_skills=rng.sample(SKILLS, rng.randint(0, 3)),
+        min_years=rng.choice([None, 0, 2, 5]))
+
+
+def _analysis(rng):
+    return {'roles': rng.sample(ROLES, rng.randint(0, 2)),
+            'current_title': rng.choice(['', 'Senior Engineer', 'Data Scientist']),
+            'skills': rng.sample(SKILLS, rng.randint(0, 5)),
+            'years_experience': rng.choice([None, 1, 3, 8]),
+            'seniority': rng.choice([None, *SENIORITY])}
+
+
+def test_company_index_matches_plausible():
+    rng = random.Random(7)
+    companies = [_company(rng, i) for i in range(60)]
+    index = prefilter.CompanyIndex(companies)
+    for _ in range(300):
+        analysis = _analysis(rng)
+        expected = [(score, i) for i, c in enumerate(companies)
+                    for ok, score in [plausible(analysis, c)] if ok]
+        assert index.scored(analysis) == expected
+        ranked = sorted(expected, key=lambda t: -t[0])[:SHORTLIST_CAP]
+        assert index.shortlist(analysis, SHORTLIST_CAP) == [i for _, i in ranked]
+    assert index.scored({}) == []
+
+
+def test_candidate_index_matches_plausible():
+    rng = random.Random(11)
+    analyses = [_analysis(rng) for _ in range(200)]
+    index = prefilter.CandidateIndex(analyses)
+    for i in range(60):
+        company = _company(rng, i)
+        expected = [(score, j) for j, a in enumerate(analyses)
+                    for ok, score in [plausible(a, company)] if ok]
+        expected.sort(key=lambda t: -t[0])
+        assert index.scored(company) == expected
+
+
+def test_company_index_rebuilt_only_on_edit():
+    rng = random.Random(3)
+    companies = [_company(rng, i) for i in range(5)]
+    first = prefilter.company_index(companies)
+    assert prefilter.company_index(list(companies)) is first
+
+    companies[2].updated_at += timedelta(seconds=1)
+    edited = prefilter.company_index(companies)
+    assert edited is not first
+    assert prefilter.company_index(companies[:4]) is not edited
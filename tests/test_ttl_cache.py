@@ -0,0 +1,93 @@
+"""TTLCache: single-flight loads, stale-while-revalidate, failure handling."""
+import threading
+import time
+
+import pytest
+
+from ttl_cache import TTLCache
+
+
+class SlowLoader:
+    def __init__(self, delay=0.05):
+        self.calls = 0
+        self.delay = delay
+        self.fail = False
+
+    def __call__(self, key):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError('db down')
+        return f'{key}-v{self.calls}'
+
+
+def test_concurrent_cold_reads_load_once():
+    loader = SlowLoader()
+    cache = TTLCache(loader, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('k')))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert loader.calls == 1 and results == ['k-v1'] * 8
+
+
+def test_stale_value_served_while_one_refresh_runs():
+    loader = SlowLoader()
+    cache = TTLCache(loader, ttl=60)
+    assert cache.get() == 'None-v1'
+    cache.invalidate()
+    assert cache.get() == 'None-v1'   # stale, refresh kicked off
+    assert cache.get() == 'None-v1'   # still stale, no second refresh
+    deadline = time.time() + 2
+    while cache.peek() == 'None-v1' and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get() == 'None-v2' and loader.calls == 2
+
+
+def test_warm_then_read_does_not_load_twice():
+    loader = SlowLoader()
+    cache = TTLCache(loader, ttl=60)
+    cache.warm()
+    assert cache.get() == 'None-v1' and loader.calls == 1
+
+
+def test_failed_refresh_keeps_previous_value_and_cold_failure_raises():
+    loader = SlowLoader(delay=0)
+    cache = TTLCache(loader, ttl=60)
+    cache.get()
+    loader.fail = True
+    cache.invalidate()
+    cache.refresh().join(2)
+    assert cache.get() == 'None-v1'
+    cache.clear()
+    with pytest.raises(RuntimeError):
+        cache.get()
+
+
+def test_version_bump_triggers_one_rebuild():
+    loader = SlowLoader(delay=0)
+    stamp = {'v': 1}
+    cache = TTLCache(loader, ttl=3600, version=lambda: stamp['v'], version_check=0)
+    assert cache.get() == 'None-v1'
+    assert cache.get() == 'None-v1' and loader.calls == 1
+    stamp['v'] = 2
+    assert cache.get() == 'None-v1'   # stale copy served, rebuild in background
+    deadline = time.time() + 2
+    while cache.peek() == 'None-v1' and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get() == 'None-v2'
+    assert cache.get() == 'None-v2' and loader.calls == 2
+
+
+def test_cache_version_counter(app_ctx):
+    from database.models import db, CacheVersion
+    assert CacheVersion.current('places') == 0
+    CacheVersion.bump('places')
+    db.session.commit()
+    CacheVersion.bump('places')
+    db.session.commit()
+    assert CacheVersion.current('places') == 2
+    assert CacheVersion.current('other') == 0
@@ -0,0 +1,98 @@
+"""Company-name keys and aliases (whatsapp_bot/names.py, aliases.py)."""
+import pytest
+
+from database.models import db
+from whatsapp_bot import aliases, company_index
+from whatsapp_bot.models import WaCompany, WaCompanyAlias, WaCompanyRequest, WaUser
+from whatsapp_bot.names import match_key, sound_key
+
+
+@pytest.mark.parametrize("typed, name", [
+    ("monday.com", "Monday"), ("Monday Ltd.", "monday"), ("Check-Point", "Check Point"),
+    ("The Wix.com Ltd", "wix"), ('טבע בע"מ', "טבע"), ("www.nvidia.com", "NVIDIA Corp"),
+])
+def test_match_key_folds_spelling(typed, name):
+    assert match_key(typed) == match_key(name)
+
+
+@pytest.mark.parametrize("hebrew, latin", [
+    ("מאנדיי", "Monday"), ("גוגל", "Google"), ("צ'ק פוינט", "Check Point"),
+    ("וויקס", "Wix"), ("ויקס", "Wix"), ("אנבידיה", "Nvidia"), ("מיקרוסופט", "Microsoft"),
+])
+def test_sound_key_meets_the_hebrew_spelling(hebrew, latin):
+    assert sound_key(hebrew) == sound_key(latin)
+
+
+def _company(name):
+    c = WaCompany(name=name, normalized_name=" ".join(name.lower().split()))
+    db.session.add(c)
+    db.session.commit()
+    return c
+
+
+def test_find_company(app_ctx):
+    monday = _company("monday.com")
+    wix = _company("Wix")
+    _company("Wix Ltd")  # same match key as Wix: ambiguous below the exact probe
+    google = _company("Google")
+    db.session.add(WaCompanyAlias(company_id=google.id, alias="Alphabet"))
+    db.session.commit()
+
+    assert aliases.find_company("Monday") is monday
+    assert aliases.find_company("  MONDAY.COM ") is monday
+    assert aliases.find_company("מאנדיי") is None      # sounds alike: only suggested
+    assert aliases.find_company("alphabet inc") is google
+    assert aliases.find_company("wix") is wix            # exact name wins
+    assert aliases.find_company("wix.com") is None       # two companies: let the user pick
+    assert aliases.find_company("mikrosoft") is None
+    assert aliases.find_company("") is None
+
+
+def test_sound_alikes_are_suggestions(app_ctx):
+    monday = _company("monday.com")
+    _company("Meta")
+    assert aliases.sound_alikes("מאנדיי") == [monday]
+    assert aliases.sound_alikes("Monday") == []  # Latin input has the trigram search
+    assert aliases.sound_alikes("מטה") == []     # "mt": too short to mean anything
+
+
+def test_learned_and_admin_aliases(app_ctx, monkeypatch):
+    monkeypatch.setattr(company_index, "_built", None)
+    monday = _company("monday.com")
+    other = _company("Other")
+    user = WaUser(phone="+1")
+    db.session.add(user)
+    db.session.flush()
+    for raw in ("מאנדיי", "Monday", "מאנדיי"):
+        db.session.add(WaCompanyRequest(candidate_user_id=user.id, company_name_raw=raw,
+                                        resolved_company_id=monday.id, reason="unknown_company"))
+    db.session.commit()
+
+    assert aliases.learn_from_requests() == 1  # "Monday" already matches by key
+    db.session.commit()
+    assert [(a.alias, a.source) for a in WaCompanyAlias.query] == [("מאנדיי", "learned")]
+    assert WaCompanyRequest.query.filter_by(aliases_learned_at=None).count() == 0
+    db.session.add(WaCompanyRequest(candidate_user_id=user.id, company_name_raw="0ther",
+                                    resolved_company_id=other.id, reason="unknown_company"))
+    db.session.commit()
+    assert aliases.learn_from_requests() == 1  # only the new row is walked
+    db.session.commit()
+    assert aliases.learn_from_requests() == 0
+    assert company_index.get().search("מאנדיי") == [monday.id]
+
+    aliases.set_admin_aliases(monday, ["מאנדיי", " Monday Dot Com ", ""])
+    db.session.commit()
+    assert sorted(a.alias for a in WaCompanyAlias.query.filter_by(company_id=monday.id)) == [
+        "Monday Dot Com", "מאנדיי"]
+    with pytest.raises(ValueError):
+        aliases.set_admin_aliases(other, ["monday dot com"])
+    with pytest.raises(ValueError, match="monday.com"):
+        aliases.set_admin_aliases(other, ["Monday Ltd"])  # would redirect "monday"
+
+
+def test_fill_company_keys(app_ctx):
+    c = _company("Check Point Ltd")
+    c.match_key = c.sound_key = None
+    db.session.commit()
+    assert aliases.fill_company_keys() == 1
+    assert (c.match_key, c.sound_key) == ("checkpoint", sound_key("Check Point"))
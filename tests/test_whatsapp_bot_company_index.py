@@ -0,0 +1,54 @@
+"""Company "did you mean?" search (whatsapp_bot/company_index.py)."""
+import pytest
+
+from database.models import db
+from whatsapp_bot import candidate, company_index
+from whatsapp_bot.company_index import CompanyIndex
+from whatsapp_bot.models import WaAdvocate, WaCompany
+
+NAMES = ["google", "google cloud", "microsoft", "monday.com", "wix", "check point",
+         "checkmarx", "nvidia", "intel", "mobileye"]
+
+
+def _index(advocated=()):
+    return CompanyIndex(list(enumerate(NAMES, 1)), advocated)
+
+
+def test_substring_then_fuzzy():
+    idx = _index()
+    assert idx.search("goog") == [1, 2]
+    assert idx.search("check") == [6, 7]
+    assert idx.search("micosoft") == [3]           # typo
+    assert idx.search("nvidia israel") == [8]      # shared word
+    assert idx.search("wx") == [5]                 # short names are fuzzy-matched too
+    assert idx.search("totally unknown ltd") == []
+
+
+def test_advocated_companies_come_first():
+    assert _index(advocated={7}).search("check") == [7, 6]
+    assert _index().search("o", limit=2) == [1, 2]
+
+
+def test_aliases_map_back_to_one_company():
+    idx = CompanyIndex([(1, "meta"), (1, "facebook"), (2, "metabase")], ())
+    assert idx.search("facebok") == [1]
+    assert idx.search("meta") == [1, 2]
+
+
+@pytest.fixture()
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(company_index, "_built", None)
+
+
+def test_find_similar_sees_writes_immediately(app_ctx, fresh_index):
+    for name in ("Check Point", "Checkmarx"):
+        db.session.add(WaCompany(name=name, normalized_name=name.lower()))
+    db.session.commit()
+    assert [c.name for c in candidate._find_similar("check")] == ["Check Point", "Checkmarx"]
+
+    marx = WaCompany.query.filter_by(name="Checkmarx").one()
+    db.session.add(WaAdvocate(company_id=marx.id, email="a@checkmarx.com", status="active"))
+    db.session.add(WaCompany(name="Checkly", normalized_name="checkly"))
+    db.session.commit()
+    assert [c.name for c in candidate._find_similar("check")] == [
+        "Checkmarx", "Check Point", "Checkly"]
@@ -0,0 +1,192 @@
+"""Inbound WhatsApp queue (whatsapp_bot/jobs.py): the webhook only enqueues;
+workers handle each phone's messages in order, one at a time."""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.models import db
+from whatsapp_bot import conversation, jobs, wa_bp, webhooks
+from whatsapp_bot.models import WaConversation, WaInboundMessage
+
+
+def _queue(sid, phone, body="hi", **kw):
+    row = WaInboundMessage(message_sid=sid, from_phone=phone, body=body, num_media=0,
+                           payload={"button_payload": None}, job_status="queued", **kw)
+    db.session.add(row)
+    db.session.commit()
+    return row
+
+
+@pytest.fixture()
+def handled(monkeypatch):
+    seen = []
+
+    def fake_handle(inbound):
+        seen.append((inbound["phone"], inbound["body"]))
+        if inbound["body"] == "boom":
+            raise RuntimeError("handler blew up")
+        return f"cmd:{inbound['body']}"
+
+    monkeypatch.setattr(jobs.router, "handle", fake_handle)
+    monkeypatch.setattr(jobs.messaging, "send_text",
+                        lambda phone, text: seen.append((phone, "ERROR-REPLY")))
+    return seen
+
+
+def test_webhook_enqueues_without_handling(app_ctx, handled, monkeypatch):
+    app_ctx.register_blueprint(wa_bp)
+    monkeypatch.setattr(webhooks, "_verify_twilio_signature", lambda req: True)
+    client = app_ctx.test_client()
+    form = {"MessageSid": "SM1", "From": "whatsapp:+972500000001", "Body": "menu",
+            "ButtonPayload": "MENU", "NumMedia": "0"}
+
+    assert client.post("/wa/webhook", data=form).status_code == 200
+    assert client.post("/wa/webhook", data=form).status_code == 200  # duplicate SID
+
+    assert handled == []
+    row = WaInboundMessage.query.one()
+    assert (row.job_status, row.from_phone) == ("queued", "+972500000001")
+    assert jobs.inbound_event(row)["button_payload"] == "MENU"
+
+
+def test_one_message_per_phone_at_a_time_in_order(app_ctx, handled):
+    a1 = _queue("A1", "+1")
+    _queue("A2", "+1")
+    b1 = _queue("B1", "+2")
+
+    first = jobs.claim_next()
+    second = jobs.claim_next()
+    assert (first.id, second.id) == (a1.id, b1.id)
+    assert jobs.claim_next() is None  # A2 waits for A1
+
+    jobs.process(first)
+    third = jobs.claim_next()
+    assert third.message_sid == "A2"
+    jobs.process(second)
+    jobs.process(third)
+    assert [phone for phone, _ in handled] == ["+1", "+2", "+1"]
+    assert {r.job_status for r in WaInboundMessage.query} == {"done"}
+    assert a1.parsed_command == "cmd:hi" and a1.processed_at is not None
+
+
+def test_handler_failure_replies_and_marks_failed(app_ctx, handled):
+    _queue("X1", "+3", body="boom")
+    _queue("X2", "+3", body="next")
+
+    assert jobs.drain() == 2
+
+    failed, ok = WaInboundMessage.query.order_by(WaInboundMessage.id).all()
+    assert (failed.job_status, failed.parsed_command) == ("failed", "error")
+    assert failed.error == "handler blew up"
+    assert ok.job_status == "done"
+    assert handled == [("+3", "boom"), ("+3", "ERROR-REPLY"), ("+3", "next")]
+
+
+def test_stale_running_job_stops_blocking_its_phone(app_ctx, handled):
+    stuck = _queue("S1", "+4")
+    stuck.job_status = "running"
+    stuck.locked_at = datetime.utcnow() - timedelta(hours=1)
+    db.session.commit()
+    _queue("S2", "+4")
+
+    assert jobs.claim_next() is None
+    assert jobs.sweep_stale() == 1
+    assert jobs.claim_next().message_sid == "S2"
+    assert db.session.get(WaInboundMessage, stuck.id).job_status == "failed"
+
+
+def test_sharded_executor_serializes_per_key():
+    ex = jobs.ShardedExecutor(4)
+    gate = threading.Event()
+    log = []
+
+    def task(key, n):
+        if (key, n) == ("a", 0):
+            gate.wait(5)  # "a" stays blocked; other keys must still run
+        log.append((key, n))
+
+    try:
+        keys = ["a", "b", "c", "d", "e"]
+        blocked = {k for k in keys if ex.shard_of(k) == ex.shard_of("a")}
+        for n in range(3):
+            for key in keys:
+                ex.submit(key, task, key, n)
+        deadline = time.monotonic() + 5
+        while len(log) < 3 * (len(keys) - len(blocked)) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert {k for k, _ in log} == set(keys) - blocked
+        gate.set()
+    finally:
+        ex.shutdown(5)
+    for key in keys:
+        assert [n for k, n in log if k == key] == [0, 1, 2]
+
+
+def test_pool_handles_each_phone_in_order(file_db, handled):
+    for n in range(4):
+        for phone in ("+10", "+20", "+30"):
+            _queue(f"{phone}-{n}", phone, body=str(n))
+    pool = jobs.JobPool(file_db, 2).start()
+    try:
+        deadline = time.monotonic() + 10
+        while len(handled) < 12 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        pool.stop(5)
+    for phone in ("+10", "+20", "+30"):
+        assert [body for p, body in handled if p == phone] == ["0", "1", "2", "3"]
+    db.session.expire_all()
+    assert {r.job_status for r in WaInboundMessage.query} == {"done"}
+
+
+def test_slow_phone_holds_back_only_its_own_shard(file_db, handled, monkeypatch):
+    gate = threading.Event()
+    fake_handle = jobs.router.handle
+
+    def slow_handle(inbound):
+        if inbound["body"] == "slow":
+            gate.wait(10)
+        return fake_handle(inbound)
+
+    monkeypatch.setattr(jobs.router, "handle", slow_handle)
+    pool = jobs.JobPool(file_db, 2)
+    phones = [f"+5{n:02d}" for n in range(40)]
+    stuck = [p for p in phones if pool.executor.shard_of(p) == pool.executor.shard_of("+500")]
+    free = [p for p in phones if p not in stuck]
+    _queue("slow", "+500", body="slow")
+    for phone in stuck[1:6] + free[:5]:
+        _queue(phone, phone)
+    pool.start()
+    try:
+        deadline = time.monotonic() + 10
+        while len(handled) < 5 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        time.sleep(0.2)
+        # The other shard drained; behind "slow" only SHARD_BACKLOG were claimed
+        assert {p for p, _ in handled} == set(free[:5])
+        db.session.expire_all()
+        waiting = WaInboundMessage.query.filter(WaInboundMessage.from_phone != "+500",
+                                                WaInboundMessage.job_status == "running").all()
+        assert len(waiting) == jobs.SHARD_BACKLOG
+        # The sweep fails one of them meanwhile: its shard must not run it later
+        waiting[0].job_status = "failed"
+        db.session.commit()
+        gate.set()
+        deadline = time.monotonic() + 10
+        while len(handled) < 10 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        time.sleep(0.2)
+    finally:
+        gate.set()
+        pool.stop(5)
+    expected = {"+500", *stuck[1:6], *free[:5]} - {waiting[0].from_phone}
+    assert sorted(p for p, _ in handled) == sorted(expected)
+
+
+def test_get_state_creates_the_conversation_once(app_ctx):
+    user = conversation.get_or_create_user("+972500000009")
+    first = conversation.get_state(user)
+    assert conversation.get_state(user).id == first.id
+    assert WaConversation.query.count() == 1
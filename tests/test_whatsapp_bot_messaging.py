@@ -0,0 +1,74 @@
+"""Outbound sends (whatsapp_bot/messaging.py): one shared Twilio client and
+buffered wa_outbound_messages rows."""
+import pytest
+
+from database.models import db
+from whatsapp_bot import jobs, messaging
+from whatsapp_bot.models import WaInboundMessage, WaOutboundMessage
+
+
+class FakeClient:
+    def __init__(self):
+        self.sent = []
+        self.messages = self
+
+    def create(self, **kw):
+        self.sent.append(kw)
+        return type("Msg", (), {"sid": f"SM{len(self.sent)}", "status": "queued"})()
+
+
+@pytest.fixture()
+def twilio(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(messaging, "_client", lambda: client)
+    return client
+
+
+def test_client_is_shared_until_credentials_change(monkeypatch):
+    monkeypatch.setattr(messaging, "_shared_client", None)
+    monkeypatch.setenv("TWILIO_ACCOUNT_SID", "AC1")
+    monkeypatch.setenv("TWILIO_AUTH_TOKEN", "t1")
+    first = messaging._client()
+    assert messaging._client() is first
+    session = first.http_client.session
+    assert session is not None and messaging._client().http_client.session is session
+
+    monkeypatch.setenv("TWILIO_AUTH_TOKEN", "t2")
+    assert messaging._client() is not first
+
+
+def test_turn_replies_are_logged_in_the_jobs_final_commit(app_ctx, twilio, monkeypatch):
+    def turn(inbound):
+        messaging.send_text(inbound["phone"], "one")
+        messaging.send_text(inbound["phone"], "two")
+        assert WaOutboundMessage.query.count() == 0  # no commit per send
+        db.session.rollback()  # a handler rollback keeps the buffered rows
+        return "two_sends"
+
+    monkeypatch.setattr(jobs.router, "handle", turn)
+    db.session.add(WaInboundMessage(message_sid="SM-in", from_phone="+1", body="hi",
+                                    num_media=0, payload={}, job_status="queued"))
+    db.session.commit()
+
+    assert jobs.drain() == 1
+    rows = WaOutboundMessage.query.order_by(WaOutboundMessage.id).all()
+    assert [(r.body, r.twilio_sid) for r in rows] == [("one", "SM1"), ("two", "SM2")]
+
+
+def test_log_moves_each_batch_into_the_session_without_committing(app_ctx, twilio, monkeypatch):
+    monkeypatch.setattr(messaging, "LOG_BATCH", 3)
+    commits = []
+    real_commit = db.session.commit
+
+    def spy():
+        commits.append(1)
+        real_commit()
+
+    monkeypatch.setattr(db.session, "commit", spy)
+    for n in range(4):
+        messaging.send_text("+1", f"ping {n}")
+    # Never mid-turn: that would commit the handler's half-done transaction
+    assert commits == []
+    assert len(db.session.new) == 3  # the 4th is still buffered
+    messaging.flush_log(commit=True)
+    assert WaOutboundMessage.query.count() == 4
@@ -0,0 +1,126 @@
+"""In-process TTL cache with stale-while-revalidate — the pattern the
+/hitech/referrals-bot companies list started with, generalized so the places
+map (and whatever comes next) share one implementation.
+
+- Fresh entry: returned as is.
+- Stale entry: returned as is, and ONE background thread reloads it
+  (single-flight — concurrent readers never start a second load).
+- No entry yet (cold): the caller blocks on that key's lock, so N concurrent
+  cold requests cause one load, not N. `warm()` at startup makes this the
+  rare case.
+- A failed load keeps serving the previous value and is retried on the next
+  read; a failed cold load raises to the caller.
+
+Per-process state: with several gunicorn workers each keeps its own copy. To
+show writes everywhere without a short TTL, pass `version` — a cheap callable
+returning a shared generation stamp (database.models.CacheVersion). It is
+polled at most every `version_check` seconds, and an entry loaded under an
+older stamp is treated as stale, so every worker rebuilds exactly once.
+"""
+import threading
+import time
+
+
+class TTLCache:
+    """`loader(key)` builds the value for `key`; entries are fresh for `ttl`
+    seconds. Single-value caches can ignore keys (the default key is None)."""
+
+    def __init__(self, loader, ttl, name='cache', version=None, version_check=5):
+        self.loader = loader
+        self.ttl = ttl
+        self.name = name
+        self.version = version
+        self.version_check = version_check
+        self._latest_version = None
+        self._version_checked_at = float('-inf')
+        self._entries = {}      # key -> (value, loaded_at monotonic, version)
+        self._refreshing = set()
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _read_version(self):
+        try:
+            self._latest_version = self.version()
+        except Exception as e:
+            print(f"⚠️ {self.name} version check failed: {e}")
+        self._version_checked_at = time.monotonic()
+        return self._latest_version
+
+    def _is_stale(self, loaded_at, version):
+        if time.monotonic() - loaded_at >= self.ttl:
+            return True
+        if self.version is None:
+            return False
+        if time.monotonic() - self._version_checked_at >= self.version_check:
+            self._read_version()
+        return version != self._latest_version
+
+    def _load(self, key):
+        t0 = time.monotonic()
+        # Stamp BEFORE loading: a write that lands mid-load bumps past it and
+        # causes one more reload instead of being missed.
+        version = self._read_version() if self.version else None
+        value = self.loader(key)
+        self._entries[key] = (value, time.monotonic(), version)
+        print(f"⏱️  {self.name} loaded in {time.monotonic() - t0:.2f}s")
+        return value
+
+    def get(self, key=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock_for(key):
+                entry = self._entries.get(key)  # loaded while we waited?
+                if entry is None:
+                    return self._load(key)
+        value, loaded_at, version = entry
+        if self._is_stale(loaded_at, version):
+            self.refresh(key)
+        return value
+
+    def peek(self, key=None):
+        """The current value (fresh or stale) without triggering a load."""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def set(self, key, value):
+        self._entries[key] = (value, time.monotonic(), self._latest_version)
+
+    def refresh(self, key=None):
+        """Reload `key` on a background thread unless a reload is already
+        running. Readers keep getting the current value meanwhile."""
+        with self._guard:
+            if key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                with self._lock_for(key):
+                    self._load(key)
+            except Exception as e:
+                print(f"⚠️ {self.name} refresh failed (serving previous value): {e}")
+            finally:
+                with self._guard:
+                    self._refreshing.discard(key)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    # Startup warm-up is just a refresh of a key nobody has read yet.
+    warm = refresh
+
+    def invalidate(self, key=None):
+        """Mark `key` stale: the next read serves the current value and
+        triggers a reload."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries[key] = (entry[0], float('-inf'), entry[2])
+
+    def clear(self, key=None):
+        """Drop `key` entirely: the next read blocks on a fresh load."""
+        self._entries.pop(key, None)
@@ -23,11 +23,13 @@ def init_app(app):
     idempotent, self-healing migrations (whatsapp_bot.migrate) so the live schema
     tracks the models without a manual SQL step — schema.sql remains the human
     reference (and still holds the optional Part 2 RLS for the site tables).
+    It then starts this process's inbound worker pool (whatsapp_bot.jobs),
+    sized by WA_JOB_WORKERS (0 = this process only enqueues).
 
     Must be called AFTER ``instagram_automation.init_app`` so the shared db is
     initialized first.
     """
-    from . import approvals, backfill, models, webhooks  # noqa: F401  (import for side effects)
+    from . import approvals, backfill, jobs, models, webhooks  # noqa: F401  (import for side effects)
     from .migrate import run_migrations
 
     app.register_blueprint(wa_bp)
@@ -35,6 +37,9 @@ def init_app(app):
         run_migrations(app)
     except Exception:  # never let a migration issue block app startup
         logging.getLogger("whatsapp_bot").exception("wa migrate: run_migrations failed")
+    # Workers only touch the db inside their loop (and retry), so this is safe
+    # even where db.init_app runs after us (run_wa_local.py).
+    jobs.start_workers(app)
 
     # Startup visibility: surface whether the RUNNING process actually sees the
     # email/storage config, so a missing env var isn't an invisible no-op.
@@ -0,0 +1,156 @@
+"""Company aliases and the exact-lookup fast path for typed company names.
+
+find_company() resolves what a user typed with ONE query, as a UNION ALL of
+indexed equality probes in priority order:
+
+  0. wa_companies.normalized_name — the old exact match;
+  1. wa_company_aliases.match_key — admin-added or learned alternate names;
+  2. wa_companies.match_key — "Monday Ltd", "monday.com", "Check-Point".
+
+The best probe that names exactly one company wins. A key shared by several
+companies is ambiguous and resolves to nothing, so the candidate flow falls
+through to its "did you mean?" suggestions.
+
+sound_alikes() matches Hebrew input on wa_companies.sound_key ("מאנדיי" ->
+Monday). Consonant skeletons collide easily ("מיינד" is "mnd" too), so these
+are only ever offered as suggestions for the user to confirm — never resolved
+directly, stored on a backfill request or learned as an alias.
+
+Aliases are learned from backfill requests that were resolved to a company
+under a different spelling (learn_from_requests(), run by the backfill cron),
+so the next user typing that spelling gets an alias hit. Each request is
+walked once (aliases_learned_at), so the cron's cost follows the new rows,
+not the table.
+"""
+import logging
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from database.models import db
+
+from .models import WaCompany, WaCompanyAlias, WaCompanyRequest
+from .names import has_hebrew, match_key, sound_key
+
+logger = logging.getLogger("whatsapp_bot")
+
+MIN_SOUND_KEY = 3  # "mt" (מטה) would suggest Meta for half the words typed
+
+
+def _probe(rank, column, condition):
+    return sa.select(sa.literal(rank, sa.Integer).label("rank"),
+                     column.label("company_id")).where(condition)
+
+
+def find_company(text):
+    """The WaCompany `text` unambiguously names, or None."""
+    norm = " ".join((text or "").strip().lower().split())
+    if not norm:
+        return None
+    probes = [_probe(0, WaCompany.id, WaCompany.normalized_name == norm)]
+    key = match_key(text)
+    if key:
+        probes.append(_probe(1, WaCompanyAlias.company_id, WaCompanyAlias.match_key == key))
+        probes.append(_probe(2, WaCompany.id, WaCompany.match_key == key))
+    hits = sa.union_all(*probes).subquery()
+    rows = (db.session.query(WaCompany, hits.c.rank)
+            .join(hits, hits.c.company_id == WaCompany.id)
+            .order_by(hits.c.rank).all())
+    by_rank = {}
+    for company, rank in rows:
+        by_rank.setdefault(rank, {})[company.id] = company
+    for rank in sorted(by_rank):
+        companies = by_rank[rank]
+        return next(iter(companies.values())) if len(companies) == 1 else None
+    return None
+
+
+def sound_alikes(text, limit=3):
+    """Companies whose name sounds like the Hebrew `text` — suggestions for
+    the candidate to confirm, not a resolution."""
+    if not has_hebrew(text):
+        return []
+    skey = sound_key(text)
+    if len(skey) < MIN_SOUND_KEY:
+        return []
+    return (WaCompany.query.filter(WaCompany.sound_key == skey)
+            .order_by(WaCompany.id).limit(limit).all())
+
+
+def learn_from_requests():
+    """Learn aliases from backfill requests resolved to a company since the
+    last run: each one is walked once, then stamped aliases_learned_at.
+    Returns how many aliases were added; the caller commits."""
+    req = WaCompanyRequest
+    new = req.query.filter(req.resolved_company_id.isnot(None), req.aliases_learned_at.is_(None))
+    spellings = (new.with_entities(req.company_name_raw, req.resolved_company_id)
+                 .group_by(req.company_name_raw, req.resolved_company_id)
+                 .order_by(sa.func.min(req.id)).all())
+    if not spellings:
+        return 0
+    wanted = {}
+    for raw, company_id in spellings:
+        key = match_key(raw)
+        if key:
+            wanted.setdefault(key, (raw.strip(), company_id))
+    # a key some alias or company already has finds that one: nothing to learn
+    taken = set()
+    if wanted:
+        taken.update(k for k, in db.session.query(WaCompanyAlias.match_key)
+                     .filter(WaCompanyAlias.match_key.in_(wanted)))
+        taken.update(k for k, in db.session.query(WaCompany.match_key)
+                     .filter(WaCompany.match_key.in_(wanted)))
+    learned = 0
+    for key, (raw, company_id) in wanted.items():
+        if key not in taken:
+            db.session.add(WaCompanyAlias(company_id=company_id, alias=raw, source="learned"))
+            logger.info("wa aliases: learned %r -> company %s", raw, company_id)
+            learned += 1
+    walked = sa.tuple_(req.company_name_raw, req.resolved_company_id).in_(
+        [tuple(row) for row in spellings])
+    new.filter(walked).update({req.aliases_learned_at: datetime.utcnow()},
+                              synchronize_session=False)
+    return learned
+
+
+def set_admin_aliases(company, names):
+    """Make `names` the company's aliases (learned ones included: the admin
+    sees and edits them all). Raises ValueError naming an alias that already
+    belongs to another company, or that is another company's own name (an
+    alias hit outranks the match_key probe and would silently redirect it);
+    the caller commits."""
+    wanted = {}
+    for name in names:
+        key = match_key(name)
+        if key and key != company.match_key:
+            wanted.setdefault(key, name.strip())
+    if wanted:
+        taken = (WaCompanyAlias.query
+                 .filter(WaCompanyAlias.match_key.in_(wanted),
+                         WaCompanyAlias.company_id != company.id)
+                 .first())
+        if taken is not None:
+            raise ValueError(f"'{taken.alias}' is already an alias of another company")
+        other = (WaCompany.query
+                 .filter(WaCompany.match_key.in_(wanted), WaCompany.id != company.id)
+                 .first())
+        if other is not None:
+            raise ValueError(f"'{wanted[other.match_key]}' is the name of another company ({other.name})")
+    for alias in WaCompanyAlias.query.filter_by(company_id=company.id).all():
+        if alias.match_key in wanted:
+            wanted.pop(alias.match_key)
+        else:
+            db.session.delete(alias)
+    for name in wanted.values():
+        db.session.add(WaCompanyAlias(company_id=company.id, alias=name, source="admin"))
+
+
+def fill_company_keys():
+    """Compute match_key/sound_key for companies that predate them (or were
+    seeded by SQL). Returns how many rows were filled."""
+    rows = WaCompany.query.filter(WaCompany.match_key.is_(None)).all()
+    for company in rows:
+        company.match_key = match_key(company.name)
+        company.sound_key = sound_key(company.name)
+    db.session.commit()
+    return len(rows)
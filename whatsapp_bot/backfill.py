@@ -8,7 +8,8 @@ the main app, and on the external cron):
   POST /wa/requests/<id>/notify   the admin marked a request handled → email that
                                   one candidate their company is now available.
   GET/POST /wa/backfill-cron      sweep: email every open request whose company
-                                  now has an active advocate, then mark handled.
+                                  now has an active advocate, then mark handled;
+                                  learn aliases from the resolved requests.
   GET/POST /wa/status-check       admin button: email every candidate with an
                                   application the "did you get hired?" check-in.
 """
@@ -20,7 +21,7 @@ from flask import jsonify, request
 
 from database.models import db
 
-from . import approvals, copy, emailer, messaging, storage, wa_bp
+from . import aliases, approvals, copy, emailer, messaging, storage, wa_bp
 from .config import WaConfig
 from .models import (WaAdvocate, WaApplication, WaApplicationRecipient,
                      WaCompany, WaCompanyRequest, WaUser)
@@ -43,6 +44,8 @@ def _resolve_company(req_row, company=None):
         company = WaCompany.query.get(req_row.resolved_company_id)
     if company is None and req_row.normalized_name:
         company = WaCompany.query.filter_by(normalized_name=req_row.normalized_name).first()
+    if company is None:
+        company = aliases.find_company(req_row.company_name_raw)
     return company
 
 
@@ -146,13 +149,20 @@ def backfill_cron():
         result = _notify(req_row, company)
         if result == "failed":
             continue  # transient (e.g. Brevo hiccup) — leave open to retry
+        # Only a routed request feeds aliases.learn_from_requests: the
+        # candidate was told this company is the one they asked for.
+        req_row.resolved_company_id = company.id
         req_row.status = "handled"
         db.session.commit()
         handled += 1
         if result == "sent":
             notified += 1
-    logger.info("wa backfill-cron: handled=%d notified=%d", handled, notified)
-    return jsonify({"handled": handled, "notified": notified})
+    db.session.commit()
+    learned = aliases.learn_from_requests()
+    db.session.commit()
+    logger.info("wa backfill-cron: handled=%d notified=%d learned_aliases=%d",
+                handled, notified, learned)
+    return jsonify({"handled": handled, "notified": notified, "learned_aliases": learned})
 
 
 _STATUS_RECHECK_DAYS = 25  # don't re-ask a candidate more often than ~monthly
@@ -14,7 +14,7 @@ from datetime import datetime, timedelta
 
 from database.models import db
 
-from . import approvals, conversation, copy, emailer, messaging, storage
+from . import aliases, approvals, company_index, conversation, copy, emailer, messaging, storage
 from .config import WaConfig
 from .models import (
     WaAdvocate,
@@ -177,7 +177,8 @@ def handle(user, conv, inbound):
 
 def _handle_company(user, conv, data, text):
     norm = _normalize(text)
-    company = WaCompany.query.filter_by(normalized_name=norm).first()
+    # exact name, alias or suffix/punctuation-insensitive spelling
+    company = aliases.find_company(text)
     if company:
         return _resolve_company(user, conv, data, company)
     # Reject vague / non-company answers ("all", "high tech", "don't know", a
@@ -185,8 +186,11 @@ def _handle_company(user, conv, data, text):
     if _is_vague_company(text):
         messaging.send_prompt(user.phone, copy.CAND_COMPANY_VAGUE)
         return "cand_company_vague"
-    # No exact match → offer close matches instead of forcing exact spelling.
-    similar = _find_similar(norm)
+    # No exact match → offer close matches instead of forcing exact spelling;
+    # a Hebrew spelling of a Latin name ("מאנדיי") is offered, never assumed.
+    similar = aliases.sound_alikes(text)
+    similar += [c for c in _find_similar(norm) if c not in similar]
+    similar = similar[:3]
     if similar:
         data["suggestions"] = [c.id for c in similar]
         conversation.set_state(conv, "candidate", "cand_company_suggest", data)
@@ -377,33 +381,14 @@ def _handle_after_link(user, conv, data, inbound):
 
 
 def _find_similar(norm, limit=3):
-    """Companies close to the typed name: fast substring match first, then a
-    bounded fuzzy/typo pass. Companies that have active advocates are preferred."""
-    if not norm:
+    """Companies close to the typed name: substring matches first, then a
+    fuzzy/typo pass. Companies that have active advocates are preferred.
+    Searches the in-memory company_index; only the hits are loaded."""
+    ids = company_index.get().search(norm, limit)
+    if not ids:
         return []
-    hits = (WaCompany.query
-            .filter(WaCompany.normalized_name.contains(norm))
-            .limit(20).all())
-    if not hits:
-        qtokens = set(norm.split())
-        scored = []
-        for c in WaCompany.query.all():  # company table is small; bounded scan
-            n = c.normalized_name or ""
-            if not n:
-                continue
-            ratio = difflib.SequenceMatcher(None, norm, n).ratio()
-            score = max(ratio, 0.85 if (qtokens & set(n.split())) else 0.0)
-            if n in norm or score >= 0.6:
-                scored.append((score, c))
-        scored.sort(key=lambda sc: -sc[0])
-        hits = [c for _, c in scored[: limit * 2]]
-    # advocate-having companies first (more useful suggestions), order otherwise kept
-    hits = sorted(hits, key=lambda c: 0 if _has_active_advocate(c.id) else 1)
-    return hits[:limit]
-
-
-def _has_active_advocate(company_id):
-    return WaAdvocate.query.filter_by(company_id=company_id, status="active").first() is not None
+    by_id = {c.id: c for c in WaCompany.query.filter(WaCompany.id.in_(ids))}
+    return [by_id[i] for i in ids if i in by_id]
 
 
 def _suggest_text(similar):
@@ -0,0 +1,149 @@
+"""In-memory company search for the candidate flow's "did you mean?" step.
+
+candidate._find_similar() runs on every company name we don't know. It used to
+LIKE-scan wa_companies, then on a miss load EVERY company and run difflib over
+each one, then query wa_advocates once per hit — a cost that grows with every
+backfill request adding a company. CompanyIndex instead holds, per company,
+the normalized name(s), padded character-trigram and word postings, and a
+precomputed "has an active advocate" flag, so a lookup only scores the few
+companies that share trigrams with what was typed.
+
+Aliases (whatsapp_bot/aliases.py) are indexed as extra names of their company.
+The index is built from three queries and reused until:
+- this process writes a company, alias or advocate (ORM insert/update/delete
+  events bump a generation counter), or
+- it is MAX_AGE_SECONDS old — the admin app and backfill requests write from
+  other processes, and bulk query.update()s skip the ORM events.
+"""
+import difflib
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import event
+
+from database.models import db
+
+from .models import WaAdvocate, WaCompany, WaCompanyAlias
+
+MAX_AGE_SECONDS = 60
+SUBSTRING_LIMIT = 20      # like the LIKE query's .limit(20)
+FUZZY_CANDIDATES = 64     # most trigram-similar names scored with difflib
+FUZZY_MIN_RATIO = 0.6
+TOKEN_MATCH_SCORE = 0.85  # a shared whole word counts as a strong match
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CompanyIndex:
+    """Search over (company_id, normalized name) entries. A company may have
+    several entries (aliases); results are company ids, best first."""
+
+    def __init__(self, entries, advocated):
+        self._entries = []   # (company_id, name, word set)
+        self._grams = {}     # trigram -> [entry positions]
+        self._words = {}     # word -> [entry positions]
+        self.advocated = frozenset(advocated)
+        for company_id, name in sorted(entries):
+            if not name:
+                continue
+            pos = len(self._entries)
+            words = set(name.split())
+            self._entries.append((company_id, name, words))
+            for gram in _trigrams(name):
+                self._grams.setdefault(gram, []).append(pos)
+            for word in words:
+                self._words.setdefault(word, []).append(pos)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _substring_hits(self, norm):
+        if len(norm) >= 3:
+            # every trigram of norm (unpadded) occurs in a name containing it
+            inner = [norm[i:i + 3] for i in range(len(norm) - 2)]
+            postings = sorted((self._grams.get(g, ()) for g in inner), key=len)
+            if not postings[0]:
+                return []
+            maybe = set(postings[0]).intersection(*postings[1:])
+        else:
+            maybe = range(len(self._entries))
+        return [p for p in sorted(maybe) if norm in self._entries[p][1]]
+
+    def _fuzzy_hits(self, norm):
+        shared = Counter()
+        for gram in _trigrams(norm):
+            shared.update(self._grams.get(gram, ()))
+        qwords = set(norm.split())
+        by_word = {p for w in qwords for p in self._words.get(w, ())}
+        picked = {p for p, _ in shared.most_common(FUZZY_CANDIDATES)} | by_word
+        scored = []
+        for p in sorted(picked):
+            name = self._entries[p][1]
+            ratio = difflib.SequenceMatcher(None, norm, name).ratio()
+            score = max(ratio, TOKEN_MATCH_SCORE if p in by_word else 0.0)
+            if name in norm or score >= FUZZY_MIN_RATIO:
+                scored.append((score, p))
+        scored.sort(key=lambda sp: -sp[0])
+        return [p for _, p in scored]
+
+    def search(self, norm, limit=3):
+        """Company ids close to `norm` (already normalized): names containing
+        it, else a typo-tolerant pass; companies with an active advocate first."""
+        if not norm or not self._entries:
+            return []
+        positions = self._substring_hits(norm)[:SUBSTRING_LIMIT]
+        cap = None
+        if not positions:
+            positions = self._fuzzy_hits(norm)
+            cap = limit * 2
+        ids = []
+        for p in positions:
+            company_id = self._entries[p][0]
+            if company_id not in ids:
+                ids.append(company_id)
+        ids = ids[:cap]
+        ids.sort(key=lambda cid: 0 if cid in self.advocated else 1)
+        return ids[:limit]
+
+
+_lock = threading.Lock()
+_generation = 0
+_built = None  # (generation, built at, CompanyIndex)
+
+
+def invalidate(*_args):
+    """Drop the cached index; the next get() rebuilds it."""
+    global _generation
+    with _lock:
+        _generation += 1
+
+
+for _model in (WaCompany, WaAdvocate, WaCompanyAlias):
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, invalidate)
+
+
+def _build():
+    entries = db.session.query(WaCompany.id, WaCompany.normalized_name).all()
+    entries += [(cid, " ".join(alias.lower().split())) for cid, alias in
+                db.session.query(WaCompanyAlias.company_id, WaCompanyAlias.alias)]
+    advocated = {cid for (cid,) in (db.session.query(WaAdvocate.company_id)
+                                    .filter(WaAdvocate.status == "active").distinct())}
+    return CompanyIndex(entries, advocated)
+
+
+def get():
+    """The current CompanyIndex, rebuilt if stale."""
+    global _built
+    with _lock:
+        generation, hit = _generation, _built
+    if hit is not None and hit[0] == generation and time.monotonic() - hit[1] < MAX_AGE_SECONDS:
+        return hit[2]
+    index = _build()
+    with _lock:
+        _built = (generation, time.monotonic(), index)
+    return index
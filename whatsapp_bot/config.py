@@ -171,5 +171,19 @@ class _WaConfig:
     def MAX_RESULTS(self):
         return int(os.environ.get("WA_MAX_RESULTS", "5"))
 
+    # ---- Inbound job queue (whatsapp_bot/jobs.py) ----
+    @property
+    def JOB_WORKERS(self):
+        # Shards (single-thread FIFOs keyed by phone) per process handling
+        # queued inbound messages. 0 = no pool in this process (another
+        # service drains the queue).
+        return int(os.environ.get("WA_JOB_WORKERS", "4"))
+
+    @property
+    def JOB_STALE_MINUTES(self):
+        # A job 'running' this long belonged to a worker that died; it's failed
+        # (not retried: inbound handling is at-most-once) so the phone unblocks.
+        return int(os.environ.get("WA_JOB_STALE_MINUTES", "10"))
+
 
 WaConfig = _WaConfig()
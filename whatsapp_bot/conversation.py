@@ -1,6 +1,8 @@
 """User identity + per-user conversation state (DB-backed state machine store)."""
 from datetime import datetime
 
+from sqlalchemy.exc import IntegrityError
+
 from database.models import db
 
 from .models import WaConversation, WaUser
@@ -19,11 +21,20 @@ def get_or_create_user(phone, profile_name=None):
 
 
 def get_state(user):
-    conv = WaConversation.query.filter_by(user_id=user.id).first()
+    """The user's conversation row, row-locked (SELECT ... FOR UPDATE; a no-op
+    on SQLite) until the turn's next commit — normally the set_state() that
+    writes the next step. A second turn for the same user that slips past the
+    job queue's per-phone ordering (e.g. another service) waits here for that
+    write instead of reading state that is about to be replaced."""
+    query = WaConversation.query.filter_by(user_id=user.id).with_for_update()
+    conv = query.first()
     if conv is None:
-        conv = WaConversation(user_id=user.id, flow=None, step=None, data={})
-        db.session.add(conv)
-        db.session.commit()
+        db.session.add(WaConversation(user_id=user.id, flow=None, step=None, data={}))
+        try:
+            db.session.commit()
+        except IntegrityError:  # a concurrent first message created it
+            db.session.rollback()
+        conv = query.one()
     return conv
 
 
@@ -0,0 +1,313 @@
+"""Inbound message queue: the webhook enqueues, a worker pool handles.
+
+The webhook used to run router.handle() — DB lookups, Twilio REST sends, the
+résumé download + Supabase upload — before answering Twilio, holding a
+gunicorn thread for the whole conversation turn and racing Twilio's 15s
+timeout. Now the webhook's one INSERT (the wa_inbound_messages audit row that
+already claims the MessageSid) is also the job, with job_status='queued', and
+threads started by init_app work the queue:
+
+- claim: the oldest queued message whose phone has nothing older still
+  queued and nothing running — so one user's messages are handled strictly in
+  arrival order, one at a time, while different users run in parallel. On
+  Postgres the claim is SELECT ... FOR UPDATE SKIP LOCKED, so the pools of
+  several gunicorn workers (or services) share the queue without
+  double-handling; SQLite (tests/local) has no row locks and claims with a
+  conditional UPDATE instead;
+- handle: router.handle() exactly as the webhook used to, including the
+  error reply; the audit fields are filled in, the job marked done/failed
+  and the turn's outbound log rows written, all in one commit;
+- stale: a job left 'running' by a worker that died is failed after
+  WaConfig.JOB_STALE_MINUTES (never re-run: inbound handling stays
+  at-most-once) so that phone isn't blocked forever. A shard restamps
+  locked_at when it actually starts a job, so time spent waiting behind a
+  slow job doesn't count, and skips a job the sweep failed meanwhile.
+
+Inside a process the handling runs on a ShardedExecutor: one dispatcher
+thread claims jobs and hands each to shard crc32(phone) % WA_JOB_WORKERS, a
+single thread with its own FIFO. So a phone's messages are serialized in
+process even if the DB ordering were ever bypassed (a stale job failed by the
+sweep while its handler is still going lands behind it on the same shard),
+and conversation.get_state() row-locks wa_conversations as the cross-process
+backstop. Different phones spread over the shards and run in parallel; at
+most SHARD_BACKLOG claimed jobs wait on any one shard, so a slow phone holds
+back only its own shard and leaves the rest of the queue to other workers.
+
+The dispatcher wakes on notify() from the webhook in this process and polls
+every POLL_SECONDS for messages enqueued by other processes.
+"""
+import logging
+import queue
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.orm import aliased
+
+from database.models import db
+
+from . import messaging, router
+from .config import WaConfig
+from .copy import ERROR
+from .models import WaInboundMessage
+
+logger = logging.getLogger("whatsapp_bot")
+
+POLL_SECONDS = 1.0
+SWEEP_SECONDS = 60
+SHARD_BACKLOG = 2   # claimed jobs allowed to wait on one shard
+CLAIM_SCAN = 20     # claimable candidates looked at per claim
+
+_wake = threading.Event()
+_claim_lock = threading.Lock()  # claims are quick; one at a time per process
+_pool = None
+_last_sweep = 0.0
+
+
+def notify():
+    """A message was just enqueued: wake this process's workers."""
+    _wake.set()
+
+
+def inbound_event(row):
+    """router.handle()'s inbound dict, rebuilt from a queued row."""
+    payload = row.payload or {}
+    return {
+        "phone": row.from_phone,
+        "profile_name": row.profile_name,
+        "body": row.body or "",
+        "button_payload": payload.get("button_payload"),
+        "num_media": row.num_media,
+        "media_url": payload.get("media_url"),
+        "media_content_type": payload.get("media_content_type"),
+    }
+
+
+def _claimable():
+    """Queued messages that are their phone's oldest queued one, for a phone
+    with nothing running."""
+    job = WaInboundMessage
+    running, older = aliased(WaInboundMessage), aliased(WaInboundMessage)
+    return (job.query
+            .filter(job.job_status == "queued")
+            .filter(~sa.exists().where(running.from_phone == job.from_phone,
+                                       running.job_status == "running"))
+            .filter(~sa.exists().where(older.from_phone == job.from_phone,
+                                       older.job_status == "queued",
+                                       older.id < job.id))
+            .order_by(job.id))
+
+
+def claim_next(accept=None):
+    """Move the next claimable message to 'running' and return it, or None.
+    `accept(phone)` can pass over phones the caller has no room for."""
+    with _claim_lock:
+        query = (_claimable()
+                 .with_entities(WaInboundMessage.id, WaInboundMessage.from_phone)
+                 .limit(1 if accept is None else CLAIM_SCAN))
+        if db.engine.dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True, of=WaInboundMessage)
+        job_id = next((job_id for job_id, phone in query
+                       if accept is None or accept(phone)), None)
+        claimed = 0
+        if job_id is not None:
+            claimed = WaInboundMessage.query.filter_by(id=job_id, job_status="queued").update(
+                {"job_status": "running", "locked_at": datetime.utcnow()},
+                synchronize_session=False)
+        db.session.commit()
+    return db.session.get(WaInboundMessage, job_id) if claimed else None
+
+
+def process(row):
+    """Handle one claimed message (the old synchronous webhook body)."""
+    started = time.monotonic()
+    parsed_command = None
+    error_text = None
+    try:
+        parsed_command = router.handle(inbound_event(row))
+    except Exception as exc:
+        db.session.rollback()  # clear any aborted transaction so we can log + reply
+        logger.exception("wa jobs: handler error for sid %s", row.message_sid)
+        parsed_command = "error"
+        error_text = str(exc)
+        try:
+            messaging.send_text(row.from_phone, ERROR["en"])
+        except Exception:
+            db.session.rollback()
+            logger.exception("wa jobs: failed to send error reply")
+    finally:
+        row.parsed_command = parsed_command
+        row.response_summary = (parsed_command or "")[:200]
+        row.processing_ms = int((time.monotonic() - started) * 1000)
+        row.error = error_text
+        row.job_status = "failed" if error_text else "done"
+        row.processed_at = datetime.utcnow()
+        try:
+            messaging.flush_log()  # the turn's replies, in the same commit
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logger.exception("wa jobs: failed to finish job for sid %s", row.message_sid)
+
+
+def start(job_id):
+    """Restamp a claimed job as its handling starts and return it, or None
+    when the sweep failed it while it waited (it must not run after all)."""
+    started = WaInboundMessage.query.filter_by(id=job_id, job_status="running").update(
+        {"locked_at": datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    if not started:
+        logger.warning("wa jobs: job %s was failed as stale before it started; skipped", job_id)
+        return None
+    return db.session.get(WaInboundMessage, job_id)
+
+
+def sweep_stale():
+    """Fail jobs a dead worker left 'running'. Returns how many."""
+    cutoff = datetime.utcnow() - timedelta(minutes=WaConfig.JOB_STALE_MINUTES)
+    n = WaInboundMessage.query.filter(
+        WaInboundMessage.job_status == "running",
+        WaInboundMessage.locked_at < cutoff,
+    ).update({"job_status": "failed", "error": "abandoned: worker stopped mid-job",
+              "processed_at": datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    if n:
+        logger.warning("wa jobs: failed %d stale running job(s)", n)
+    return n
+
+
+def _maybe_sweep():
+    global _last_sweep
+    if time.monotonic() - _last_sweep >= SWEEP_SECONDS:
+        _last_sweep = time.monotonic()
+        sweep_stale()
+
+
+def run_once():
+    """Claim and handle one message. False when the queue had nothing for us."""
+    _maybe_sweep()
+    row = claim_next()
+    if row is None:
+        return False
+    process(row)
+    return True
+
+
+def drain():
+    """Handle claimable messages until there are none (tests, one-off runs)."""
+    n = 0
+    while run_once():
+        n += 1
+    return n
+
+
+class ShardedExecutor:
+    """Runs tasks on `shards` single-thread FIFOs. A key always maps to the
+    same shard, so tasks for one key run one at a time in submission order;
+    different keys run in parallel."""
+
+    def __init__(self, shards, name="wa-jobs"):
+        self._queues = [queue.Queue() for _ in range(shards)]
+        self._threads = [threading.Thread(target=self._run, args=(q,), daemon=True,
+                                          name=f"{name}-{i}")
+                         for i, q in enumerate(self._queues)]
+        for t in self._threads:
+            t.start()
+
+    def shard_of(self, key):
+        return zlib.crc32(key.encode("utf-8")) % len(self._queues)
+
+    def submit(self, key, fn, *args):
+        self._queues[self.shard_of(key)].put((fn, args))
+
+    def shutdown(self, timeout=None):
+        for q in self._queues:
+            q.put(None)
+        for t in self._threads:
+            t.join(timeout)
+
+    @staticmethod
+    def _run(q):
+        while True:
+            task = q.get()
+            if task is None:
+                return
+            fn, args = task
+            try:
+                fn(*args)
+            except Exception:
+                logger.exception("wa jobs: shard task error")
+
+
+class JobPool:
+    """This process's queue consumer: a dispatcher thread claiming jobs into a
+    ShardedExecutor keyed by phone. At most SHARD_BACKLOG claimed jobs wait
+    on each shard, so a slow phone stalls only its own shard and a busy
+    process leaves the rest of the queue to the others."""
+
+    def __init__(self, app, shards):
+        self.app = app
+        self.executor = ShardedExecutor(shards)
+        self._waiting = [0] * shards  # claimed, not yet started, per shard
+        self._waiting_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True,
+                                            name="wa-jobs-dispatch")
+
+    def start(self):
+        self._dispatcher.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        _wake.set()
+        self._dispatcher.join(timeout)
+        self.executor.shutdown(timeout)
+
+    def _has_room(self, phone):
+        return self._waiting[self.executor.shard_of(phone)] < SHARD_BACKLOG
+
+    def _claim(self):
+        try:
+            with self.app.app_context():
+                _maybe_sweep()
+                row = claim_next(accept=self._has_room)
+                return (row.id, row.from_phone) if row else None
+        except Exception:
+            logger.exception("wa jobs: claim failed")
+            return None
+
+    def _dispatch(self):
+        while not self._stop.is_set():
+            job = self._claim()
+            if job is None:
+                _wake.wait(POLL_SECONDS)
+                _wake.clear()
+                continue
+            job_id, phone = job
+            shard = self.executor.shard_of(phone)
+            with self._waiting_lock:
+                self._waiting[shard] += 1
+            self.executor.submit(phone, self._handle, job_id, shard)
+
+    def _handle(self, job_id, shard):
+        with self._waiting_lock:
+            self._waiting[shard] -= 1
+        _wake.set()  # room on this shard: the dispatcher may claim again
+        with self.app.app_context():
+            row = start(job_id)
+            if row is not None:
+                process(row)
+
+
+def start_workers(app, workers=None):
+    """Start this process's pool (once). workers=0 leaves the queue to others."""
+    global _pool
+    workers = WaConfig.JOB_WORKERS if workers is None else workers
+    if _pool is not None or workers <= 0:
+        return _pool
+    _pool = JobPool(app, workers).start()
+    logger.info("wa jobs: dispatcher + %d shard(s) started", workers)
+    return _pool
@@ -2,10 +2,24 @@
 
 Replies are sent here (not via TwiML) because WhatsApp interactive buttons
 require the Content API. Every send is logged to wa_outbound_messages.
+
+A turn sends 2-4 messages, so per-send overhead matters: all sends share one
+process-wide Twilio client whose pooled requests Session keeps the TLS
+connection to api.twilio.com alive, and the log rows are buffered per app
+context (flask.g) and written together by flush_log() in the inbound job's
+final commit or at the end of a /wa request, instead of a commit per send.
+The buffer lives outside the session, so a handler rollback can't drop the
+record of a message that really went out. Past LOG_BATCH rows the buffer is
+moved into the session, never committed: a commit mid-turn would end the
+handler's transaction (and the conversation row lock it holds).
 """
 import json
 import logging
+import threading
 
+from flask import g
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
 
 from database.models import db
@@ -15,9 +29,25 @@ from .models import WaOutboundMessage
 
 logger = logging.getLogger("whatsapp_bot")
 
+HTTP_TIMEOUT = 30
+LOG_BATCH = 8
+
+_client_lock = threading.Lock()
+_shared_client = None  # (credentials, Client)
+
 
 def _client():
-    return Client(WaConfig.TWILIO_ACCOUNT_SID, WaConfig.TWILIO_AUTH_TOKEN)
+    """The process-wide Twilio client (rebuilt if the credentials change)."""
+    global _shared_client
+    creds = (WaConfig.TWILIO_ACCOUNT_SID, WaConfig.TWILIO_AUTH_TOKEN)
+    with _client_lock:
+        if _shared_client is None or _shared_client[0] != creds:
+            http = TwilioHttpClient(pool_connections=True, timeout=HTTP_TIMEOUT)
+            # one kept-alive connection per concurrent sender (the job shards)
+            http.session.mount("https://", HTTPAdapter(
+                pool_maxsize=max(10, WaConfig.JOB_WORKERS)))
+            _shared_client = (creds, Client(*creds, http_client=http))
+        return _shared_client[1]
 
 
 def _to(phone):
@@ -35,12 +65,23 @@ def _route_kwargs():
 
 
 def _log(to_phone, twilio_sid=None, status=None, body=None, content_sid=None, error=None):
-    row = WaOutboundMessage(
+    buffered = g.setdefault("wa_outbound", [])
+    buffered.append(WaOutboundMessage(
         to_phone=to_phone, body=body, content_sid=content_sid,
         twilio_sid=twilio_sid, status=status, error=error,
-    )
-    db.session.add(row)
-    db.session.commit()
+    ))
+    if len(buffered) >= LOG_BATCH:
+        flush_log()  # the caller's commit (jobs.process, request teardown) writes them
+
+
+def flush_log(commit=False):
+    """Move this context's buffered outbound rows into the session — into the
+    caller's transaction, or committed here with commit=True."""
+    rows = g.pop("wa_outbound", None)
+    if rows:
+        db.session.add_all(rows)
+    if commit:
+        db.session.commit()
 
 
 def send_text(to_phone, body):
@@ -83,6 +83,14 @@ _STATEMENTS = [
         created_at  timestamptz not null default now(),
         updated_at  timestamptz not null default now()
     )""",
+    """create table if not exists public.wa_company_aliases (
+        id          bigint generated by default as identity primary key,
+        company_id  bigint not null references public.wa_companies(id),
+        alias       text not null,
+        match_key   text not null unique,
+        source      text not null default 'admin',
+        created_at  timestamptz not null default now()
+    )""",
     """create table if not exists public.wa_company_requests (
         id                  bigint generated by default as identity primary key,
         candidate_user_id   bigint not null references public.wa_users(id),
@@ -148,6 +156,17 @@ _STATEMENTS = [
     "alter table public.wa_users add column if not exists terms_notice_sent_at timestamptz",
     # Soft delete (profile → delete): user is treated as new; cleared on re-signup.
     "alter table public.wa_users add column if not exists deleted_at timestamptz",
+    # Company lookup keys (whatsapp_bot/names.py); existing rows are filled in
+    # by run_migrations() below, since the keys are computed in Python.
+    "alter table public.wa_companies add column if not exists match_key text",
+    "alter table public.wa_companies add column if not exists sound_key text",
+    # Inbound job queue (whatsapp_bot/jobs.py): the audit row is the job.
+    "alter table public.wa_inbound_messages add column if not exists payload jsonb",
+    "alter table public.wa_inbound_messages add column if not exists job_status text",
+    "alter table public.wa_inbound_messages add column if not exists locked_at timestamptz",
+    "alter table public.wa_inbound_messages add column if not exists processed_at timestamptz",
+    # Resolved backfill requests already turned into aliases (whatsapp_bot/aliases.py).
+    "alter table public.wa_company_requests add column if not exists aliases_learned_at timestamptz",
     # ---- seed known careers pages, keyed by normalized_name (fills NULL only,
     # so admin edits via /admin → WhatsApp → Companies are never overwritten;
     # all URLs verified live 2026-07-11, updated 2026-07-13) ----
@@ -234,6 +253,16 @@ _STATEMENTS = [
     # ---- indexes ----
     """create index if not exists ix_wa_inbound_from_created
         on public.wa_inbound_messages (from_phone, created_at)""",
+    # partial: only the live queue is indexed, not the whole message history
+    """create index if not exists ix_wa_inbound_job
+        on public.wa_inbound_messages (job_status, from_phone, id)
+        where job_status in ('queued', 'running')""",
+    "create index if not exists ix_wa_companies_match_key on public.wa_companies (match_key)",
+    "create index if not exists ix_wa_companies_sound_key on public.wa_companies (sound_key)",
+    # partial: only the resolved requests learn_from_requests() hasn't walked yet
+    """create index if not exists ix_wa_company_requests_unlearned
+        on public.wa_company_requests (id)
+        where resolved_company_id is not null and aliases_learned_at is null""",
     # an advocate may register several work emails per company → unique per email
     "drop index if exists uq_wa_advocates_user_company",
     """create unique index if not exists uq_wa_advocates_user_company_email
@@ -249,6 +278,7 @@ _STATEMENTS = [
     "alter table public.wa_inbound_messages      enable row level security",
     "alter table public.wa_advocates             enable row level security",
     "alter table public.wa_company_requests      enable row level security",
+    "alter table public.wa_company_aliases       enable row level security",
     "alter table public.wa_applications          enable row level security",
     "alter table public.wa_application_recipients enable row level security",
     "alter table public.wa_contact_messages       enable row level security",
@@ -270,3 +300,11 @@ def run_migrations(app):
                 failed += 1
                 logger.exception("wa migrate: statement failed: %s", " ".join(stmt.split())[:90])
         logger.info("wa migrate: %d applied, %d failed", applied, failed)
+        try:
+            from .aliases import fill_company_keys
+            filled = fill_company_keys()
+            if filled:
+                logger.info("wa migrate: computed lookup keys for %d companies", filled)
+        except Exception:
+            db.session.rollback()
+            logger.exception("wa migrate: filling company lookup keys failed")
@@ -8,8 +8,12 @@ in tests (sqlite).
 """
 from datetime import datetime
 
+from sqlalchemy.orm import validates
+
 from database.models import db
 
+from .names import match_key, sound_key
+
 
 def _pk():
     """A bigint identity primary key that also autoincrements on SQLite.
@@ -31,11 +35,41 @@ class WaCompany(db.Model):
     normalized_name = db.Column(db.Text, nullable=False, unique=True)  # lower(trim(name))
     careers_url = db.Column(db.Text)  # company jobs page, shown on /hitech/referrals-bot
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Precomputed lookup keys (whatsapp_bot/names.py), kept in step with `name`.
+    match_key = db.Column(db.Text, index=True)
+    sound_key = db.Column(db.Text, index=True)
+
+    @validates("name")
+    def _set_keys(self, key, name):
+        self.match_key = match_key(name)
+        self.sound_key = sound_key(name)
+        return name
 
     def __repr__(self):
         return f"<WaCompany {self.name!r}>"
 
 
+class WaCompanyAlias(db.Model):
+    """Another name a company is known by ("מאנדיי" -> monday.com). Admin-added
+    or learned from backfill requests that ops resolved to a company."""
+    __tablename__ = "wa_company_aliases"
+
+    id = _pk()
+    company_id = db.Column(db.BigInteger, db.ForeignKey("wa_companies.id"), nullable=False)
+    alias = db.Column(db.Text, nullable=False)
+    match_key = db.Column(db.Text, nullable=False, unique=True)
+    source = db.Column(db.Text, nullable=False, default="admin")  # admin | learned
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @validates("alias")
+    def _set_key(self, key, alias):
+        self.match_key = match_key(alias)
+        return alias
+
+    def __repr__(self):
+        return f"<WaCompanyAlias {self.alias!r} -> {self.company_id}>"
+
+
 class WaAdvocate(db.Model):
     """An employee who will receive/refer candidate applications for a company."""
     __tablename__ = "wa_advocates"
@@ -79,6 +113,7 @@ class WaCompanyRequest(db.Model):
     reason = db.Column(db.Text, nullable=False)  # unknown_company | no_advocates
     status = db.Column(db.Text, nullable=False, default="open")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    aliases_learned_at = db.Column(db.DateTime)  # walked by aliases.learn_from_requests
 
     def __repr__(self):
         return f"<WaCompanyRequest {self.company_name_raw!r} {self.reason}>"
@@ -204,10 +239,12 @@ class WaOutboundMessage(db.Model):
 
 
 class WaInboundMessage(db.Model):
-    """The webhook-event log AND the idempotency key store.
+    """The webhook-event log, the idempotency key store AND the job queue.
 
     ``message_sid`` is UNIQUE: claiming it (INSERT + commit) before any side
-    effect is what makes the webhook idempotent.
+    effect is what makes the webhook idempotent. The same INSERT enqueues the
+    message (job_status='queued'); whatsapp_bot/jobs.py works it off. Rows from
+    before the queue have job_status NULL.
     """
 
     __tablename__ = "wa_inbound_messages"
@@ -223,6 +260,15 @@ class WaInboundMessage(db.Model):
     processing_ms = db.Column(db.Integer)
     error = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # ---- job queue ----
+    payload = db.Column(db.JSON)          # the rest of router.handle()'s inbound dict
+    job_status = db.Column(db.Text)       # queued | running | done | failed
+    locked_at = db.Column(db.DateTime)    # when a worker claimed it
+    processed_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("ix_wa_inbound_job", "job_status", "from_phone", "id"),
+    )
 
     def __repr__(self):
         return f"<WaInboundMessage {self.message_sid}>"
@@ -0,0 +1,75 @@
+"""Company-name keys for exact lookups (no DB access; models.py uses these).
+
+`normalized_name` is just lower(trim(name)), so "Monday", "monday.com" and
+"Monday Ltd" are three different companies to an equality lookup. Two keys
+fold such spellings together:
+
+- match_key(): case, punctuation, spacing, a trailing domain (".com",
+  ".co.il", ...), leading "the" and legal suffixes (Ltd, Inc, בע"מ, ...)
+  removed — "Check-Point Software Ltd." -> "checkpointsoftware".
+- sound_key(): match_key() transliterated to a Latin consonant skeleton, so
+  a Hebrew spelling can meet the Latin one — "מאנדיי" and "Monday" both give
+  "mnd". Much looser; only used for Hebrew input, and only to suggest a
+  company (whatsapp_bot/aliases.py).
+"""
+import re
+import unicodedata
+
+_SUFFIXES = {"ltd", "limited", "inc", "incorporated", "llc", "llp", "corp", "corporation",
+             "co", "company", "plc", "gmbh", "ag", "sa", "bv"}
+_DOMAIN = re.compile(r"\.(?:co\.il|org\.il|com|io|ai|co|net|org|il|tech|dev|app)(?=[\s/]|$)")
+_HEB_LTD = re.compile(r"\s*בע[\"'״׳]?מ\s*$")  # בע"מ, Hebrew "Ltd."
+_HEB_FINALS = str.maketrans("ךםןףץ", "כמנפצ")
+
+# Hebrew -> Latin for sound_key(). Matres lectionis (א ה ו י ע) and ח are
+# dropped like the Latin vowels and h; ב/פ are folded with v/f on both sides.
+# A word-initial ו is a consonant (ויקס = Wix), like the doubled וו.
+_HEB_DIGRAPHS = (("צ'", "ch"), ("צ׳", "ch"), ("ג'", "j"), ("ג׳", "j"),
+                 ("ז'", "zh"), ("ז׳", "zh"), ("וו", "v"))
+_HEB_LETTERS = {"א": "", "ב": "v", "ג": "g", "ד": "d", "ה": "", "ו": "", "ז": "z",
+                "ח": "", "ט": "t", "י": "", "כ": "k", "ל": "l", "מ": "m", "נ": "n",
+                "ס": "s", "ע": "", "פ": "p", "צ": "ts", "ק": "k", "ר": "r", "ש": "s",
+                "ת": "t"}
+_HEB_INITIAL_VAV = re.compile(r"(?<![א-ת])ו")
+_LATIN_FOLDS = (("sch", "s"), ("ch", "\x01"), ("sh", "s"), ("ph", "p"), ("ck", "k"),
+                ("tz", "ts"), ("c", "k"), ("q", "k"), ("x", "ks"), ("w", "v"),
+                ("b", "v"), ("f", "p"), ("\x01", "c"))
+
+
+def has_hebrew(text):
+    return any("א" <= ch <= "ת" for ch in text or "")
+
+
+def _clean(name):
+    s = unicodedata.normalize("NFKC", name or "").casefold()
+    # niqqud / cantillation marks; the maqaf (Hebrew hyphen) becomes a space
+    s = "".join(" " if ch == "־" else ch for ch in s
+                if not ("֑" <= ch <= "ׇ") or ch == "־")
+    return s.translate(_HEB_FINALS)
+
+
+def match_key(name):
+    """Spelling-insensitive key for a company name ('' if nothing is left)."""
+    s = _clean(name).replace("&", " and ")
+    s = re.sub(r"^\s*(?:https?://)?(?:www\.)?", "", s)
+    s = _DOMAIN.sub(" ", s)
+    s = _HEB_LTD.sub("", s)
+    tokens = re.sub(r"[^\w\s]|_", " ", s).split()
+    if len(tokens) > 1 and tokens[0] == "the":
+        tokens = tokens[1:]
+    while len(tokens) > 1 and tokens[-1] in _SUFFIXES:
+        tokens.pop()
+    return "".join(tokens)
+
+
+def sound_key(name):
+    """Consonant skeleton of match_key(), Hebrew transliterated."""
+    s = _clean(name)
+    for heb, latin in _HEB_DIGRAPHS:
+        s = s.replace(heb, latin)
+    s = _HEB_INITIAL_VAV.sub("v", s)
+    s = "".join(_HEB_LETTERS.get(ch, ch) for ch in match_key(s))
+    for a, b in _LATIN_FOLDS:
+        s = s.replace(a, b)
+    s = re.sub(r"[aeiouyh]", "", s)
+    return re.sub(r"(.)\1+", r"\1", s)
@@ -14,7 +14,21 @@ create table if not exists public.wa_companies (
     name            text not null,
     normalized_name text not null unique,            -- lower(trim(name))
     careers_url     text,                            -- company jobs page (/hitech/referrals-bot cards)
-    created_at      timestamptz not null default now()
+    created_at      timestamptz not null default now(),
+    match_key       text,                            -- whatsapp_bot/names.py match_key(name)
+    sound_key       text                             -- ... sound_key(name) (Hebrew lookups)
+);
+create index if not exists ix_wa_companies_match_key on public.wa_companies (match_key);
+create index if not exists ix_wa_companies_sound_key on public.wa_companies (sound_key);
+
+-- other names a company is known by: admin-added or learned from resolved requests
+create table if not exists public.wa_company_aliases (
+    id          bigint generated by default as identity primary key,
+    company_id  bigint not null references public.wa_companies(id),
+    alias       text not null,
+    match_key   text not null unique,                -- match_key(alias)
+    source      text not null default 'admin',       -- admin | learned
+    created_at  timestamptz not null default now()
 );
 
 create table if not exists public.wa_users (
@@ -67,10 +81,17 @@ create table if not exists public.wa_inbound_messages (
     response_summary text,
     processing_ms    integer,
     error            text,
-    created_at       timestamptz not null default now()
+    created_at       timestamptz not null default now(),
+    payload          jsonb,                           -- job queue: rest of the inbound event
+    job_status       text,                            -- queued|running|done|failed (NULL = pre-queue row)
+    locked_at        timestamptz,
+    processed_at     timestamptz
 );
 create index if not exists ix_wa_inbound_from_created
     on public.wa_inbound_messages (from_phone, created_at);
+create index if not exists ix_wa_inbound_job
+    on public.wa_inbound_messages (job_status, from_phone, id)
+    where job_status in ('queued', 'running');
 
 create table if not exists public.wa_advocates (
     id          bigint generated by default as identity primary key,
@@ -101,8 +122,12 @@ create table if not exists public.wa_company_requests (
     resolved_company_id bigint references public.wa_companies(id),
     reason              text not null,                  -- unknown_company | no_advocates
     status              text not null default 'open',
-    created_at          timestamptz not null default now()
+    created_at          timestamptz not null default now(),
+    aliases_learned_at  timestamptz                      -- walked by aliases.learn_from_requests()
 );
+create index if not exists ix_wa_company_requests_unlearned
+    on public.wa_company_requests (id)
+    where resolved_company_id is not null and aliases_learned_at is null;
 
 create table if not exists public.wa_applications (
     id                bigint generated by default as identity primary key,
@@ -154,6 +179,7 @@ alter table public.wa_outbound_messages enable row level security;
 alter table public.wa_inbound_messages  enable row level security;
 alter table public.wa_advocates         enable row level security;
 alter table public.wa_company_requests  enable row level security;
+alter table public.wa_company_aliases   enable row level security;
 alter table public.wa_applications          enable row level security;
 alter table public.wa_application_recipients enable row level security;
 alter table public.wa_contact_messages       enable row level security;
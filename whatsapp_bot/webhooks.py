@@ -3,24 +3,25 @@
 POST /wa/webhook is the single inbound endpoint. The flow (plan §3) is:
 
   1. Verify the X-Twilio-Signature against the PINNED webhook URL (fail closed).
-  2. Claim the MessageSid: INSERT the audit row + COMMIT *before* any side
-     effect. A duplicate SID raises IntegrityError -> we reply with empty TwiML
-     (Twilio sends nothing) and do no reprocessing (idempotency).
-  3. Route to the conversation state machine (whatsapp_bot.router), wrapped so a
-     failure still leaves a debuggable audit row. Replies are sent via the Twilio
-     REST API inside the router/messaging layer, not via TwiML (WhatsApp buttons
-     require the Content API).
-  4. Finalise the audit row (parsed_command, processing_ms, error) and COMMIT.
-  5. Return an empty TwiML 200 ack (the reply already went out via REST).
+  2. Claim the MessageSid and enqueue: INSERT the audit row (job_status
+     'queued', with the fields the router needs in `payload`) + COMMIT. A
+     duplicate SID raises IntegrityError -> we reply with empty TwiML (Twilio
+     sends nothing) and do no reprocessing (idempotency).
+  3. Return an empty TwiML 200 ack straight away.
+
+The conversation itself (whatsapp_bot.router) runs on the worker pool in
+whatsapp_bot.jobs, which also finalises the audit row (parsed_command,
+processing_ms, error). Replies are sent via the Twilio REST API, not via TwiML
+(WhatsApp buttons require the Content API), so nothing has to wait for them:
+the webhook is one INSERT, well inside Twilio's 15s timeout however slow the
+handler or Twilio's API are.
 
 Inbound webhooks are at-most-once (Twilio does not redeliver), so the
 idempotency claim is cheap insurance rather than the main reliability
-mechanism — but it makes the "handler finished, Twilio timed out, user retries"
-case safe.
+mechanism — but it makes the "Twilio timed out, user retries" case safe.
 """
 import json
 import logging
-import time
 
 from flask import Response, request
 from sqlalchemy.exc import IntegrityError
@@ -29,9 +30,9 @@ from twilio.twiml.messaging_response import MessagingResponse
 
 from database.models import db
 
-from . import messaging, router, wa_bp
+from . import jobs, messaging, wa_bp
 from .config import WaConfig
-from .copy import ERROR, TERMS_NOTICE
+from .copy import TERMS_NOTICE
 from .models import WaInboundMessage, WaOutboundMessage
 
 logger = logging.getLogger("whatsapp_bot")
@@ -67,6 +68,20 @@ def _twiml(text):
     return Response(str(resp), mimetype="application/xml")
 
 
+@wa_bp.teardown_request
+def _flush_outbound_log(exc):
+    """Write the outbound log rows a /wa request (backfill pings, approval
+    notices) buffered via messaging._log — never the request's own half-done
+    changes, which a failed request rolls back first."""
+    try:
+        if exc is not None:
+            db.session.rollback()
+        messaging.flush_log(commit=True)
+    except Exception:
+        db.session.rollback()
+        logger.exception("wa: failed to write the outbound log")
+
+
 @wa_bp.route("/healthz", methods=["GET"])
 def healthz():
     """Lightweight liveness check (no DB hit) for keep-warm pingers / monitors."""
@@ -75,8 +90,6 @@ def healthz():
 
 @wa_bp.route("/webhook", methods=["POST"])
 def webhook():
-    started = time.monotonic()
-
     # 1. Verify signature (fail closed) before doing anything else.
     if not _verify_twilio_signature(request):
         logger.warning("wa webhook: rejected request with invalid Twilio signature")
@@ -92,16 +105,21 @@ def webhook():
     except (TypeError, ValueError):
         num_media = 0
 
-    # 2. Claim the MessageSid + record the audit row, BEFORE any side effect.
+    # 2. Claim the MessageSid + enqueue the job in the same INSERT.
     #    A duplicate delivery loses the unique race and is answered silently.
-    audit = WaInboundMessage(
+    db.session.add(WaInboundMessage(
         message_sid=message_sid,
         from_phone=from_phone,
         profile_name=profile_name,
         body=body,
         num_media=num_media,
-    )
-    db.session.add(audit)
+        payload={
+            "button_payload": form.get("ButtonPayload"),
+            "media_url": form.get("MediaUrl0"),
+            "media_content_type": form.get("MediaContentType0"),
+        },
+        job_status="queued",
+    ))
     try:
         db.session.commit()
     except IntegrityError:
@@ -109,43 +127,9 @@ def webhook():
         logger.info("wa webhook: duplicate MessageSid %s — skipping", message_sid)
         return _twiml("")  # already handled on the first delivery; stay silent
 
-    # 3. Route to the conversation state machine. Replies are sent via REST
-    #    inside the router; the webhook just acknowledges with empty TwiML.
-    parsed_command = None
-    error_text = None
-    try:
-        inbound = {
-            "phone": from_phone,
-            "profile_name": profile_name,
-            "body": body,
-            "button_payload": form.get("ButtonPayload"),
-            "num_media": num_media,
-            "media_url": form.get("MediaUrl0"),
-            "media_content_type": form.get("MediaContentType0"),
-        }
-        parsed_command = router.handle(inbound)
-    except Exception as exc:
-        db.session.rollback()  # clear any aborted transaction so we can log + reply
-        logger.exception("wa webhook: handler error for sid %s", message_sid)
-        parsed_command = "error"
-        error_text = str(exc)
-        try:
-            messaging.send_text(from_phone, ERROR["en"])
-        except Exception:
-            db.session.rollback()
-            logger.exception("wa webhook: failed to send error reply")
-    finally:
-        audit.parsed_command = parsed_command
-        audit.response_summary = (parsed_command or "")[:200]
-        audit.processing_ms = int((time.monotonic() - started) * 1000)
-        audit.error = error_text
-        try:
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
-            logger.exception("wa webhook: failed to update audit row for sid %s", message_sid)
-
-    return _twiml("")  # empty 200 ack; the reply already went out via REST
+    # 3. Ack now; a jobs worker routes it and replies via REST.
+    jobs.notify()
+    return _twiml("")
 
 
 @wa_bp.route("/debug/messages", methods=["GET"])
@@ -159,6 +143,7 @@ def debug_messages():
     inbound = [{
         "at": str(r.created_at), "from": r.from_phone, "body": (r.body or "")[:100],
         "command": r.parsed_command, "ms": r.processing_ms, "error": r.error,
+        "job": r.job_status,
     } for r in WaInboundMessage.query.order_by(WaInboundMessage.id.desc()).limit(8)]
     outbound = []
     client = None